@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+DAY_NS = 86400 * 10 ** 9
+MINUTE_NS = 60 * 10 ** 9
+
+
+def _since(times, study_began):
+    '''Nanoseconds from the start of the study to each time (internal function).'''
+
+    times = np.asarray(times, dtype='datetime64[ns]')
+    return (times - np.datetime64(study_began, 'ns')).astype(np.int64)
+
+
+def _daily_series(days, amounts, study_days):
+    '''Add up amounts by day of study, with the study total as day 0 (internal function).
+
+    Args:
+        days (array): The day of study (from 0) of each amount. Days after the last day of study are counted in the
+                      last day, which is cut short when the study duration is rounded.
+        amounts (array): The amounts.
+        study_days (int): The number of days in the study.
+
+    Returns:
+        daily (series): The total of each day of study, indexed by day of study (from 1), and the study total at 0.
+    '''
+
+    study_days = max(study_days, 1)
+    days = np.minimum(days + 1, study_days)
+    daily = np.bincount(days, weights=amounts, minlength=study_days + 1)
+    daily[0] = daily[1:].sum()
+    return pd.Series(daily, dtype=np.float64)
+
+
+def daily_cooking_time(starts, ends, study_began, study_days):
+    '''Determine the total time spent cooking on a stove (mins) for each day of the study.
+
+    Cooking events that run past the end of a day of study are split, so each day gets the minutes cooked in it.
+
+    Args:
+        starts (array): The time each cooking event started.
+
+        ends (array): The time each cooking event ended.
+
+        study_began (datetime): The time of the first reading of the study.
+
+        study_days (int): The number of days in the study.
+
+    Returns:
+        daily_cooking (series): The cooking time (mins) for each day of study, indexed by day of study. Day 0 is the
+                                total cooking time.
+    '''
+
+    starts = _since(starts, study_began)
+    ends = _since(ends, study_began)
+    first_days = starts // DAY_NS
+    pieces = ends // DAY_NS - first_days + 1
+
+    # one piece for every day each cooking event runs into
+    event = np.repeat(np.arange(len(starts)), pieces)
+    days = first_days[event] + np.arange(len(event)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    piece_starts = np.maximum(starts[event], days * DAY_NS)
+    piece_ends = np.minimum(ends[event], (days + 1) * DAY_NS)
+
+    return _daily_series(days, (piece_ends - piece_starts) / MINUTE_NS, study_days)
+
+
+def daily_fuel_use(change_times, weights, study_began, study_days, weight_threshold):
+    '''Determine amount of fuel used in each 24hr period of study.
+
+    Every drop in weight from one significant weight change to the next of at least the weight threshold is counted
+    as fuel used on the day of the later change. Rises in weight are fuel being added.
+
+    Args:
+        change_times (array): The time of each significant weight change of the fuel.
+
+        weights (array): The weight (kg) of the fuel at each significant weight change.
+
+        study_began (datetime): The time of the first reading of the study.
+
+        study_days (int): The number of days in the study.
+
+        weight_threshold (float): The weight change (kg) that should be ignored.
+
+    Returns:
+        daily_fuel_usage (series): The fuel used (kg) on each day of study, indexed by day of study. Day 0 is the
+                                   total fuel used.
+    '''
+
+    weights = np.asarray(weights, dtype=np.float64)
+    days = _since(change_times, study_began)[1:] // DAY_NS
+    used = weights[:-1] - weights[1:]
+    used = np.where(used < weight_threshold, 0.0, used)
+
+    return _daily_series(days, used, study_days)
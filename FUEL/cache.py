@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import tempfile
+
+try:
+    from pyarrow import feather
+except ImportError:
+    feather = None
+
+from .example_file_convert import CONVERTER_VERSION
+
+
+def file_hash(path):
+    '''Hash the contents of a file.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        digest (str): The sha256 hex digest of the file contents.
+    '''
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+
+    def __init__(self, directory, max_size=1024 ** 3):
+        '''Set up an on-disk cache of converted household data files.
+
+        Every converted data file is saved as an uncompressed feather file in a single chunk, so it is loaded
+        memory-mapped without copying the readings, next to a json file holding the stoves, fuels and household ID.
+        Entries are looked up by the absolute path of the data file and are only used while the data file has the same
+        modification time and size, or failing that the same contents, and was converted by the same converter version
+        (example_file_convert.CONVERTER_VERSION).
+
+        Args:
+            directory (str): The directory the cache is kept in, created if it does not exist.
+
+            max_size (int): The most disk space (bytes) the cache can take up. The least recently used entries are
+                            removed once it is exceeded. Defaults to 1 GB.
+
+        Returns:
+            directory : Input cache directory
+            max_size : Input maximum cache size
+        '''
+
+        if feather is None:
+            raise ImportError('The conversion cache needs pyarrow to be installed!')
+        if type(directory) != str:
+            raise ValueError('Must put in the cache directory as a String!')
+        if type(max_size) != int or max_size < 0:
+            raise ValueError('The maximum cache size must be a non-negative integer!')
+
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry(self, datafile_path):
+        '''Paths of the data and metadata files of a cache entry (internal function).'''
+
+        key = hashlib.sha1(os.path.abspath(datafile_path).encode()).hexdigest()
+        entry = os.path.join(self.directory, key)
+        return entry + '.feather', entry + '.json'
+
+    def load(self, datafile_path):
+        '''Load a converted data file from the cache.
+
+        Args:
+            datafile_path (str): The data file path.
+
+        Returns:
+            converted (tuple): (df_stoves, stoves, fuels, hh_id) as given by reformat_example_files, None if the data
+                               file is not in the cache or has changed since it was cached. The readings of df_stoves
+                               are read-only views of the memory-mapped cache file.
+        '''
+
+        data_path, meta_path = self._entry(datafile_path)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CONVERTER_VERSION:
+            return None
+
+        stat = os.stat(datafile_path)
+        if (meta['mtime_ns'], meta['size']) != (stat.st_mtime_ns, stat.st_size):
+            if meta['size'] != stat.st_size or meta['sha256'] != file_hash(datafile_path):
+                return None
+            meta.update({'mtime_ns': stat.st_mtime_ns})
+            self._write_meta(meta_path, meta)
+
+        try:
+            # a column in one chunk without missing values becomes a numpy array over the mapped file instead of a copy
+            df_stoves = feather.read_table(data_path, memory_map=True).to_pandas(split_blocks=True, self_destruct=True)
+        except (OSError, ValueError):
+            return None
+        os.utime(meta_path)  # marks the entry as recently used
+        return df_stoves, meta['stoves'], meta['fuels'], meta['hh_id']
+
+    def store(self, datafile_path, converted):
+        '''Save a converted data file in the cache, then remove the least recently used entries if the cache is too
+        large.
+
+        Args:
+            datafile_path (str): The data file path.
+
+            converted (tuple): (df_stoves, stoves, fuels, hh_id) as given by reformat_example_files.
+
+        Returns:
+            stored (bool): Whether the data could be cached (feather files need unique column names).
+        '''
+
+        df_stoves, stoves, fuels, hh_id = converted
+        if not df_stoves.columns.is_unique:
+            return False
+
+        stat = os.stat(datafile_path)
+        meta = {'source': os.path.abspath(datafile_path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                'sha256': file_hash(datafile_path), 'version': CONVERTER_VERSION, 'stoves': list(stoves),
+                'fuels': list(fuels), 'hh_id': hh_id}
+
+        data_path, meta_path = self._entry(datafile_path)
+        # written to a temporary file first so other processes never load half written data
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            feather.write_feather(df_stoves, temp_path, compression='uncompressed', chunksize=max(len(df_stoves), 1))
+            os.replace(temp_path, data_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._write_meta(meta_path, meta)
+
+        self.evict()
+        return True
+
+    def _write_meta(self, meta_path, meta):
+        '''Write the metadata of a cache entry (internal function).'''
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, meta_path)
+
+    def entries(self):
+        '''Find every entry in the cache.
+
+        Returns:
+            entries (list): (last used time, size in bytes, data path, metadata path) of every cache entry, least
+                            recently used first.
+        '''
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            meta_path = os.path.join(self.directory, name)
+            data_path = meta_path[:-len('.json')] + '.feather'
+            try:
+                size = os.path.getsize(meta_path) + os.path.getsize(data_path)
+                entries.append((os.path.getmtime(meta_path), size, data_path, meta_path))
+            except OSError:
+                continue
+        return sorted(entries)
+
+    def size(self):
+        '''Disk space (bytes) taken up by the cache.'''
+
+        return sum(entry[1] for entry in self.entries())
+
+    def evict(self):
+        '''Remove the least recently used entries until the cache is no larger than max_size.'''
+
+        entries = self.entries()
+        total = sum(entry[1] for entry in entries)
+        for entry in entries:
+            if total <= self.max_size:
+                break
+            self._remove(entry)
+            total -= entry[1]
+
+    def clear(self):
+        '''Remove every entry from the cache.'''
+
+        for entry in self.entries():
+            self._remove(entry)
+
+    def _remove(self, entry):
+        '''Remove a single cache entry (internal function).'''
+
+        for path in (entry[3], entry[2]):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,99 @@
+import argparse
+import os
+import sys
+
+from .results import RESULT_FORMATS, ResultWriter, result_format
+from .study import Study, find_files, write_plotlyjs
+
+
+def parse_args(argv=None):
+    '''Read the command line options of fuel-analyse.
+
+    Args:
+        argv (list): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        args (object): The options, as an argparse.Namespace.
+    '''
+
+    parser = argparse.ArgumentParser(
+        prog='fuel-analyse',
+        description='Analyse many FUEL household data files, writing the daily stove and fuel usage of each '
+                    'household to a results file as soon as it is done.')
+    parser.add_argument('files', nargs='+',
+                        help='Data files, glob patterns (quote them) or directories of data files.')
+    parser.add_argument('-o', '--output', required=True,
+                        help='The results file (.csv or .jsonl) or directory (.parquet).')
+    parser.add_argument('--format', choices=RESULT_FORMATS,
+                        help='The results format. Defaults to the format of the output extension.')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('--chunksize', type=int, default=1,
+                        help='Number of files sent to a worker process at a time. Defaults to 1.')
+    parser.add_argument('--temp-threshold', type=int, default=15,
+                        help='Temperature threshold (degrees) cooking events are found with. Defaults to 15.')
+    parser.add_argument('--time-between-events', type=int, default=60,
+                        help='Least time (minutes) between cooking events. Defaults to 60.')
+    parser.add_argument('--weight-threshold', type=float, default=0.2,
+                        help='Weight change (kg) below which fuel weight changes are ignored. Defaults to 0.2.')
+    parser.add_argument('--cache-dir',
+                        help='Directory converted data files are cached in, so they are only converted again once '
+                             'they change.')
+    parser.add_argument('--figures',
+                        help='Directory the stove and fuel figures are written to. Defaults to a figures directory '
+                             'next to the output.')
+    parser.add_argument('--max-points', type=int,
+                        help='Number of points to aim for in each line of the figures. Defaults to every reading.')
+    parser.add_argument('--no-plots', action='store_true', help='Do not write any figures.')
+    parser.add_argument('--resume', action='store_true',
+                        help='Keep the households already in the output and only analyse the rest.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    '''Run fuel-analyse: analyse household data files across worker processes and stream the daily usage of each
+    household to the output as it finishes. Households that fail are reported and skipped.
+
+    Args:
+        argv (list): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        status (int): 0 if every household was analysed, 1 if any failed.
+    '''
+
+    args = parse_args(argv)
+    files = []
+    for pattern in args.files:
+        found = find_files(pattern)
+        files.extend(found if found or os.path.isdir(pattern) else [pattern])
+    # the same file can be picked up by more than one pattern
+    files = list(dict.fromkeys(files))
+
+    figures_dir = None
+    if not args.no_plots:
+        output = os.path.abspath(args.output.rstrip(os.sep))
+        figures_dir = args.figures or os.path.join(os.path.dirname(output), 'figures')
+        os.makedirs(figures_dir, exist_ok=True)
+        write_plotlyjs(figures_dir)
+
+    with ResultWriter(args.output, result_format(args.output, args.format), resume=args.resume) as writer:
+        todo = [path for path in files if os.path.abspath(path) not in writer.done]
+        skipped = len(files) - len(todo)
+        study = Study(todo, workers=args.workers, chunksize=args.chunksize, temp_threshold=args.temp_threshold,
+                      time_between_events=args.time_between_events, weight_threshold=args.weight_threshold,
+                      cache_dir=args.cache_dir)
+        failed = 0
+        for path, usage, error in study.results(figures_dir=figures_dir, max_points=args.max_points):
+            if error is not None:
+                failed += 1
+                print(path + ': ' + error, file=sys.stderr)
+            else:
+                writer.write(path, usage)
+
+    print(str(len(todo) - failed) + ' households analysed, ' + str(failed) + ' failed, ' + str(skipped) +
+          ' already in ' + args.output)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
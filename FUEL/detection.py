@@ -0,0 +1,694 @@
+import numpy as np
+
+from .profiling import NULL_PROFILER
+
+# number of consecutive readings below the temperature threshold that mark the start or end of a cooking event
+BELOW_THRESHOLD_READINGS = 5
+
+
+def find_peaks(readings, height=None):
+    '''Find every local maximum in some readings, as scipy.signal.find_peaks(readings, height=height) finds them,
+    without importing scipy.
+
+    A peak is a reading higher than the one before it and the one after it. A run of equal readings higher than the
+    readings either side of it is one peak, found at its middle (rounding down). Missing readings are never peaks and
+    are lower or higher than nothing.
+
+    Args:
+        readings (array): The readings.
+
+        height (float): Only peaks at or above this are found. Defaults to every peak.
+
+    Returns:
+        peaks (array): Sorted indices of the peaks.
+        properties (dict): The reading at each peak (peak_heights), when a height is given.
+    '''
+
+    x = np.asarray(readings, dtype=np.float64)
+    peaks = np.empty(0, dtype=np.intp)
+    if x.size >= 3:
+        middle = x[1:-1]
+        rising = (middle > x[:-2]) & (middle >= x[2:])
+        if height is not None:
+            rising &= middle >= height
+        peaks = np.flatnonzero(rising) + 1
+        flat = x[peaks + 1] == x[peaks]
+        if flat.any():
+            # a run of equal readings is a peak if the first different reading after it is lower
+            changes = np.flatnonzero(x[1:] != x[:-1])
+            starts = peaks[flat]
+            after = np.searchsorted(changes, starts)
+            found = after < len(changes)
+            starts, ends = starts[found], changes[after[found]]
+            lower = x[ends + 1] < x[starts]
+            peaks = np.sort(np.concatenate((peaks[~flat], (starts[lower] + ends[lower]) // 2)))
+
+    properties = {}
+    if height is not None:
+        properties['peak_heights'] = x[peaks]
+    return peaks, properties
+
+
+def below_threshold_runs(stove_temps, temp_threshold):
+    '''Find every position where a run of consecutive below-threshold readings is completed.
+
+    Args:
+        stove_temps (array): Temperature readings for a single stove.
+
+        temp_threshold (int): The temperature threshold (degrees) used to identify cooking events.
+
+    Returns:
+        run_ends (array): Sorted indices i for which the readings i-4 through i are all below temp_threshold.
+    '''
+
+    below = np.asarray(stove_temps) < temp_threshold
+    n = BELOW_THRESHOLD_READINGS
+    if len(below) < n:
+        return np.empty(0, dtype=np.intp)
+    run = below[n - 1:].copy()
+    for k in range(1, n):
+        run &= below[n - 1 - k:len(below) - k]
+    return np.flatnonzero(run) + n - 1
+
+
+def event_boundaries(stove_temps, peaks, temp_threshold, run_ends=None):
+    '''Find the start and end of cooking around every peak in one batched pass.
+
+    The start of a cooking event is found by looking back from the peak for the closest run of readings below the
+    threshold, the end by looking forward from the peak for the closest such run.
+
+    Args:
+        stove_temps (array): Temperature readings for a single stove.
+
+        peaks (array): Sorted indices of the cooking event peaks.
+
+        temp_threshold (int): The temperature threshold (degrees) used to identify cooking events.
+
+        run_ends (array): Output of below_threshold_runs for these readings, computed if not given.
+
+    Returns:
+        starts (array): Start index of each cooking event, -1 where no start could be found.
+        ends (array): End index of each cooking event.
+    '''
+
+    n = BELOW_THRESHOLD_READINGS
+    last = len(stove_temps) - 1
+    peaks = np.asarray(peaks, dtype=np.int64)
+    if run_ends is None:
+        run_ends = below_threshold_runs(stove_temps, temp_threshold)
+
+    # runs that begin in the first two readings are never used as a start, the start of the data is used instead
+    opening = run_ends[np.searchsorted(run_ends, n + 1):]
+    starts = np.full(len(peaks), -1, dtype=np.int64)
+    if len(opening):
+        before = np.searchsorted(opening, peaks - 1, side='right') - 1
+        found = before >= 0
+        starts[found] = opening[before[found]] - n + 2
+
+    # runs that finish in the last two readings are never used as an end, the end of the data is used instead
+    closing = run_ends[:np.searchsorted(run_ends, last - 2, side='right')]
+    after = np.searchsorted(closing, peaks + n - 1, side='left')
+    ends = np.full(len(peaks), last, dtype=np.int64)
+    found = after < len(closing)
+    ends[found] = closing[after[found]]
+
+    return starts, ends
+
+
+def select_by_distance(peaks, heights, distance, order=None, positions=None):
+    '''Keep only the highest peaks that are at least a minimum number of readings apart.
+
+    Peaks are kept from the highest down, removing every lower peak closer than distance to a kept peak. Of two equal
+    peaks the later one is kept, so the peaks kept do not depend on the readings far away from them.
+
+    Args:
+        peaks (array): Sorted indices of the peaks.
+
+        heights (array): Height of every peak.
+
+        distance (int): The minimum number of readings between kept peaks.
+
+        order (array): Positions in peaks from the highest peak to the lowest, as
+                       np.argsort(heights, kind='stable')[::-1]. Computed if not given.
+
+        positions (array): Where each peak is, in the units of distance, such as the time of each peak. Defaults to
+                           the peaks themselves.
+
+    Returns:
+        peaks (array): Sorted indices of the peaks kept.
+    '''
+
+    if distance < 1:
+        raise ValueError('`distance` must be greater or equal to 1')
+    peaks = np.asarray(peaks)
+    if distance == 1 or len(peaks) < 2:
+        return peaks
+
+    positions = (peaks if positions is None else np.asarray(positions)).tolist()
+    keep = [True] * len(positions)
+    if order is None:
+        order = np.argsort(heights, kind='stable')[::-1]
+    for i in order.tolist():
+        if not keep[i]:
+            continue
+        j = i - 1
+        while j >= 0 and positions[i] - positions[j] < distance:
+            keep[j] = False
+            j -= 1
+        j = i + 1
+        while j < len(positions) and positions[j] - positions[i] < distance:
+            keep[j] = False
+            j += 1
+    return peaks[keep]
+
+
+def find_cooking_events(stove_temps, temp_threshold, time_between_events, stove='stove', offset=0,
+                        profiler=NULL_PROFILER):
+    '''Identify cooking events in the temperature readings of a single stove.
+
+    Args:
+        stove_temps (array): Temperature readings for a single stove.
+
+        temp_threshold (int): The temperature threshold (degrees) used to identify cooking events.
+
+        time_between_events (int): The minimum number of readings between cooking event peaks.
+
+        stove (str): Name of the stove, used in error messages.
+
+        offset (int): Index of the first reading, added to every index found. Defaults to 0.
+
+        profiler (object): A profiling.Profiler the find_peaks, select_by_distance and event_boundaries stages are
+                           recorded in. Defaults to recording nothing.
+
+    Returns:
+        events (list): A list of lists containing cooking event information [cooking event, start of cooking,
+                       end of cooking]. Events that begin before the previous event has ended are dropped.
+    '''
+
+    stove_temps = np.asarray(stove_temps)
+    with profiler.stage('find_peaks', stove, len(stove_temps)) as stats:
+        peaks, properties = find_peaks(stove_temps, height=temp_threshold)
+        stats['found'] = len(peaks)
+    with profiler.stage('select_by_distance', stove, len(peaks)) as stats:
+        peaks = select_by_distance(peaks, properties['peak_heights'], time_between_events)
+        stats['found'] = len(peaks)
+    with profiler.stage('event_boundaries', stove, len(stove_temps)):
+        starts, ends = event_boundaries(stove_temps, peaks, temp_threshold)
+    return assemble_events(peaks, starts, ends, stove, offset)
+
+
+# most readings put in one stove matrix, larger matrices are slower than finding the events of each stove on its own
+STOVE_MATRIX_READINGS = 2 ** 20
+
+
+def stove_matrix_boundaries(stove_temps, temp_threshold, time_between_events, stoves=None, profiler=NULL_PROFILER):
+    '''Find the peaks, starts and ends of the cooking events of several stoves in one pass over all their readings.
+
+    The readings of every stove are put in the rows of one matrix, with a missing reading after each row so that no
+    peak or run of below-threshold readings can reach from one stove into the next. The peaks, the runs of readings
+    below the threshold and the start and end of every event are then found for all stoves at once, and only split by
+    stove at the end. The results are the same as find_cooking_events gives for each stove on its own.
+
+    Args:
+        stove_temps (list): Temperature readings (arrays of the same length) for each stove.
+
+        temp_threshold (int): The temperature threshold (degrees) used to identify cooking events.
+
+        time_between_events (int): The minimum number of readings between cooking event peaks.
+
+        stoves (list): Names of the stoves, recorded in the profiler. Defaults to no names.
+
+        profiler (object): A profiling.Profiler the find_peaks, select_by_distance and event_boundaries stages are
+                           recorded in, once for all the stoves. Defaults to recording nothing.
+
+    Returns:
+        boundaries (list): The peaks, starts and ends (arrays, see event_boundaries) of every stove's cooking events,
+                           to be put together with assemble_events.
+    '''
+
+    n = BELOW_THRESHOLD_READINGS
+    length = len(stove_temps[0]) if len(stove_temps) else 0
+    stride = length + 1
+    matrix = np.full((len(stove_temps), stride), np.nan)
+    for row, temps in enumerate(stove_temps):
+        matrix[row, :length] = temps
+    readings = matrix.ravel()
+    item = ', '.join(stoves) if stoves is not None else None
+
+    with profiler.stage('find_peaks', item, readings.size) as stats:
+        peaks, properties = find_peaks(readings, height=temp_threshold)
+        stats['found'] = len(peaks)
+    with profiler.stage('select_by_distance', item, len(peaks)) as stats:
+        # spread the rows out so that peaks of different stoves are never closer than time_between_events
+        spread = stride + time_between_events
+        kept = select_by_distance(peaks // stride * spread + peaks % stride, properties['peak_heights'],
+                                  time_between_events)
+        peaks = kept // spread * stride + kept % spread
+        stats['found'] = len(peaks)
+    with profiler.stage('event_boundaries', item, readings.size):
+        row_starts = peaks // stride * stride
+        run_ends = below_threshold_runs(readings, temp_threshold)
+
+        # as in event_boundaries, runs in the first or last two readings of a row are not used, and as the closest run
+        # to a peak is checked, any run further away in the same row would not be used either
+        before = np.searchsorted(run_ends, peaks - 1, side='right') - 1
+        found = before >= 0
+        found[found] = run_ends[before[found]] >= row_starts[found] + n + 1
+        starts = np.full(len(peaks), -1, dtype=np.int64)
+        starts[found] = run_ends[before[found]] - n + 2 - row_starts[found]
+
+        after = np.searchsorted(run_ends, peaks + n - 1, side='left')
+        found = after < len(run_ends)
+        found[found] = run_ends[after[found]] <= row_starts[found] + length - 3
+        ends = np.full(len(peaks), length - 1, dtype=np.int64)
+        ends[found] = run_ends[after[found]] - row_starts[found]
+
+    rows = row_starts // stride
+
+    splits = np.searchsorted(rows, np.arange(1, len(stove_temps)))
+    return list(zip(np.split(peaks - rows * stride, splits), np.split(starts, splits), np.split(ends, splits)))
+
+
+def assemble_events(peaks, starts, ends, stove='stove', offset=0):
+    '''Put the peaks, starts and ends of cooking events together, dropping events that begin before the previous
+    event has ended.
+
+    Args:
+        peaks (array): Sorted indices of the cooking event peaks.
+
+        starts (array): Start index of each cooking event, -1 where no start could be found (see event_boundaries).
+
+        ends (array): End index of each cooking event.
+
+        stove (str): Name of the stove, used in error messages.
+
+        offset (int): Added to every index. Defaults to 0.
+
+    Returns:
+        events (list): A list of lists containing cooking event information [cooking event, start of cooking,
+                       end of cooking].
+    '''
+
+    events = []
+    for peak, start_time, end_time in zip((peaks + offset).tolist(), (starts + offset).tolist(),
+                                          (ends + offset).tolist()):
+        if start_time < offset:
+            raise ValueError('Could not find start time for cooking event on ' + stove + ' at index: ' + str(peak))
+        if events and events[-1][2] > start_time:
+            continue
+        events.append([peak, start_time, end_time])
+    return events
+
+
+# readings of a long run of below-threshold readings kept on either side of a cut through it (see event_cut)
+CUT_MARGIN = BELOW_THRESHOLD_READINGS + 2
+
+
+def event_cut(stove_temps, temp_threshold, time_between_events):
+    '''Find the last point the readings of a stove can be split at without changing the cooking events found.
+
+    Readings are split in a run of at least max(time_between_events - 1, 14) readings below the temperature threshold.
+    Peaks on either side of such a run are always time_between_events apart, the event before it ends within the first
+    5 readings of the run and the event after it starts within the last 5, so keeping 7 readings of the run on either
+    side of the split, the cooking events found in the readings before the split and in the readings after it are
+    exactly the cooking events found in all readings at once. This holds whatever readings come after.
+
+    Args:
+        stove_temps (array): Temperature readings for a single stove.
+
+        temp_threshold (int): The temperature threshold (degrees) used to identify cooking events.
+
+        time_between_events (int): The minimum number of readings between cooking event peaks.
+
+    Returns:
+        cut (int): Index of the first reading after the split, 0 if the readings cannot be split.
+    '''
+
+    below = np.asarray(stove_temps) < temp_threshold
+    run_length = max(time_between_events - 1, 2 * CUT_MARGIN)
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], below, [False])).astype(np.int8)))
+    run_starts, run_ends = edges[::2], edges[1::2]
+    long_runs = np.flatnonzero(run_ends - run_starts >= run_length)
+    if not len(long_runs):
+        return 0
+    return int(run_ends[long_runs[-1]]) - CUT_MARGIN
+
+
+def extend_cooking_events(stove_temps, temp_threshold, time_between_events, events, previous_length, stove='stove'):
+    '''Identify the cooking events of a stove whose readings have grown, from the events found before they grew.
+
+    Only the readings after the last point the earlier readings can be split at (see event_cut) are searched again.
+
+    Args:
+        stove_temps (array): All temperature readings for a single stove.
+
+        temp_threshold (int): The temperature threshold (degrees) used to identify cooking events.
+
+        time_between_events (int): The minimum number of readings between cooking event peaks.
+
+        events (list): The cooking events found in the first previous_length readings (see find_cooking_events).
+
+        previous_length (int): The number of readings before they grew.
+
+        stove (str): Name of the stove, used in error messages.
+
+    Returns:
+        events (list): The cooking events found in all readings, as find_cooking_events would find them.
+    '''
+
+    stove_temps = np.asarray(stove_temps)
+    window = 4 * max(time_between_events, 2 * CUT_MARGIN)
+    cut = 0
+    while True:
+        first = max(previous_length - window, 0)
+        cut = event_cut(stove_temps[first:previous_length], temp_threshold, time_between_events)
+        if cut or not first:
+            cut += first
+            break
+        window *= 2
+
+    events = [list(event) for event in events if event[0] < cut]
+    return events + find_cooking_events(stove_temps[cut:], temp_threshold, time_between_events, stove, offset=cut)
+
+
+# time (seconds) from the first to the last of the readings below the temperature threshold that mark the start or end
+# of a cooking event when events are found from the timestamps, as for 5 readings a minute apart
+BELOW_THRESHOLD_SECONDS = (BELOW_THRESHOLD_READINGS - 1) * 60
+# readings further apart than this (seconds) are split by a gap no cooking event is found across
+MAX_GAP_SECONDS = 600
+SECOND_NS = 10 ** 9
+
+
+def find_segments(timestamps, max_gap=MAX_GAP_SECONDS):
+    '''Split readings into segments wherever the time between two readings is more than the largest gap allowed.
+
+    Args:
+        timestamps (array): The time of each reading, in order.
+
+        max_gap (float): The most time (seconds) between two readings of the same segment.
+
+    Returns:
+        first (array): Index of the first reading of each segment.
+        last (array): Index of the last reading of each segment.
+    '''
+
+    ns = np.asarray(timestamps, dtype='datetime64[ns]').astype(np.int64)
+    if not len(ns):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(ns) > max_gap * SECOND_NS)
+    return np.concatenate(([0], breaks + 1)), np.concatenate((breaks, [len(ns) - 1]))
+
+
+def timed_cooking_events(stove_temps, timestamps, temp_threshold, time_between_events, max_gap=MAX_GAP_SECONDS,
+                         below_duration=BELOW_THRESHOLD_SECONDS, stove='stove', profiler=NULL_PROFILER):
+    '''Identify cooking events in the temperature readings of a single stove from the time of each reading, for
+    readings that are not a minute apart.
+
+    Missing readings are left out and the readings are split into segments at every gap longer than max_gap (see
+    find_segments), so no peak, start or end is ever found across a gap. Peaks are kept at least time_between_events
+    apart in time, and the start and end of cooking are found from the closest readings below the threshold lasting
+    below_duration, as find_cooking_events does with counts of readings. A cooking event with no such readings between
+    it and the edge of its segment starts or ends at that edge. With readings a minute apart and no gaps, the cooking
+    events found are the same as find_cooking_events finds.
+
+    Args:
+        stove_temps (array): Temperature readings for a single stove, missing readings as NaN.
+
+        timestamps (array): The time of each reading, in order.
+
+        temp_threshold (int): The temperature threshold (degrees) used to identify cooking events.
+
+        time_between_events (float): The minimum time (seconds) between cooking event peaks.
+
+        max_gap (float): The most time (seconds) between two readings before they are split by a gap. Defaults to
+                         MAX_GAP_SECONDS.
+
+        below_duration (float): The time (seconds) from the first to the last of the readings below the threshold
+                                that mark the start or end of a cooking event. Defaults to BELOW_THRESHOLD_SECONDS.
+
+        stove (str): Name of the stove, recorded in the profiler.
+
+        profiler (object): A profiling.Profiler the find_peaks, select_by_distance and event_boundaries stages are
+                           recorded in. Defaults to recording nothing.
+
+    Returns:
+        events (list): A list of lists containing cooking event information [cooking event, start of cooking,
+                       end of cooking], as indices of the readings given.
+    '''
+
+    stove_temps = np.asarray(stove_temps, dtype=np.float64)
+    rows = np.flatnonzero(~np.isnan(stove_temps))
+    temps = stove_temps[rows]
+    ns = np.asarray(timestamps, dtype='datetime64[ns]').astype(np.int64)[rows]
+    first, last = find_segments(ns.astype('datetime64[ns]'), max_gap)
+    segment = np.repeat(np.arange(len(first)), last - first + 1)
+
+    with profiler.stage('find_peaks', stove, len(temps)) as stats:
+        # a missing reading between segments keeps peaks from reaching across the gaps
+        breaks = last[:-1] + 1
+        peaks, properties = find_peaks(np.insert(temps, breaks, np.nan), height=temp_threshold)
+        peaks -= np.searchsorted(breaks + np.arange(len(breaks)), peaks)
+        stats['found'] = len(peaks)
+    with profiler.stage('select_by_distance', stove, len(peaks)) as stats:
+        peaks = select_by_distance(peaks, properties['peak_heights'], time_between_events * SECOND_NS,
+                                   positions=ns[peaks])
+        stats['found'] = len(peaks)
+    with profiler.stage('event_boundaries', stove, len(temps)):
+        # every reading that ends readings below the threshold lasting below_duration in its segment, and the
+        # reading those readings begin at
+        below_count = np.concatenate(([0], np.cumsum(temps < temp_threshold)))
+        begins = np.searchsorted(ns, ns - below_duration * SECOND_NS, side='right') - 1
+        all_below = below_count[1:] - below_count[np.maximum(begins, 0)] == np.arange(len(ns)) - begins + 1
+        run_ends = np.flatnonzero((begins >= first[segment]) & all_below)
+        begins = begins[run_ends]
+        peak_segments = segment[peaks]
+
+        # as in event_boundaries, runs that begin in the first two readings of a segment are never used as a start
+        # and runs that finish in its last two readings are never used as an end
+        opening = begins >= first[segment[run_ends]] + 2
+        opening_ends, opening_begins = run_ends[opening], begins[opening]
+        before = np.searchsorted(opening_ends, peaks - 1, side='right') - 1
+        found = before >= 0
+        found[found] = segment[opening_ends[before[found]]] == peak_segments[found]
+        starts = first[peak_segments]
+        starts[found] = opening_begins[before[found]] + 1
+
+        closing = run_ends <= last[segment[run_ends]] - 2
+        closing_ends, closing_begins = run_ends[closing], begins[closing]
+        after = np.searchsorted(closing_begins, peaks, side='left')
+        found = after < len(closing_ends)
+        found[found] = segment[closing_ends[after[found]]] == peak_segments[found]
+        ends = last[peak_segments]
+        ends[found] = closing_ends[after[found]]
+
+    return assemble_events(rows[peaks], rows[starts], rows[ends], stove)
+
+
+# number of fuel weight readings summarised together when searching for the next significant weight change
+WEIGHT_BLOCK_SIZE = 32
+# relative error allowed for when comparing block summaries to the weight threshold
+ROUNDING_SLACK = 4 * np.finfo(np.float64).eps
+
+
+def weight_blocks(readings, floor):
+    '''Summarise blocks of fuel weight readings by their lowest and highest reading (internal function).
+
+    Readings below the floor are left out of the summary. A block holding a missing reading is given an infinite
+    range so that it is always checked. The summary only depends on the readings and the floor, so it can be shared by
+    searches with different weight thresholds.
+
+    Args:
+        readings (array): Weight readings (kg), as float64.
+
+        floor (float): Readings below this weight (kg) are left out.
+
+    Returns:
+        block_min (list): The lowest reading of every WEIGHT_BLOCK_SIZE readings.
+        block_max (list): The highest reading of every WEIGHT_BLOCK_SIZE readings.
+    '''
+
+    block_starts = np.arange(0, len(readings), WEIGHT_BLOCK_SIZE)
+    lowest = readings if floor is None else np.where(readings < floor, np.inf, readings)
+    highest = readings if floor is None else np.where(readings < floor, -np.inf, readings)
+    block_min = np.minimum.reduceat(lowest, block_starts)
+    block_max = np.maximum.reduceat(highest, block_starts)
+    missing = np.isnan(block_min)
+    if missing.any():
+        block_min[missing] = -np.inf
+        block_max[missing] = np.inf
+    return block_min.tolist(), block_max.tolist()
+
+
+def scan_weight_changes(fuel_weights, weight_threshold, weight, start, stop, floor=None, blocks=None):
+    '''Find the significant weight changes between two readings, starting from a known reference weight.
+
+    Readings are first summarised in blocks by their range, and only the blocks whose range reaches the weight
+    threshold around the current reference weight are then checked reading by reading.
+
+    Args:
+        fuel_weights (array): Weight readings (kg) for a single fuel.
+
+        weight_threshold (float): The weight change (kg) that should be ignored.
+
+        weight (float): The reference weight at the start of the scan (the weight at the last significant change).
+
+        start (int): First reading to check, must be at least 1.
+
+        stop (int): Reading at which to stop checking, at most len(fuel_weights) - 1 as every checked reading needs
+                    the reading after it.
+
+        floor (float): Readings below this weight (kg) are ignored. Defaults to no floor.
+
+        blocks (tuple): weight_blocks(fuel_weights[start:stop], floor), computed if not given.
+
+    Returns:
+        weight_changes (list): Indices of all significant weight changes found in [start, stop).
+        weight (float): The reference weight after the last change found.
+    '''
+
+    fuel_weights = np.ascontiguousarray(fuel_weights, dtype=np.float64)
+    weight_changes = []
+    if stop <= start:
+        return weight_changes, weight
+
+    if blocks is None:
+        blocks = weight_blocks(fuel_weights[start:stop], floor)
+    # a final block that always needs checking stops the search for the next change
+    block_min = blocks[0] + [-np.inf]
+    block_max = blocks[1] + [np.inf]
+    blocks = len(blocks[0])
+
+    weight = float(weight)
+    position = start
+    while position < stop:
+        if weight == weight:
+            # widen the bounds a little so rounding in the weight difference can never hide a change
+            slack = ROUNDING_SLACK * (abs(weight) + weight_threshold)
+            low = weight - weight_threshold + slack
+            high = weight + weight_threshold - slack
+        else:
+            # every reading differs from a missing reference weight
+            low, high = np.inf, -np.inf
+
+        block = (position - start) // WEIGHT_BLOCK_SIZE
+        while block_min[block] > low and block_max[block] < high:
+            block += 1
+        if block == blocks:
+            break
+
+        change = None
+        block_start = max(position, start + block * WEIGHT_BLOCK_SIZE)
+        block_end = min(stop, start + (block + 1) * WEIGHT_BLOCK_SIZE)
+        values = fuel_weights[block_start - 1:block_end + 1].tolist()
+        for i in range(block_start, block_end):
+            current_weight = values[i - block_start + 1]
+            if low < current_weight < high:
+                continue
+            if floor is not None and current_weight < floor:
+                continue
+            weight_diff = current_weight - weight
+            if abs(weight_diff) < weight_threshold:
+                continue
+            # check to make sure it isnt catching random peaks
+            if weight_diff > weight_threshold:
+                weight_before = values[i - block_start]
+                weight_after = values[i - block_start + 2]
+                if abs(weight_after - weight_before) < weight_threshold or weight_after < weight_before:
+                    continue
+            change = i
+            break
+
+        if change is None:
+            position = block_end
+        else:
+            weight_changes.append(change)
+            weight = values[change - block_start + 1]
+            position = change + 1
+
+    return weight_changes, weight
+
+
+def _last_reading_change(fuel_weights, weight, floor):
+    '''Whether the last reading is a significant weight change (internal function).
+
+    The last reading has no reading after it, so it only counts if the reading before it dropped.
+    '''
+
+    last = len(fuel_weights) - 1
+    return not (floor is not None and fuel_weights[last] < floor) and fuel_weights[last - 1] < weight
+
+
+def find_weight_changes(fuel_weights, weight_threshold, floor=None, blocks=None, skip_missing=False):
+    '''Find all significant weight changes in the readings of a single fuel.
+
+    Args:
+        fuel_weights (array): Weight readings (kg) for a single fuel.
+
+        weight_threshold (float): The weight change (kg) that should be ignored. All weight changes above this
+                                  value will be marked.
+
+        floor (float): Readings below this weight (kg) are ignored. Defaults to no floor.
+
+        blocks (tuple): weight_blocks(fuel_weights[1:-1], floor), computed if not given.
+
+        skip_missing (bool): If True missing readings are left out, as if they were never taken, and blocks must be
+                             the summaries of the readings that are not missing. Defaults to False.
+
+    Returns:
+        weight_changes (list): A list of all fuel change indices found that resulted in a change of fuel weight
+                               larger than the prescribed threshold (weight_threshold).
+    '''
+
+    fuel_weights = np.ascontiguousarray(fuel_weights, dtype=np.float64)
+    if skip_missing:
+        rows = np.flatnonzero(~np.isnan(fuel_weights))
+        return rows[find_weight_changes(fuel_weights[rows], weight_threshold, floor, blocks)].tolist()
+    last = len(fuel_weights) - 1
+    if last < 1:
+        return []
+
+    weight_changes, weight = scan_weight_changes(fuel_weights, weight_threshold, fuel_weights[0], 1, last, floor,
+                                                 blocks)
+    if _last_reading_change(fuel_weights, weight, floor):
+        weight_changes.append(last)
+    return weight_changes
+
+
+def extend_weight_changes(fuel_weights, weight_threshold, weight_changes, previous_length, floor=None):
+    '''Find the significant weight changes of a fuel whose readings have grown, from the changes found before they
+    grew. Only the new readings are checked.
+
+    Args:
+        fuel_weights (array): All weight readings (kg) for a single fuel.
+
+        weight_threshold (float): The weight change (kg) that should be ignored.
+
+        weight_changes (list): The weight changes found in the first previous_length readings (see
+                               find_weight_changes).
+
+        previous_length (int): The number of readings before they grew.
+
+        floor (float): Readings below this weight (kg) are ignored. Defaults to no floor.
+
+    Returns:
+        weight_changes (list): The weight changes found in all readings, as find_weight_changes would find them.
+    '''
+
+    fuel_weights = np.ascontiguousarray(fuel_weights, dtype=np.float64)
+    last = len(fuel_weights) - 1
+    if previous_length < 2:
+        return find_weight_changes(fuel_weights, weight_threshold, floor)
+
+    weight_changes = list(weight_changes)
+    if weight_changes and weight_changes[-1] == previous_length - 1:
+        # the old last reading was only checked against the reading before it
+        weight_changes.pop()
+    weight = fuel_weights[weight_changes[-1]] if weight_changes else fuel_weights[0]
+
+    new_changes, weight = scan_weight_changes(fuel_weights, weight_threshold, weight, previous_length - 1, last,
+                                              floor)
+    weight_changes.extend(new_changes)
+    if _last_reading_change(fuel_weights, weight, floor):
+        weight_changes.append(last)
+    return weight_changes
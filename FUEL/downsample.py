@@ -0,0 +1,127 @@
+import numpy as np
+
+DOWNSAMPLE_METHODS = ('minmax', 'lttb')
+
+
+def _bucket_edges(length, buckets):
+    '''Edges of buckets of (nearly) equal size covering length readings (internal function).'''
+
+    return np.linspace(0, length, buckets + 1).astype(np.int64)
+
+
+def min_max_indices(y, max_points):
+    '''Pick the readings to plot by keeping the lowest and highest reading in each bucket of readings.
+
+    Args:
+        y (array): The readings.
+
+        max_points (int): The most readings to keep (at least 2).
+
+    Returns:
+        indices (array): Sorted indices of the kept readings, always including the first and last reading.
+    '''
+
+    y = np.asarray(y, dtype=np.float64)
+    length = len(y)
+    if length <= max_points:
+        return np.arange(length)
+
+    buckets = max(max_points // 2, 1)
+    size = -(-length // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:length] = y
+    padded = padded.reshape(buckets, size)
+    # missing readings are never picked unless a bucket has nothing else
+    lows = np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    starts = np.arange(buckets) * size
+
+    indices = np.concatenate((starts + lows, starts + highs, [0, length - 1]))
+    return np.unique(indices[indices < length])
+
+
+def lttb_indices(y, max_points, x=None):
+    '''Pick the readings to plot with the largest triangle three buckets method, which keeps the readings that change
+    the shape of the line the most.
+
+    Args:
+        y (array): The readings.
+
+        max_points (int): The most readings to keep.
+
+        x (array): The time of each reading as numbers. Defaults to evenly spaced readings.
+
+    Returns:
+        indices (array): Sorted indices of the kept readings, always including the first and last reading.
+    '''
+
+    y = np.asarray(y, dtype=np.float64)
+    length = len(y)
+    if length <= max_points:
+        return np.arange(length)
+    if max_points < 3:
+        return np.array([0, length - 1])
+    x = np.arange(length, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    # missing readings are treated as the last reading before them
+    if np.isnan(y).any():
+        y = _fill_missing(y)
+
+    edges = _bucket_edges(length - 2, max_points - 2) + 1
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = length - 1
+    a = 0
+    for b in range(max_points - 2):
+        start, end = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            next_x = x[edges[b + 1]:edges[b + 2]].mean()
+            next_y = y[edges[b + 1]:edges[b + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        areas = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[b + 1] = a
+
+    return np.unique(indices)
+
+
+def _fill_missing(y):
+    '''Replace missing readings with the last reading before them, or 0 at the start (internal function).'''
+
+    valid = ~np.isnan(y)
+    last = np.maximum.accumulate(np.where(valid, np.arange(len(y)), -1))
+    return np.where(last >= 0, y[np.maximum(last, 0)], 0.0)
+
+
+def downsample_indices(y, max_points, method='minmax', x=None, keep=None):
+    '''Pick the readings of a line trace to plot.
+
+    Args:
+        y (array): The readings.
+
+        max_points (int): The number of readings to aim for. The readings in keep are added on top.
+
+        method (str): 'minmax' keeps the lowest and highest reading of each bucket of readings, so every spike is
+                      still shown. 'lttb' uses the largest triangle three buckets method, which gives a smoother line.
+                      Defaults to 'minmax'.
+
+        x (array): The time of each reading as numbers, used by 'lttb'. Defaults to evenly spaced readings.
+
+        keep (list): Indices of readings that must be kept, such as cooking events or weight changes.
+
+    Returns:
+        indices (array): Sorted indices of the readings to plot.
+    '''
+
+    if type(max_points) != int or max_points < 2:
+        raise ValueError('The number of points to plot must be an integer of at least 2!')
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError('The downsampling method must be one of ' + ', '.join(DOWNSAMPLE_METHODS) + '!')
+
+    if method == 'minmax':
+        indices = min_max_indices(y, max_points)
+    else:
+        indices = lttb_indices(y, max_points, x)
+    if keep is not None and len(keep):
+        indices = np.union1d(indices, np.asarray(keep, dtype=np.int64))
+    return indices
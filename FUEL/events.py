@@ -0,0 +1,312 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# timestamps are kept as text in this format, so they sort in time order and work with the SQLite date functions
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+COOKING_COLUMNS = ['stove', 'start_time', 'end_time', 'peak_time', 'minutes']
+FUEL_COLUMNS = ['fuel', 'time', 'weight', 'weight_change']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS households (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    hh_id TEXT NOT NULL,
+    temp_threshold REAL,
+    time_between_events REAL,
+    weight_threshold REAL
+);
+CREATE TABLE IF NOT EXISTS cooking_events (
+    household INTEGER NOT NULL REFERENCES households (id),
+    stove TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    peak_time TEXT NOT NULL,
+    minutes REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fuel_changes (
+    household INTEGER NOT NULL REFERENCES households (id),
+    fuel TEXT NOT NULL,
+    time TEXT NOT NULL,
+    weight REAL,
+    weight_change REAL
+);
+CREATE INDEX IF NOT EXISTS households_hh_id ON households (hh_id);
+CREATE INDEX IF NOT EXISTS cooking_events_stove ON cooking_events (stove, start_time);
+CREATE INDEX IF NOT EXISTS cooking_events_household ON cooking_events (household, stove, start_time);
+CREATE INDEX IF NOT EXISTS fuel_changes_fuel ON fuel_changes (fuel, time);
+CREATE INDEX IF NOT EXISTS fuel_changes_household ON fuel_changes (household, fuel, time);
+'''
+
+
+def _time(value):
+    '''A time as it is kept in the event store (internal function).'''
+
+    return pd.Timestamp(value).strftime(TIME_FORMAT)
+
+
+def household_events(household):
+    '''Put the cooking events and significant fuel weight changes of a household into dataframes, with the times they
+    happened instead of their indices.
+
+    Args:
+        household (object): A Household.
+
+    Returns:
+        events (dict): The household ID (hh_id) and thresholds (temp_threshold, time_between_events,
+                       weight_threshold) of the household, with a cooking_events dataframe (stove, start_time,
+                       end_time, peak_time and minutes of every cooking event) and a fuel_changes dataframe (fuel,
+                       time, weight and weight_change of every significant weight change, where weight_change is the
+                       change since the one before and is missing for the first).
+    '''
+
+    timestamps = pd.DatetimeIndex(household._timestamps())
+    times = timestamps.strftime(TIME_FORMAT)
+
+    cooking = []
+    for s, events in household.cooking_events().items():
+        events = np.array(events, dtype=np.int64).reshape(-1, 3)
+        minutes = (timestamps[events[:, 2]] - timestamps[events[:, 1]]).total_seconds() / 60
+        cooking.append(pd.DataFrame({'stove': s, 'start_time': times[events[:, 1]], 'end_time': times[events[:, 2]],
+                                     'peak_time': times[events[:, 0]], 'minutes': np.asarray(minutes)}))
+
+    fuel = []
+    for f in household.fuels:
+        changes = np.asarray(household._find_weight_changes(f), dtype=np.int64)
+        weights = household._readings(f)[changes].astype(np.float64)
+        fuel.append(pd.DataFrame({'fuel': f, 'time': times[changes], 'weight': weights,
+                                  'weight_change': np.concatenate(([np.nan], np.diff(weights)))[:len(changes)]}))
+
+    cooking = pd.concat(cooking, ignore_index=True) if cooking else pd.DataFrame(columns=COOKING_COLUMNS)
+    fuel = pd.concat(fuel, ignore_index=True) if fuel else pd.DataFrame(columns=FUEL_COLUMNS)
+    return {'hh_id': household.hh_id, 'temp_threshold': household.temp_threshold,
+            'time_between_events': household.time_between_events, 'weight_threshold': household.weight_threshold,
+            'cooking_events': cooking, 'fuel_changes': fuel}
+
+
+class EventStore:
+
+    def __init__(self, path):
+        '''Open (or create) a SQLite database of the cooking events and fuel weight changes of many households, so
+        questions across a whole study can be answered with indexed queries instead of analysing the data files again.
+
+        Households are kept by data file path, with the thresholds their events were found with. Cooking events are
+        indexed by stove and start time and fuel changes by fuel and time, each also under their household, and
+        times are kept as 'YYYY-MM-DD HH:MM:SS' text so the SQLite date functions can be used in query.
+
+        Args:
+            path (str): The database file path, or ':memory:' for a database that is not saved.
+
+        Returns:
+            path : Input database path
+        '''
+
+        if type(path) != str:
+            raise ValueError('Must put in the database path as a String!')
+
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(SCHEMA)
+
+    def add(self, household, file):
+        '''Add the events of a household, replacing any kept for the same data file.
+
+        Args:
+            household (object): A Household.
+
+            file (str): The data file path of the household.
+        '''
+
+        self.write([(file, household_events(household))])
+
+    def write(self, households, batch_size=100):
+        '''Write the events of many households, batch_size households to a transaction. The events of a data file
+        already in the store are replaced.
+
+        Args:
+            households (iterable): (file, events) of every household, where events are given by household_events.
+
+            batch_size (int): Number of households written in each transaction. Defaults to 100.
+
+        Returns:
+            written (int): The number of households written.
+        '''
+
+        if type(batch_size) != int or batch_size < 1:
+            raise ValueError('The batch size must be a positive integer!')
+
+        written = 0
+        batch = []
+        for item in households:
+            batch.append(item)
+            if len(batch) == batch_size:
+                written += self._write_batch(batch)
+                batch = []
+        if batch:
+            written += self._write_batch(batch)
+        return written
+
+    def _write_batch(self, batch):
+        '''Write the events of some households in one transaction (internal function).'''
+
+        with self._connection as connection:
+            for file, events in batch:
+                row = connection.execute('SELECT id FROM households WHERE file = ?', (file,)).fetchone()
+                thresholds = (events['hh_id'], events['temp_threshold'], events['time_between_events'],
+                              events['weight_threshold'])
+                if row is None:
+                    household = connection.execute(
+                        'INSERT INTO households (file, hh_id, temp_threshold, time_between_events, weight_threshold) '
+                        'VALUES (?, ?, ?, ?, ?)', (file,) + thresholds).lastrowid
+                else:
+                    household = row[0]
+                    connection.execute('UPDATE households SET hh_id = ?, temp_threshold = ?, time_between_events = ?, '
+                                       'weight_threshold = ? WHERE id = ?', thresholds + (household,))
+                    connection.execute('DELETE FROM cooking_events WHERE household = ?', (household,))
+                    connection.execute('DELETE FROM fuel_changes WHERE household = ?', (household,))
+
+                cooking = events['cooking_events']
+                connection.executemany(
+                    'INSERT INTO cooking_events VALUES (?, ?, ?, ?, ?, ?)',
+                    zip([household] * len(cooking), cooking['stove'], cooking['start_time'], cooking['end_time'],
+                        cooking['peak_time'], cooking['minutes'].astype(float)))
+                fuel = events['fuel_changes']
+                connection.executemany(
+                    'INSERT INTO fuel_changes VALUES (?, ?, ?, ?, ?)',
+                    zip([household] * len(fuel), fuel['fuel'], fuel['time'],
+                        [None if np.isnan(w) else w for w in fuel['weight'].astype(float)],
+                        [None if np.isnan(w) else w for w in fuel['weight_change'].astype(float)]))
+        return len(batch)
+
+    def query(self, sql, params=()):
+        '''Run any SQL query on the store.
+
+        Args:
+            sql (str): The query, with ? for each parameter.
+
+            params (tuple): The query parameters. Defaults to none.
+
+        Returns:
+            result (dataframe): The rows found.
+        '''
+
+        return pd.read_sql_query(sql, self._connection, params=params)
+
+    def households(self):
+        '''The households in the store.
+
+        Returns:
+            households (dataframe): The data file, household ID and thresholds of every household.
+        '''
+
+        return self.query('SELECT file, hh_id, temp_threshold, time_between_events, weight_threshold FROM households '
+                          'ORDER BY file')
+
+    def cooking_events(self, stove=None, hh_id=None, start=None, end=None, min_minutes=None):
+        '''Find the cooking events of every household in the store.
+
+        Args:
+            stove (str): Only events of this stove. Defaults to every stove.
+
+            hh_id (str): Only events of this household. Defaults to every household.
+
+            start (datetime): Only events starting at or after this time. Defaults to no limit.
+
+            end (datetime): Only events starting before this time. Defaults to no limit.
+
+            min_minutes (float): Only events lasting at least this long (minutes). Defaults to no limit.
+
+        Returns:
+            events (dataframe): The household ID, data file, stove, start, end and peak times and minutes of every
+                                event found, in order of start time.
+        '''
+
+        conditions, params = [], []
+        for condition, value in (('c.stove = ?', stove), ('h.hh_id = ?', hh_id),
+                                 ('c.start_time >= ?', None if start is None else _time(start)),
+                                 ('c.start_time < ?', None if end is None else _time(end)),
+                                 ('c.minutes >= ?', min_minutes)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        events = self.query('SELECT h.hh_id, h.file, c.stove, c.start_time, c.end_time, c.peak_time, c.minutes '
+                            'FROM cooking_events c JOIN households h ON h.id = c.household' +
+                            ''.join((' AND ' if i else ' WHERE ') + c for i, c in enumerate(conditions)) +
+                            ' ORDER BY c.start_time, h.file, c.stove', tuple(params))
+        for column in ('start_time', 'end_time', 'peak_time'):
+            events[column] = pd.to_datetime(events[column])
+        return events
+
+    def fuel_changes(self, fuel=None, hh_id=None, start=None, end=None, min_change=None, max_change=None):
+        '''Find the significant fuel weight changes of every household in the store.
+
+        Args:
+            fuel (str): Only changes of this fuel. Defaults to every fuel.
+
+            hh_id (str): Only changes of this household. Defaults to every household.
+
+            start (datetime): Only changes at or after this time. Defaults to no limit.
+
+            end (datetime): Only changes before this time. Defaults to no limit.
+
+            min_change (float): Only changes of at least this much (kg), such as a positive amount for refills.
+                                Defaults to no limit.
+
+            max_change (float): Only changes of at most this much (kg), such as a negative amount for fuel used.
+                                Defaults to no limit.
+
+        Returns:
+            changes (dataframe): The household ID, data file, fuel, time, weight and weight change of every change
+                                 found, in time order.
+        '''
+
+        conditions, params = [], []
+        for condition, value in (('f.fuel = ?', fuel), ('h.hh_id = ?', hh_id),
+                                 ('f.time >= ?', None if start is None else _time(start)),
+                                 ('f.time < ?', None if end is None else _time(end)),
+                                 ('f.weight_change >= ?', min_change), ('f.weight_change <= ?', max_change)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        changes = self.query('SELECT h.hh_id, h.file, f.fuel, f.time, f.weight, f.weight_change '
+                             'FROM fuel_changes f JOIN households h ON h.id = f.household' +
+                             ''.join((' AND ' if i else ' WHERE ') + c for i, c in enumerate(conditions)) +
+                             ' ORDER BY f.time, h.file, f.fuel', tuple(params))
+        changes['time'] = pd.to_datetime(changes['time'])
+        return changes
+
+    def weekly_refills(self, fuel, min_change=None):
+        '''Count the refills of a fuel in every household, week by week.
+
+        Args:
+            fuel (str): The fuel.
+
+            min_change (float): The least weight gain (kg) counted as a refill. Defaults to the weight threshold of
+                                each household.
+
+        Returns:
+            refills (dataframe): The household ID, data file, week (the Monday it starts on) and number of refills of
+                                 every household and week with at least one refill.
+        '''
+
+        refills = self.query("SELECT h.hh_id, h.file, date(f.time, 'weekday 0', '-6 days') AS week, "
+                             'COUNT(*) AS refills FROM fuel_changes f JOIN households h ON h.id = f.household '
+                             'WHERE f.fuel = ? AND f.weight_change >= COALESCE(?, h.weight_threshold) '
+                             'GROUP BY h.id, week ORDER BY h.file, week', (fuel, min_change))
+        refills['week'] = pd.to_datetime(refills['week'])
+        return refills
+
+    def close(self):
+        '''Close the database.'''
+
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+        return False
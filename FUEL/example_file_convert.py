@@ -1,6 +1,38 @@
+import csv
+import datetime
+import os
+
 import pandas as pd
 import numpy as np
 
+from .profiling import NULL_PROFILER
+
+try:
+    import pyarrow
+    from pyarrow import csv as pyarrow_csv
+except ImportError:
+    pyarrow = None
+
+
+def _openpyxl():
+    '''Import openpyxl on first use, as it takes longer to import than the rest of the package (internal function).'''
+
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("Reading Excel workbooks needs openpyxl to be installed!")
+    return openpyxl
+
+
+# version of the conversion logic, must be increased whenever a change alters the converted data so that data
+# converted by an older version is not loaded from a ConversionCache
+CONVERTER_VERSION = 1
+
+# timestamp format written by the sensor data processing, other formats are still read but more slowly
+TIMESTAMP_FORMAT = '%m/%d/%Y %H:%M'
+# data file extensions read as Excel workbooks by reformat_example_files
+WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm')
+
 
 def stove_info(dataframe):
     """Creating stove dataframe.
@@ -53,24 +85,63 @@ def format_columns(dataframe):
     dataframe.columns = dataframe.iloc[0]
     dataframe.columns = map(str.lower, dataframe.columns)
 
+    names, stoves, fuels = column_names(dataframe.columns)
+    dataframe = dataframe.iloc[:, [c for (c, name) in enumerate(names) if name is not None]]
+    dataframe.columns = [name for name in names if name is not None]
+
+    return dataframe, stoves, fuels
+
+
+def column_names(columns):
+    '''Finds the new name of every column.
+
+    Args:
+        columns : The lower case column headers of the study data
+
+    Returns:
+        names : The new name of each column, None for usage columns which are left out
+        stoves : A list of all stoves found in study data
+        fuels : A list of all fuels found in study data
+
+    '''
+
+    names = []
     stoves = []
     fuels = []
 
-    for col in dataframe:
-        if 'usage' in col:
-            del dataframe[col]
+    for col in columns:
+        name = col
         if 'temperature' in col:
             stove_name = col.split(' ')[0]
             if stove_name == '3pierres' or stove_name == '3':
                 stove_name = '3stone'
             stoves.append(stove_name)
-            dataframe = dataframe.rename(columns={col: stove_name})
+            name = stove_name
         if 'fuel' in col:
             fuel_type = col.split(' ')[0]
             fuels.append(fuel_type)
-            dataframe = dataframe.rename(columns={col: fuel_type})
+            if 'temperature' not in col:
+                name = fuel_type
+        names.append(None if 'usage' in col else name)
 
-    return dataframe, stoves, fuels
+    return names, stoves, fuels
+
+
+def lower_case(dataframe):
+    '''Converts every string in a dataframe to lower case, leaving other values as they are.
+
+    Args:
+        dataframe : Any dataframe
+
+    Returns:
+        dataframe : The dataframe with lower case strings, only the columns holding strings are copied
+    '''
+
+    lowered_frame = dataframe.copy(deep=False)
+    for c, dtype in enumerate(dataframe.dtypes):
+        if dtype == object:
+            lowered_frame.isetitem(c, dataframe.iloc[:, c].map(lambda i: i.lower() if type(i) == str else i))
+    return lowered_frame
 
 
 def reformat_dataframe(dataframe):
@@ -90,28 +161,344 @@ def reformat_dataframe(dataframe):
     return dataframe
 
 
-def reformat_example_files(datafile_path):
-    """Reformatting the datafiles so that they can be ran in household.py.
+def read_header(datafile_path):
+    """Finds the household ID and the column headers without reading the sensor data.
+
+    Args:
+        datafile_path (str): The datafile path
+
+    Returns:
+        header_row : The row number of the column headers
+        columns : The lower case column headers
+        household_id : The household ID found above the column headers
+
+    """
+
+    household_id = "no household id"
+    with open(datafile_path, newline='') as datafile:
+        for (r, row) in enumerate(csv.reader(datafile)):
+            row = [s.lower() for s in row]
+            name = row[0] if row else ''
+            if name == "household id:":
+                household_id = row[1] if len(row) > 1 and row[1] != '' else np.nan
+            if name == "timestamp":
+                return r, row, household_id
+
+    raise ImportError("Could not find the beginning of data. Please ensure that there are appropriate "
+                      "column headers and that the timestamp column is labeled as timestamp.")
+
+
+def read_sensor_data(datafile_path, skiprows, n_columns, keep, dtype, timestamp_format):
+    '''Reads the sensor data below the column headers, with the pyarrow csv reader when it is installed.
 
     Args:
-        str : The datafile path
+        datafile_path (str): The datafile path
+
+        skiprows (int): Number of rows above the sensor data
+
+        n_columns (int): Number of columns in the datafile
+
+        keep (list): Positions of the columns to read, the first is the timestamp column
+
+        dtype : The float type sensor values are read as
+
+        timestamp_format (str): The format of the timestamps, None to leave the timestamps as strings
+
+    Returns:
+        dataframe : The sensor data, with columns labeled by their position in the datafile
+
+    '''
+
+    if pyarrow is None:
+        dataframe = pd.read_csv(datafile_path, header=None, skiprows=skiprows, names=range(n_columns),
+                                usecols=keep, dtype={c: (object if c == keep[0] else dtype) for c in keep})
+        if timestamp_format is not None:
+            dataframe[keep[0]] = pd.to_datetime(dataframe[keep[0]], format=timestamp_format)
+        return dataframe
+
+    column_types = {str(c): pyarrow.from_numpy_dtype(np.dtype(dtype)) for c in keep}
+    column_types[str(keep[0])] = pyarrow.string() if timestamp_format is None else pyarrow.timestamp('s')
+    table = pyarrow_csv.read_csv(
+        datafile_path,
+        read_options=pyarrow_csv.ReadOptions(skip_rows=skiprows, column_names=[str(c) for c in range(n_columns)]),
+        convert_options=pyarrow_csv.ConvertOptions(include_columns=[str(c) for c in keep], column_types=column_types,
+                                                   timestamp_parsers=[timestamp_format or pyarrow_csv.ISO8601],
+                                                   strings_can_be_null=True))
+    dataframe = table.to_pandas()
+    dataframe.columns = keep
+    if timestamp_format is not None:
+        # pyarrow also reads two digit years with %Y
+        if (dataframe[keep[0]].dt.year < 1000).any():
+            raise ValueError("Timestamps do not match the format " + timestamp_format)
+        dataframe[keep[0]] = dataframe[keep[0]].astype('datetime64[ns]')
+    return dataframe
+
+
+def read_example_file(datafile_path, dtype=np.float64, timestamp_format=TIMESTAMP_FORMAT, fill=True):
+    """Reads a datafile straight into the format used in household.py.
+
+    Only the sensor data below the column headers is parsed, usage columns are never read, sensor values are read
+    straight into floats and timestamps are parsed with a known format. The pyarrow csv reader is used when it is
+    installed. Gives the same result as reformat_example_files.
+
+    Args:
+        datafile_path (str): The datafile path
+
+        dtype : The float type sensor values are read as. Defaults to float64, float32 halves the memory used.
+
+        timestamp_format (str): The format of the timestamps, any other format is still read but more slowly.
+
+        fill (bool): If True missing readings are filled with the reading before them. If False they are left
+                     missing, for Household(time_based=True). Defaults to True.
 
     Returns:
         df_stoves : A dataframe (df_stoves) containing only necessary information that is appropriate formatted
         stoves : A list of all stoves in study data
         fuels : A list of all fuels in study data
+        household_id : The household ID
 
     """
 
     if type(datafile_path) != str:
         raise ValueError("Must put in file name as a String!")
 
-    data = pd.read_csv(datafile_path, header=None)
+    header_row, columns, household_id = read_header(datafile_path)
+    names, stoves, fuels = column_names(columns)
+    keep = [c for (c, name) in enumerate(names) if name is not None]
+
+    try:
+        df_stoves = read_sensor_data(datafile_path, header_row + 1, len(names), keep, dtype, timestamp_format)
+    except ValueError:
+        # the timestamps are in another format, leave it to pandas to work it out
+        df_stoves = read_sensor_data(datafile_path, header_row + 1, len(names), keep, dtype, None)
+        df_stoves[keep[0]] = df_stoves[keep[0]].str.lower().astype('datetime64[ns]')
+
+    if fill:
+        df_stoves = df_stoves.ffill()  # fill any missing values at end of dataframe with previous value
+    df_stoves.columns = [names[c] for c in keep]
+
+    return df_stoves, stoves, fuels, household_id
+
+
+def workbook_cell_text(value):
+    """Converts a workbook cell above the sensor data to the text it would have in a csv datafile (internal function).
+
+    """
+
+    if value is None:
+        return ''
+    if type(value) == float and value.is_integer():
+        return str(int(value))
+    return str(value)
 
-    # converting the entire dataframe to lower case to make it more universal
-    data = data.applymap(lambda s:s.lower() if type(s) == str else s)
 
-    df_stoves, stoves, fuels, household_id = stove_info(data)
+def read_example_workbook(workbook_path, sheet=None, dtype=np.float64, timestamp_format=TIMESTAMP_FORMAT, fill=True):
+    """Reads an Excel workbook datafile straight into the format used in household.py.
+
+    The workbook is streamed with openpyxl in read only mode: the rows above the column headers are read one at a
+    time until the headers are found, then only the columns from the timestamps to the last sensor column that is
+    kept are read. Gives the same result as reformat_example_files does for the datafile saved as a csv file.
+
+    Args:
+        workbook_path (str): The workbook path
+
+        sheet (str): The name of the sheet holding the data. Defaults to the first sheet.
+
+        dtype : The float type sensor values are read as. Defaults to float64.
+
+        timestamp_format (str): The format of timestamps stored as text, used when the timestamp cells are not dates.
+
+        fill (bool): If True missing readings are filled with the reading before them, as in read_example_file.
+                     Defaults to True.
+
+    Returns:
+        df_stoves : A dataframe (df_stoves) containing only necessary information that is appropriate formatted
+        stoves : A list of all stoves in study data
+        fuels : A list of all fuels in study data
+        household_id : The household ID
+
+    """
+
+    if type(workbook_path) != str:
+        raise ValueError("Must put in file name as a String!")
+    openpyxl = _openpyxl()
+
+    workbook = openpyxl.load_workbook(workbook_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet is not None else workbook.worksheets[0]
+
+        household_id = "no household id"
+        rows = worksheet.iter_rows(values_only=True)
+        for (r, row) in enumerate(rows):
+            row = [workbook_cell_text(value).lower() for value in row]
+            name = row[0] if row else ''
+            if name == "household id:":
+                household_id = row[1] if len(row) > 1 and row[1] != '' else np.nan
+            if name == "timestamp":
+                break
+        else:
+            raise ImportError("Could not find the beginning of data. Please ensure that there are appropriate "
+                              "column headers and that the timestamp column is labeled as timestamp.")
+
+        while row and row[-1] == '':
+            row.pop()
+        names, stoves, fuels = column_names(row)
+        keep = [c for (c, name) in enumerate(names) if name is not None]
+        data = list(worksheet.iter_rows(min_row=r + 2, max_col=keep[-1] + 1, values_only=True))
+    finally:
+        workbook.close()
+
+    # empty rows after the sensor data are not saved in a csv datafile
+    while data and all(value is None for value in data[-1]):
+        data.pop()
+
+    columns = list(zip(*data)) if data else [()] * (keep[-1] + 1)
+    df_stoves = pd.DataFrame({names[c]: pd.array(columns[c], dtype=object) for c in keep[1:]}, dtype=dtype)
+    timestamps = pd.Series(columns[keep[0]], dtype=object)
+    if all(isinstance(t, datetime.datetime) or t is None for t in timestamps):
+        # Excel keeps dates as fractions of a day, rounding to seconds removes the error in converting them
+        timestamps = timestamps.astype('datetime64[ns]').dt.round('s')
+    else:
+        timestamps = parse_timestamps(timestamps.astype(str), timestamp_format)
+    df_stoves.insert(0, names[keep[0]], timestamps)
+    if fill:
+        df_stoves = df_stoves.ffill()  # fill any missing values at end of dataframe with previous value
 
     return df_stoves, stoves, fuels, household_id
 
+
+def parse_timestamps(timestamps, timestamp_format=TIMESTAMP_FORMAT):
+    """Converts timestamp strings to datetimes, with a known format when they match it.
+
+    Args:
+        timestamps : The timestamp strings
+
+        timestamp_format (str): The expected format of the timestamps
+
+    Returns:
+        timestamps : The timestamps converted to datetime
+
+    """
+
+    try:
+        return pd.to_datetime(timestamps, format=timestamp_format)
+    except ValueError:
+        # the timestamps are in another format, leave it to pandas to work it out
+        return timestamps.str.lower().astype('datetime64[ns]')
+
+
+def read_example_file_chunks(datafile_path, chunksize=100000, dtype=np.float64, timestamp_format=TIMESTAMP_FORMAT):
+    """Reads a datafile in chunks of rows, so that files too long to hold in memory can be analysed.
+
+    Each chunk is formatted as read_example_file would format the whole file, and together the chunks hold exactly
+    the data read_example_file gives.
+
+    Args:
+        datafile_path (str): The datafile path
+
+        chunksize (int): The number of rows in each chunk. Defaults to 100000.
+
+        dtype : The float type sensor values are read as. Defaults to float64.
+
+        timestamp_format (str): The format of the timestamps, any other format is still read but more slowly.
+
+    Returns:
+        chunks : A generator of df_stoves chunks, in time order
+        stoves : A list of all stoves in study data
+        fuels : A list of all fuels in study data
+        household_id : The household ID
+
+    """
+
+    if type(datafile_path) != str:
+        raise ValueError("Must put in file name as a String!")
+    if type(chunksize) != int or chunksize < 1:
+        raise ValueError("The chunk size must be a positive integer!")
+
+    header_row, columns, household_id = read_header(datafile_path)
+    names, stoves, fuels = column_names(columns)
+    keep = [c for (c, name) in enumerate(names) if name is not None]
+
+    def chunks():
+        last_row = None
+        reader = pd.read_csv(datafile_path, header=None, skiprows=header_row + 1, names=range(len(names)),
+                             usecols=keep, dtype={c: (object if c == keep[0] else dtype) for c in keep},
+                             chunksize=chunksize)
+        for chunk in reader:
+            if last_row is not None:
+                # fill missing values at the start of the chunk with the end of the previous chunk
+                chunk = pd.concat([last_row, chunk]).ffill().iloc[1:]
+            else:
+                chunk = chunk.ffill()
+            last_row = chunk.iloc[-1:]
+            chunk = chunk.set_axis([names[c] for c in keep], axis=1)
+            chunk['timestamp'] = parse_timestamps(chunk['timestamp'], timestamp_format)
+            yield chunk
+
+    return chunks(), stoves, fuels, household_id
+
+
+def reformat_example_files(datafile_path, fast=False, cache=None, profiler=None, fill=True):
+    """Reformatting the datafiles so that they can be ran in household.py.
+
+    Excel workbooks (.xlsx or .xlsm) are read with read_example_workbook, whatever fast is set to.
+
+    Args:
+        str : The datafile path, a csv file or an Excel workbook
+
+        fast (bool): Read the file with read_example_file, which is much faster and uses less memory. Defaults to
+                     False.
+
+        cache : A cache.ConversionCache the converted data is loaded from when the datafile has been converted before,
+                and saved to when it has not. Defaults to no cache.
+
+        profiler : A profiling.Profiler the time taken to read the datafile is recorded in. Defaults to recording
+                   nothing.
+
+        fill (bool): If False missing readings are left missing instead of being filled with the reading before them,
+                     for Household(time_based=True). The datafile is then read with read_example_file, and can not be
+                     cached. Defaults to True.
+
+    Returns:
+        df_stoves : A dataframe (df_stoves) containing only necessary information that is appropriate formatted
+        stoves : A list of all stoves in study data
+        fuels : A list of all fuels in study data
+
+    """
+
+    if type(datafile_path) != str:
+        raise ValueError("Must put in file name as a String!")
+
+    if not fill and cache is not None:
+        raise ValueError("Only filled readings are cached!")
+
+    profiler = profiler if profiler is not None else NULL_PROFILER
+    if cache is not None:
+        with profiler.stage('cache_load', datafile_path) as stats:
+            converted = cache.load(datafile_path)
+            stats['rows'] = len(converted[0]) if converted is not None else None
+        if converted is not None:
+            return converted
+
+    with profiler.stage('reformat_example_files', datafile_path) as stats:
+        if os.path.splitext(datafile_path)[1].lower() in WORKBOOK_EXTENSIONS:
+            converted = read_example_workbook(datafile_path, fill=fill)
+        elif fast or not fill:
+            converted = read_example_file(datafile_path, fill=fill)
+        else:
+            data = pd.read_csv(datafile_path, header=None)
+
+            # converting the column headers and everything above them to lower case to make it more universal, the
+            # sensor readings below them are only numbers and timestamps
+            header_row = next((r for (r, name) in enumerate(data[0])
+                               if type(name) == str and name.lower() == 'timestamp'), len(data) - 1)
+            data.iloc[:header_row + 1] = lower_case(data.iloc[:header_row + 1])
+
+            converted = stove_info(data)
+        stats['rows'] = len(converted[0])
+
+    if cache is not None:
+        with profiler.stage('cache_store', datafile_path, len(converted[0])):
+            cache.store(datafile_path, converted)
+
+    return converted
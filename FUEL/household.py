@@ -1,12 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from scipy.signal import find_peaks
+
+from .aggregation import daily_cooking_time, daily_fuel_use
+from .compact import CompactReadings
+from .detection import (MAX_GAP_SECONDS, STOVE_MATRIX_READINGS, assemble_events, extend_cooking_events,
+                        extend_weight_changes, find_cooking_events, find_weight_changes, stove_matrix_boundaries,
+                        timed_cooking_events)
+from .downsample import downsample_indices
+from .example_file_convert import lower_case
+from .profiling import NULL_PROFILER
+
+# readings below these weights (kg) are ignored when looking for significant weight changes in a fuel
+DEFAULT_FUEL_FLOORS = {'lpg': 5}
+# line traces with more points than this are drawn with WebGL
+WEBGL_THRESHOLD = 10000
+
+
+def lower_case_labels(dataframe):
+    '''Converts the column labels of a dataframe to lower case, without copying the data (internal function).'''
+
+    return dataframe.set_axis([c.lower() if type(c) == str else c for c in dataframe.columns], axis=1, copy=False)
 
 
 class Household:
 
-    def __init__(self, dataframe, stoves, fuels, hh_id, temp_threshold=15, time_between_events=60,weight_threshold=0.2):
+    def __init__(self, dataframe, stoves, fuels, hh_id, temp_threshold=15, time_between_events=60,weight_threshold=0.2,
+                 fuel_floors=None, lazy=False, compact=None, copy=True, profiler=None, threads=1, time_based=False,
+                 max_gap=MAX_GAP_SECONDS // 60, show_plots=False):
         '''Verifying that the input arguments are in the correct formats and set self values
 
         Args:
@@ -31,8 +53,41 @@ class Household:
             weight_threshold (float): The weight change (kg) that should be ignored. All weight changes above this
                                       value will be marked. Defaults to 0.2 kg.
 
+            fuel_floors (dict): The weight (kg) for each fuel below which readings are ignored when looking for
+                                weight changes. Fuels that are not listed have no floor. Defaults to {'lpg': 5}.
+
+            lazy (bool): If True nothing is analysed or plotted until it is requested. Default is False, which prints
+                         the stove and fuel usage straight away.
+
+            compact (str): 'int16' or 'float32' keeps the readings as compact.CompactReadings instead of a dataframe,
+                           taking 3 to 4 times less memory with the same results. Default is None, which keeps the
+                           dataframe.
+
+            copy (bool): If False the readings in the dataframe are used without being copied, so the dataframe must
+                         not be changed afterwards. Column labels and any strings are always converted to lower case.
+                         Defaults to True.
+
+            profiler (object): A profiling.Profiler the time taken by each stage of the analysis and the plots is
+                               recorded in. Default is None, which records nothing.
+
+            threads (int): Number of threads the cooking events of the stoves and the weight changes and fuel use of
+                           the fuels are found in, each stove or fuel on its own. The results are the same whatever
+                           the number of threads. Defaults to 1, which finds them all in this thread.
+
+            time_based (bool): If True cooking events are found from the timestamps of the readings (see
+                               detection.timed_cooking_events) instead of counting readings, for readings that are
+                               not a minute apart or have gaps. time_between_events is then the time between peaks,
+                               missing stove and fuel readings are left out, and no cooking event is found across a
+                               gap. Defaults to False.
+
+            max_gap (float): With time_based, the most time (minutes) between two readings before they are split by
+                             a gap. Defaults to 10 mins.
+
+            show_plots (bool): If True, and not lazy, the stove and fuel plots are also shown straight away. Defaults to
+                               False, which makes no plots until they are asked for.
+
         Returns:
-            df_stoves : Input dataframe
+            df_stoves : Input dataframe (built from the compact readings when asked for if compact is given)
             stoves : Input stoves
             fuels : Input fuels
             hh_id : Input Household ID
@@ -40,6 +95,11 @@ class Household:
             time_between_events: Input time between cooking events
             study_duration: The duration of the study in datetime format
             weight_threshold: Input weight threshold
+            fuel_floors: Input fuel floors
+            profiler: Input profiler
+            threads: Input number of threads
+            time_based: Input time based
+            max_gap: Input largest gap
 
         '''
 
@@ -53,34 +113,227 @@ class Household:
             raise ValueError('Must put in a list of fuel types!')
         if type(hh_id) != str:
             raise ValueError('Must put in household ID as a string!')
-        if type(time_between_events) != int or time_between_events < 0:
-            raise ValueError("The time between events must be a positive integer!")
-        if type(temp_threshold) != int or temp_threshold < 0:
-            raise ValueError("The temperature threshold must be a positive integer!")
-        if type(weight_threshold) != float or weight_threshold < 0:
-            raise ValueError("The weight threshold must be a positive number!")
+        if type(threads) != int or threads < 1:
+            raise ValueError('The number of threads must be a positive integer!')
+        if type(time_based) != bool:
+            raise ValueError('Time based must be True or False!')
+        if type(max_gap) not in (int, float) or max_gap <= 0:
+            raise ValueError('The largest gap must be a positive number of minutes!')
+        if type(show_plots) != bool:
+            raise ValueError('Show plots must be True or False!')
+
+        self._cache = {}  # analysis results, keyed by the analysis, item and thresholds used
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        self.threads = threads
+        self.time_based = time_based
+        self.max_gap = max_gap
+        self.time_between_events = time_between_events
+        self.temp_threshold = temp_threshold
+        self.weight_threshold = weight_threshold
 
+        if fuel_floors is None:
+            fuel_floors = DEFAULT_FUEL_FLOORS
+        if type(fuel_floors) != dict:
+            raise ValueError("The fuel floors must be a dictionary of fuel names and weights!")
+
+        dataframe = lower_case_labels(dataframe)
         contents = dataframe.columns.values
         for s in stoves:
-            if s not in contents:
+            if s.lower() not in contents:
                 raise ValueError(s + ' stove not found in the dataframe.')
         for f in fuels:
-            if f not in contents:
+            if f.lower() not in contents:
                 raise ValueError(f + ' fuel not found in the dataframe.')
 
-        self.df_stoves = dataframe.applymap(lambda i: i.lower() if type(i) == str else i)
         self.stoves = [i.lower() for i in stoves]
         self.fuels = [i.lower() for i in fuels]
+        if compact is None:
+            self.df_stoves = lower_case(dataframe.copy() if copy else dataframe)
+        else:
+            self.compact = CompactReadings(dataframe, self.stoves, self.fuels, compact)
+            self._set_study_duration()
         self.hh_id = hh_id
-        self.temp_threshold = temp_threshold
-        self.time_between_events = time_between_events
-        self.study_duration = self.df_stoves['timestamp'].iloc[-1] - self.df_stoves['timestamp'][0]
+        self.fuel_floors = {f.lower(): floor for f, floor in fuel_floors.items()}
+
+        if not lazy:
+            self.stove_and_fuel_usage()
+            if show_plots:
+                self.plot_fuel(fuel_usage=True, show=True)
+                self.plot_stove(cooking_events=True, show=True)
+
+    @property
+    def temp_threshold(self):
+        return self._temp_threshold
+
+    @temp_threshold.setter
+    def temp_threshold(self, temp_threshold):
+        if type(temp_threshold) != int or temp_threshold < 0:
+            raise ValueError("The temperature threshold must be a positive integer!")
+        self._temp_threshold = temp_threshold
+        self._cache.clear()
+
+    @property
+    def time_between_events(self):
+        return self._time_between_events
+
+    @time_between_events.setter
+    def time_between_events(self, time_between_events):
+        if type(time_between_events) != int or time_between_events < 0:
+            raise ValueError("The time between events must be a positive integer!")
+        self._time_between_events = time_between_events
+        self._cache.clear()
+
+    @property
+    def weight_threshold(self):
+        return self._weight_threshold
+
+    @weight_threshold.setter
+    def weight_threshold(self, weight_threshold):
+        if type(weight_threshold) != float or weight_threshold < 0:
+            raise ValueError("The weight threshold must be a positive number!")
+        self._weight_threshold = weight_threshold
+        self._cache.clear()
+
+    @property
+    def df_stoves(self):
+        if self.compact is not None:
+            return self.compact.to_frame()
+        return self._df_stoves
+
+    @df_stoves.setter
+    def df_stoves(self, dataframe):
+        self.compact = None
+        self._df_stoves = dataframe
+        self._set_study_duration()
+        self._cache.clear()
+
+    def _set_study_duration(self):
+        '''Works out the duration and number of days of the study from its readings (internal function).'''
+
+        timestamps = self._timestamps()
+        self.study_duration = pd.Timestamp(timestamps[-1]) - pd.Timestamp(timestamps[0])
         self.study_days = round(self.study_duration.total_seconds()/86400) # rounding to the nearest day
-        self.weight_threshold = weight_threshold
 
-        self.stove_and_fuel_usage()
-        self.plot_fuel(fuel_usage=True)
-        self.plot_stove(cooking_events=True)
+    def _readings(self, item):
+        '''Readings of a stove or fuel as an array (internal function).'''
+
+        if self.compact is not None:
+            return self.compact.column(item)
+        return self._df_stoves[item].values
+
+    def _length(self):
+        '''The number of readings (internal function).'''
+
+        if self.compact is not None:
+            return len(self.compact)
+        return len(self._df_stoves)
+
+    def _timestamps(self):
+        '''Timestamps of every reading as an array (internal function).'''
+
+        if self.compact is not None:
+            return self.compact.timestamp_values()
+        return self._df_stoves['timestamp'].values
+
+    def _cached(self, key, compute, rows=None):
+        '''Return an analysis result, computing it only if it has not been computed before (internal function).
+
+        Args:
+            key (tuple): The analysis, the item it was run on and the thresholds it depends on.
+
+            compute (function): Computes the result if it is not cached.
+
+            rows (int): The number of rows computing the result goes through, recorded in the profiler.
+
+        Returns:
+            result : The cached result.
+        '''
+
+        if key not in self._cache:
+            with self.profiler.stage(key[0], key[1], rows) as stats:
+                result = compute()
+                if type(result) == list:
+                    stats['found'] = len(result)
+            self._cache[key] = result
+        return self._cache[key]
+
+    def _map(self, stage, names, function, items):
+        '''Run a function on every item, across the threads if there is more than one, in order (internal function).
+
+        Args:
+            stage (str): The stage the work is recorded as in the profiler, when run across the threads.
+
+            names (list): The stoves or fuels the work is on, recorded in the profiler.
+
+            function (function): Called with each item. It must only use what it is given, not the household.
+
+            items (list): Items to run the function on.
+
+        Returns:
+            results (list): The result for every item, in order.
+        '''
+
+        if self.threads == 1 or len(items) < 2:
+            return [function(item) for item in items]
+        with self.profiler.stage(stage, ', '.join(names), self._length()):
+            with ThreadPoolExecutor(max_workers=min(self.threads, len(items))) as executor:
+                return list(executor.map(function, items))
+
+    def append(self, new_rows):
+        '''Add readings to the end of the study, updating the cooking events and weight changes already found.
+
+        Only the readings since each stove was last cold for long enough to separate its cooking events, and the new
+        fuel readings, are searched. The daily totals are worked out again from the events and weight changes when
+        they are next asked for.
+
+        Args:
+            new_rows (object): A dataframe of readings taken after the last reading in the study, with the same columns
+                               as df_stoves.
+        '''
+
+        if not isinstance(new_rows, pd.DataFrame):
+            raise ValueError("Must put in a dataframe!")
+        new_rows = lower_case_labels(new_rows)
+        columns = self.compact.columns if self.compact is not None else self._df_stoves.columns
+        for col in columns:
+            if col not in new_rows.columns:
+                raise ValueError(col + ' not found in the new rows.')
+        if len(new_rows) == 0:
+            return
+        timestamps = self._timestamps()
+        if new_rows['timestamp'].iloc[0] < timestamps[-1]:
+            raise ValueError('The new rows must come after the last reading in the study!')
+
+        with self.profiler.stage('append', rows=len(new_rows)):
+            self._append(new_rows, columns, len(timestamps))
+
+    def _append(self, new_rows, columns, previous_length):
+        '''Add readings to the end of the study, see append (internal function).'''
+
+        if self.compact is not None:
+            self.compact.append(new_rows)
+        else:
+            new_rows = lower_case(new_rows[columns])
+            self._df_stoves = pd.concat([self._df_stoves, new_rows], ignore_index=True)
+        self._set_study_duration()
+
+        cache = self._cache
+        self._cache = {}
+        for key, result in cache.items():
+            if key[0] == 'cooking_events' and not self.time_based:
+                stove, temp_threshold, time_between_events = key[1:]
+                try:
+                    self._cache[key] = extend_cooking_events(self._readings(stove), temp_threshold,
+                                                             time_between_events, result, previous_length, stove)
+                except ValueError:
+                    # left out, so the error is raised when the cooking events are next asked for
+                    pass
+            elif key[0] == 'weight_changes' and not self.time_based:
+                fuel, weight_threshold, floor = key[1:]
+                self._cache[key] = extend_weight_changes(self._readings(fuel), weight_threshold, result,
+                                                         previous_length, floor)
+            # daily totals depend on the length of the study, so they are left out, as are the cooking events and
+            # weight changes of a time based household, which are found again
 
     def _check_item(self, item):
         '''Check if stove or fuel input is in dataset
@@ -131,37 +384,12 @@ class Household:
                                        larger than the prescribed threshold (weight_threshold).
         '''
 
-        fuel_data = list(self.df_stoves[fuel])
-
-        weight = fuel_data[0]
-        weight_changes = []
-
-        for i, current_weight in enumerate(fuel_data[1:]):
-            if fuel == "lpg" and current_weight < 5:  # should change this to be more versatile later
-                pass
-            else:
-                if i == len(fuel_data)-2:
-                    if fuel_data[i] < weight:
-                        weight_changes.append(i+1)
-                else:
-                    weight_before = fuel_data[i]
-                    weight_after = fuel_data[i+2]
-                    weight_diff = current_weight - weight
-
-                    if abs(weight_diff) < self.weight_threshold:
-                        pass
-                    else:
-                        # check to make sure it isnt catching random peaks
-                        if weight_diff > self.weight_threshold:
-                            if abs(weight_after-weight_before) < self.weight_threshold or weight_after < weight_before:
-                                pass
-                            else:
-                                weight_changes.append(i+1)
-                                weight = current_weight
-                        else:
-                            weight_changes.append(i+1)
-                            weight = current_weight
-        return weight_changes
+        floor = self.fuel_floors.get(fuel)
+        changes = self._cached(('weight_changes', fuel, self.weight_threshold, floor),
+                               lambda: find_weight_changes(self._readings(fuel), self.weight_threshold, floor,
+                                                           skip_missing=self.time_based),
+                               self._length())
+        return list(changes)
 
     def _daily_fuel_use(self, fuel, weight_changes):
         '''Determine amount of fuel used in each 24hr period of study (Internal function).
@@ -172,52 +400,41 @@ class Household:
             weight_changes (list): List of indices of all significant fuel changes for chosen fuel.
 
         Returns:
-            daily_fuel_usage (dict): A dictionary containing fuel usage information for each day of study. Keys
-                                         represent the day of the study, values is the total weight change (kg) recorded
-                                         for that day of the study.
+            daily_fuel_usage (series): The fuel used (kg) for each day of study, indexed by day of the study. Day 0 is
+                                       the total fuel used.
         '''
 
-        daily_fuel_usage = {}
-        fuel_info = self.df_stoves[fuel]
-        day = 0
-        study_began = self.df_stoves['timestamp'][0]
-        weight = fuel_info[weight_changes[0]]
-        weight_diff = 0
-        total_fuel_usage = 0
-        for i in weight_changes[1:]:
-            day_of_use = (self.df_stoves['timestamp'][i] - study_began).days
-            new_weight = fuel_info[i]
-            if weight - new_weight < self.weight_threshold:
-                # indicates an adding of fuel not a fuel usage
-                pass
-            else:
-                total_fuel_usage += weight - new_weight
-                if day_of_use == self.study_days:
-                    if day_of_use in daily_fuel_usage:
-                        weight_diff += weight - new_weight
-                    else:
-                        weight_diff = weight - new_weight
-                    daily_fuel_usage.update({day_of_use: weight_diff})
-                elif day_of_use == day:
-                    weight_diff += weight - new_weight
-                    daily_fuel_usage.update({day+1: weight_diff})
-                else:
-                    weight_diff = weight - new_weight
-                    day = day_of_use
-
-                    daily_fuel_usage.update({day+1: weight_diff})
-            weight = new_weight
-
-        if len(daily_fuel_usage) != self.study_days:
-            for i in range(self.study_days):
-                day = i + 1
-                if day not in daily_fuel_usage:
-                    weight = 0
-                    daily_fuel_usage.update({day: weight})
-
-        daily_fuel_usage.update({0: total_fuel_usage})
-
-        return daily_fuel_usage
+        timestamps = self._timestamps()
+        weight_changes = np.asarray(weight_changes, dtype=np.int64)
+        return daily_fuel_use(timestamps[weight_changes], self._readings(fuel)[weight_changes], timestamps[0],
+                              self.study_days, self.weight_threshold)
+
+    def _find_fuel_usage(self, fuels):
+        '''Find the weight changes and daily fuel use of several fuels across the threads (internal function).
+
+        Args:
+            fuels (list): Fuels whose daily fuel use has not been found yet.
+        '''
+
+        timestamps = self._timestamps()
+        weight_threshold = self.weight_threshold
+        study_days = self.study_days
+        skip_missing = self.time_based
+        keys = [('weight_changes', f, weight_threshold, self.fuel_floors.get(f)) for f in fuels]
+        # the readings are read here, so only arrays are used in the threads
+        work = [(self._readings(f), key[3], self._cache.get(key)) for f, key in zip(fuels, keys)]
+
+        def fuel_use(item):
+            weights, floor, changes = item
+            if changes is None:
+                changes = find_weight_changes(weights, weight_threshold, floor, skip_missing=skip_missing)
+            found = np.asarray(changes, dtype=np.int64)
+            return changes, daily_fuel_use(timestamps[found], weights[found], timestamps[0], study_days,
+                                           weight_threshold)
+
+        for key, (changes, daily_usage) in zip(keys, self._map('fuel_usage_threads', fuels, fuel_use, work)):
+            self._cache.setdefault(key, changes)
+            self._cache[('fuel_usage',) + key[1:]] = daily_usage
 
     def fuel_usage(self, fuel="All Fuels"):
         '''Determine the total amount of each fuel used on each day of the study.
@@ -242,10 +459,15 @@ class Household:
         fuel_change = []
         fuel_weight_changes = {}  # will be used in other functions
         ind = []
+        if self.threads > 1:
+            missing = [f for f in fuel_type
+                       if ('fuel_usage', f, self.weight_threshold, self.fuel_floors.get(f)) not in self._cache]
+            self._find_fuel_usage(missing)
         for f in fuel_type:
             changes = self._find_weight_changes(f)
             fuel_weight_changes.update({f: changes})
-            daily_usage = self._daily_fuel_use(f, changes)
+            daily_usage = self._cached(('fuel_usage', f, self.weight_threshold, self.fuel_floors.get(f)),
+                                       lambda: self._daily_fuel_use(f, changes), len(changes))
             fuel_change.append(daily_usage)
             ind.append(f+"(kg)")
 
@@ -270,114 +492,87 @@ class Household:
         stove_type = self._check_item(stove)
         cook_events = {}
 
+        missing = [s for s in stove_type
+                   if ('cooking_events', s, self.temp_threshold, self.time_between_events) not in self._cache]
+        if len(missing) > 1 and (not self.time_based or self.threads > 1):
+            self._find_cooking_events(missing)
         for s in stove_type:
-            stove_temps = self.df_stoves[s]
-            possible_cooking_events = find_peaks(stove_temps, height=self.temp_threshold
-                               , distance=self.time_between_events)[0]
-            events = []
-            for i in possible_cooking_events:
-                before_event = stove_temps[:i]
-                after_event = stove_temps[i:]
-                start_time = False
-                end_time = False
-                min_below_threshold = 0
-                for j, temp in enumerate(before_event[::-1]):
-                    if j == len(before_event)-2:
-                        start_time = 0
-                        min_below_threshold = 0
-                        break
-                    elif temp < self.temp_threshold:
-                        min_below_threshold += 1
-                        if min_below_threshold == 5:
-                            start_time = i - j
-                            min_below_threshold = 0
-                            break
-                    else:
-                        min_below_threshold = 0
-                for k, t in enumerate(after_event):
-                    if k == len(after_event)-2:
-                        end_time = len(stove_temps)-1
-                        break
-                    elif t < self.temp_threshold:
-                        min_below_threshold += 1
-                        if min_below_threshold == 5:
-                            end_time = i + k
-                            break
-                    else:
-                        min_below_threshold = 0
-                if not start_time:
-                    raise ValueError('Could not find start time for cooking event on ' + stove + ' at index: ', i)
-                if not end_time:
-                    raise ValueError('Could not find end time for cooking event on ' + stove + ' at index: ', i)
-                if events:
-                    previous_event = events[-1]
-                    if previous_event[1] == start_time:
-                        pass
-                    if previous_event[2] > start_time:
-                        start_time = previous_event[2] + 1
-                    else:
-                        events.append([i, start_time, end_time])
-                else:
-                    events.append([i, start_time, end_time])
-            cook_events.update({s: events})
+            events = self._cached(('cooking_events', s, self.temp_threshold, self.time_between_events),
+                                  lambda: self._stove_events(s), self._length())
+            cook_events.update({s: [list(event) for event in events]})
         return cook_events
 
+    def _stove_events(self, stove):
+        '''Find the cooking events of a single stove (internal function, see detection.find_cooking_events and
+        detection.timed_cooking_events).'''
+
+        if self.time_based:
+            return timed_cooking_events(self._readings(stove), self._timestamps(), self.temp_threshold,
+                                        self.time_between_events * 60, self.max_gap * 60, stove=stove,
+                                        profiler=self.profiler)
+        return find_cooking_events(self._readings(stove), self.temp_threshold, self.time_between_events, stove,
+                                   profiler=self.profiler)
+
+    def _find_cooking_events(self, stoves):
+        '''Find the cooking events of several stoves together, in passes over as many stoves' readings at once as
+        fit in detection.STOVE_MATRIX_READINGS, spread across the threads (internal function, see
+        detection.stove_matrix_boundaries). Cooking events found from the timestamps are found for each stove on its
+        own, across the threads.
+
+        Args:
+            stoves (list): Stoves whose cooking events have not been found yet.
+        '''
+
+        length = self._length()
+        if self.time_based:
+            timestamps = self._timestamps()
+            work = [(s, self._readings(s)) for s in stoves]
+            temp_threshold, time_between_events, max_gap = self.temp_threshold, self.time_between_events, self.max_gap
+
+            def events(item):
+                stove, readings = item
+                return timed_cooking_events(readings, timestamps, temp_threshold, time_between_events * 60,
+                                            max_gap * 60, stove=stove)
+
+            for s, found in zip(stoves, self._map('cooking_events_threads', stoves, events, work)):
+                self._cached(('cooking_events', s, temp_threshold, time_between_events), lambda: found, length)
+            return
+
+        per_pass = max(STOVE_MATRIX_READINGS // max(length, 1), 1)
+        if self.threads > 1:
+            # at least one pass for every thread
+            per_pass = min(per_pass, -(-len(stoves) // self.threads))
+        groups = [stoves[first:first + per_pass] for first in range(0, len(stoves), per_pass)]
+        temp_threshold, time_between_events = self.temp_threshold, self.time_between_events
+        profiler = self.profiler if self.threads == 1 else NULL_PROFILER
+        # the readings are read here, so only arrays are used in the threads
+        work = [(group, [self._readings(s) for s in group]) for group in groups]
+
+        def boundaries(item):
+            group, readings = item
+            return stove_matrix_boundaries(readings, temp_threshold, time_between_events, group, profiler)
+
+        for group, group_boundaries in zip(groups, self._map('cooking_events_threads', stoves, boundaries, work)):
+            for s, (peaks, starts, ends) in zip(group, group_boundaries):
+                self._cached(('cooking_events', s, temp_threshold, time_between_events),
+                             lambda: assemble_events(peaks, starts, ends, s), length)
+
     def _daily_cooking_time(self, cooking_events):
         '''Determine the total time spent cooking on a stove (mins) for each day of the study (internal function).
 
         Args:
-            cooking_events(list): a list of lists containing cooking event information [cooking event, start
-                                          of cooking, end of cooking] as the values
+            cooking_events(dict): The stove as the key and a list of lists containing cooking event information
+                                  [cooking event, start of cooking, end of cooking] as the value
 
         Returns:
-                daily_cooking (dict): A dictionary containing stove cooking information for each day of study. Keys
-                                      represent the day of the study, values are the total time(min) cooking recorded
-                                      for that day of the study. Day 0 represents the total amount of cooking time.
+                daily_cooking (series): The cooking time (mins) for each day of study, indexed by day of the study.
+                                        Day 0 represents the total amount of cooking time.
 
         '''
 
-        day = 0
-        daily_cooking = {}
-        study_began = self.df_stoves['timestamp'][0]
-        daily_mins = 0
-        total_mins= 0
-
-        for i in cooking_events:
-            for j, idx in enumerate(cooking_events[i]):
-                end_time = self.df_stoves['timestamp'][idx[2]]
-                start_time = self.df_stoves['timestamp'][idx[1]]
-                days_since_start = (end_time - study_began).days
-                total_mins += (end_time - start_time).seconds / 60
-                if days_since_start != day:
-                    daily_cooking.update({day+1: daily_mins})
-                    day = days_since_start
-                    daily_mins = (end_time - start_time).seconds / 60
-                    if j == len(cooking_events[i]) - 1:
-                        if days_since_start == self.study_days:
-                            day = days_since_start
-                        else:
-                            day += 1
-                        daily_cooking.update({day: daily_mins})
-                        break
-                elif j == len(cooking_events[i]) - 1:
-                    daily_mins += (end_time - start_time).seconds / 60
-                    if days_since_start == self.study_days:
-                        day = days_since_start
-                    else:
-                        day += 1
-                    daily_cooking.update({day: daily_mins})
-                else:
-                    daily_mins += (end_time - start_time).seconds / 60
-            if len(daily_cooking) != self.study_days:
-                for i in range(self.study_days):
-                    day = i + 1
-                    if day not in daily_cooking:
-                        mins = 0
-                        daily_cooking.update({day: mins})
-
-            daily_cooking.update({0: total_mins})
-
-        return daily_cooking
+        timestamps = self._timestamps()
+        events = np.array([event for s in cooking_events for event in cooking_events[s]], dtype=np.int64).reshape(-1, 3)
+        return daily_cooking_time(timestamps[events[:, 1]], timestamps[events[:, 2]], timestamps[0], self.study_days)
 
     def cooking_duration(self, stove="All Stoves"):
         '''Determines the cooking duration (mins) on each stove for each day of the study.
@@ -395,8 +590,12 @@ class Household:
         all_cooking_info = []
         ind = []
 
+        missing = [s for s in stove_type
+                   if ('cooking_duration', s, self.temp_threshold, self.time_between_events) not in self._cache]
+        cook_events = self.cooking_events(missing) if missing else {}
         for s in stove_type:
-            daily_cooking = self._daily_cooking_time(self.cooking_events(s))
+            daily_cooking = self._cached(('cooking_duration', s, self.temp_threshold, self.time_between_events),
+                                         lambda: self._daily_cooking_time({s: cook_events[s]}))
             ind.append(s+'(min)')
             all_cooking_info.append(daily_cooking)
 
@@ -410,11 +609,39 @@ class Household:
         colors = {}
         color_list = ['#F5793A', '#A95AA1', '#0F2080', '#85C0F9']
         for color, i in enumerate(item):
-            colors.update({i: color_list[color]})
+            colors.update({i: color_list[color % len(color_list)]})
         
         return colors
 
-    def plot_stove(self, stove="All Stoves", cooking_events=False):
+    def _line_trace(self, item, max_points, downsample, keep, **kwargs):
+        '''Line trace of the readings of a stove or fuel, downsampled if max_points is given (internal function).
+
+        Args:
+            item (str): The stove or fuel.
+            max_points (int): The number of points to aim for, None plots every reading.
+            downsample (str): The downsampling method, see downsample.downsample_indices.
+            keep (list): Indices of readings that are always plotted.
+            **kwargs : Passed on to the trace.
+
+        Returns:
+            trace (object): A go.Scatter trace, or go.Scattergl if it has more than WEBGL_THRESHOLD points.
+        '''
+
+        import plotly.graph_objects as go
+
+        x = self._timestamps()
+        y = self._readings(item)
+        with self.profiler.stage('line_trace', item, len(y)) as stats:
+            if max_points is not None:
+                indices = downsample_indices(y, max_points, downsample, x=x.astype('int64'), keep=keep)
+                x = x[indices]
+                y = y[indices]
+
+            trace = go.Scattergl if len(y) > WEBGL_THRESHOLD else go.Scatter
+            stats['found'] = len(y)
+            return trace(x=x, y=y, mode='lines', **kwargs)
+
+    def plot_stove(self, stove="All Stoves", cooking_events=False, max_points=None, downsample='minmax', show=False):
         '''Plotting the temperature data of stoves over duration of study.
 
         Args:
@@ -424,90 +651,101 @@ class Household:
             cooking_events (bool): If it is desired to have cooking events marked cooking_events must be set to
                                    True. Default is False and will only show the cook stove temperature data with no
                                    cooking events marked.
+            max_points (int): The number of points to aim for in each temperature line. The start, peak and end of
+                              every cooking event marked are always plotted. Default is None, which plots every
+                              reading.
+            downsample (str): How readings are picked when max_points is given, 'minmax' (the lowest and highest
+                              reading of each stretch of readings) or 'lttb' (largest triangle three buckets).
+                              Defaults to 'minmax'.
+            show (bool): If True the figure is also shown. Default is False, which only builds the figure.
 
         Returns:
-              figure : Returns interactive line plots of all requested stove temperature readings over the
+              figure : Returns a figure of interactive line plots of all requested stove temperature readings over the
                        duration of the study. If cooking_events = True plot will show determined cooking events with
                        a point.
         '''
 
-        stove_type = self._check_item(stove)
+        import plotly.graph_objects as go
 
-        colors = self._color_assignment(stove_type)
+        with self.profiler.stage('plot_stove', rows=self._length()):
+            stove_type = self._check_item(stove)
 
-        cooking_colors = {"start": "turquoise",
-                          "peak": 'red',
-                          "end": "black"}
-        fig = go.Figure()
+            colors = self._color_assignment(stove_type)
 
-        fig.update_yaxes(title_text="Temp")
-        fig.update_xaxes(title_text="Time")
-        fig.update_layout(title_text="Household: " + self.hh_id + " " + stove + " Stove Temperature")
+            cooking_colors = {"start": "turquoise",
+                              "peak": 'red',
+                              "end": "black"}
+            fig = go.Figure()
 
-        for s in stove_type:
-            fig.add_trace(go.Scatter(
-                x=self.df_stoves['timestamp'],
-                y=self.df_stoves[s].values,
-                mode='lines',
-                marker=dict(
-                        color=colors[s],
-                        size=5),
-                name=s.split(' ')[0],
-                legendgroup= s
-            ))
-
-        if cooking_events:
-            events = self.cooking_events(stove)
+            fig.update_yaxes(title_text="Temp")
+            fig.update_xaxes(title_text="Time")
+            fig.update_layout(title_text="Household: " + self.hh_id + " " + stove + " Stove Temperature")
+
+            events = self.cooking_events(stove) if cooking_events else {}
 
             for s in stove_type:
-                peak = []
-                start = []
-                end = []
-                for point in events[s]:
-                    peak.append(point[0])
-                    start.append(point[1])
-                    end.append(point[2])
+                keep = [i for event in events.get(s, []) for i in event]
+                fig.add_trace(self._line_trace(
+                    s, max_points, downsample, keep,
+                    marker=dict(
+                            color=colors[s],
+                            size=5),
+                    name=s.split(' ')[0],
+                    legendgroup= s
+                ))
 
-                fig.add_trace(
-                                go.Scatter(x=self.df_stoves['timestamp'][peak],
-                                           y=self.df_stoves[s][peak],
-                                           mode='markers',
-                                           marker=dict(
-                                                    color=cooking_colors['peak'],
-                                                    size=5),
-                                           name=s + ' Cooking Events',
-                                           legendgroup=s
-
-                                           )
-                            )
-                fig.add_trace(
-                                go.Scatter(x=self.df_stoves['timestamp'][start],
-                                           y=self.df_stoves[s][start],
-                                           mode='markers',
-                                           marker=dict(
-                                                    color=cooking_colors['start'],
-                                                    size=10,
-                                                    symbol='triangle-right'),
-                                           name=s + ' Cooking start',
-                                           legendgroup=s
-                                           )
-                            )
-                fig.add_trace(
-                                go.Scatter(x=self.df_stoves['timestamp'][end],
-                                           y=self.df_stoves[s][end],
-                                           mode='markers',
-                                           marker=dict(
-                                                    color=cooking_colors['end'],
-                                                    size=10,
-                                                    symbol='triangle-left'),
-                                           name=s + ' Cooking end',
-                                           legendgroup=s
-                                           )
-                            )
-
-        return fig.show()
-
-    def plot_fuel(self, fuel="All Fuels", fuel_usage=False):
+            if cooking_events:
+                for s in stove_type:
+                    peak = []
+                    start = []
+                    end = []
+                    for point in events[s]:
+                        peak.append(point[0])
+                        start.append(point[1])
+                        end.append(point[2])
+
+                    fig.add_trace(
+                                    go.Scatter(x=self._timestamps()[peak],
+                                               y=self._readings(s)[peak],
+                                               mode='markers',
+                                               marker=dict(
+                                                        color=cooking_colors['peak'],
+                                                        size=5),
+                                               name=s + ' Cooking Events',
+                                               legendgroup=s
+
+                                               )
+                                )
+                    fig.add_trace(
+                                    go.Scatter(x=self._timestamps()[start],
+                                               y=self._readings(s)[start],
+                                               mode='markers',
+                                               marker=dict(
+                                                        color=cooking_colors['start'],
+                                                        size=10,
+                                                        symbol='triangle-right'),
+                                               name=s + ' Cooking start',
+                                               legendgroup=s
+                                               )
+                                )
+                    fig.add_trace(
+                                    go.Scatter(x=self._timestamps()[end],
+                                               y=self._readings(s)[end],
+                                               mode='markers',
+                                               marker=dict(
+                                                        color=cooking_colors['end'],
+                                                        size=10,
+                                                        symbol='triangle-left'),
+                                               name=s + ' Cooking end',
+                                               legendgroup=s
+                                               )
+                                )
+
+        if show:
+            fig.show()
+        return fig
+
+    def plot_fuel(self, fuel="All Fuels", fuel_usage=False, max_points=None, downsample='minmax', show=False):
         '''Plotting the fuel weight data over duration of study.
 
         Args:
@@ -516,56 +754,67 @@ class Household:
                          in data set.
             fuel_usage (bool): If it is desired to have fuel usage marked fuel_usage must be set to True.
                                Default is False and will only show the fuel weight data with no weight changes marked.
+            max_points (int): The number of points to aim for in each weight line. Every weight change marked is
+                              always plotted. Default is None, which plots every reading.
+            downsample (str): How readings are picked when max_points is given, 'minmax' or 'lttb' (see plot_stove).
+                              Defaults to 'minmax'.
+            show (bool): If True the figure is also shown. Default is False, which only builds the figure.
 
         Returns:
-            figure : Returns interactive line plots of all requested fuel weight data over the
+            figure : Returns a figure of interactive line plots of all requested fuel weight data over the
                      duration of the study. If fuel_usage=True all significant fuel weight changes will be
                      marked on the plot.
         '''
 
-        # fuel_type = self.check_fuel_type(fuel)
-        fuel_type = self._check_item(fuel)
+        import plotly.graph_objects as go
 
-        fig = go.Figure()
+        with self.profiler.stage('plot_fuel', rows=self._length()):
+            # fuel_type = self.check_fuel_type(fuel)
+            fuel_type = self._check_item(fuel)
 
-        colors = self._color_assignment(fuel_type)
+            fig = go.Figure()
 
-        fig.update_yaxes(title_text="Weight")
-        fig.update_xaxes(title_text="Time")
-        fig.update_layout(title_text="Household: " + self.hh_id + " " + fuel + " Weight Readings")
+            colors = self._color_assignment(fuel_type)
 
-        for f in fuel_type:
-            fig.add_trace(
-                go.Scatter(
-                    x=self.df_stoves['timestamp'],
-                    y=self.df_stoves[f].values,
-                    mode='lines',
-                    marker=dict(
-                                color=colors[f],
-                                size=5
-                                ),
-                    name=f.split(' ')[0],
-                    legendgroup=f
-                ))
+            fig.update_yaxes(title_text="Weight")
+            fig.update_xaxes(title_text="Time")
+            fig.update_layout(title_text="Household: " + self.hh_id + " " + fuel + " Weight Readings")
 
-        if fuel_usage:
-            self.fuel_usage(fuel=fuel_type)
-            changes = self.weight_changes
+            changes = {}
+            if fuel_usage:
+                self.fuel_usage(fuel=fuel_type)
+                changes = self.weight_changes
 
             for f in fuel_type:
                 fig.add_trace(
-                    go.Scatter(x=self.df_stoves['timestamp'][changes[f]],
-                               y=self.df_stoves[f][changes[f]],
-                               mode='markers',
-                               marker=dict(
-                                color='red',
-                                size=5
-                                ),
-                               name=f + ' Weight Change',
-                               legendgroup=f
-                               )
-                )
-        return fig.show()
+                    self._line_trace(
+                        f, max_points, downsample, changes.get(f),
+                        marker=dict(
+                                    color=colors[f],
+                                    size=5
+                                    ),
+                        name=f.split(' ')[0],
+                        legendgroup=f
+                    ))
+
+            if fuel_usage:
+
+                for f in fuel_type:
+                    fig.add_trace(
+                        go.Scatter(x=self._timestamps()[changes[f]],
+                                   y=self._readings(f)[changes[f]],
+                                   mode='markers',
+                                   marker=dict(
+                                    color='red',
+                                    size=5
+                                    ),
+                                   name=f + ' Weight Change',
+                                   legendgroup=f
+                                   )
+                    )
+        if show:
+            fig.show()
+        return fig
 
     def stove_and_fuel_usage(self):
         all_usage = pd.concat([self.cooking_duration(), self.fuel_usage()], axis=1)
@@ -576,6 +825,7 @@ class Household:
     #     stove_type = self.check_stove_type(stove)
     #     fuel_type = self.check_fuel_type(fuel)
     #
+    #     from plotly.subplots import make_subplots
     #     fig = make_subplots(specs=[[{"secondary_y": True}]])
     #
     #     fig.update_xaxes(title_text="Time")
@@ -624,7 +874,10 @@ class Household:
 
 
 if __name__ == "__main__":
-    from example_file_convert import reformat_example_files as reformat
+    # run as python -m FUEL.household
+    import os
+
+    from .example_file_convert import reformat_example_files as reformat
 
     # filepaths = ['HH_38_2018-08-26_15-01-40_processed_v3.csv',
     #          'HH_44_2018-08-17_13-49-22_processed_v2.csv',
@@ -652,8 +905,9 @@ if __name__ == "__main__":
     #     x.plot_fuel()
     #     x.plot_stove()
 
-    df, stoves, fuels, hh_id = reformat('./data_files/HH_319_2018-08-25_19-27-32_processed_v2.csv')
-    Household(df, stoves, fuels, hh_id)
+    df, stoves, fuels, hh_id = reformat(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_files',
+                                                     'HH_319_2018-08-25_19-27-32_processed_v2.csv'))
+    Household(df, stoves, fuels, hh_id, show_plots=True)
     # print(x._daily_cooking_time(events))
     # print(x.cooking_duration())
     # x.plot_fuel(fuel_usage=True)
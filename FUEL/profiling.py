@@ -0,0 +1,126 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+PROFILE_COLUMNS = ['stage', 'item', 'seconds', 'rows', 'found', 'memory']
+
+
+class Profiler:
+
+    def __init__(self, callback=None, memory=False):
+        '''Record how long each stage of reading and analysing a household takes.
+
+        Every stage records its name, the stove, fuel or file it ran on, the wall time (seconds), the number of rows
+        (readings) it went through and the number of things it found (peaks, cooking events or weight changes) where
+        that means something. Stages run inside other stages, such as find_peaks inside cooking_events, are recorded as
+        well, so their times are also part of the stage they ran in.
+
+        Args:
+            callback (function): Called with the record of each stage as it finishes. Defaults to no callback.
+
+            memory (bool): If True the memory high-water mark of each stage is also recorded, with tracemalloc. This
+                           makes everything run a few times slower. Defaults to False.
+
+        Returns:
+            callback : Input callback
+            memory : Input memory
+            records (list): The record (dict) of every stage that has finished, in the order they finished
+        '''
+
+        self.callback = callback
+        self.memory = memory
+        self.records = []
+        self._open = []  # records of the stages that have not finished yet, innermost last
+        self._tracing = False  # whether tracemalloc was started by this profiler
+
+    @contextmanager
+    def stage(self, name, item=None, rows=None):
+        '''Time a stage.
+
+        Args:
+            name (str): The name of the stage.
+
+            item (str): The stove, fuel or file the stage runs on. Defaults to None.
+
+            rows (int): The number of rows the stage goes through. Defaults to None.
+
+        Returns:
+            record (dict): The record of the stage, the number of things found can be set with record['found'].
+        '''
+
+        record = {'stage': name, 'item': item, 'seconds': None, 'rows': rows, 'found': None, 'memory': None}
+        if self.memory:
+            self._memory_begin(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if self.memory:
+                self._memory_end(record)
+            self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def _memory_begin(self, record):
+        '''Start following the memory used by a stage (internal function).'''
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        current, peak = tracemalloc.get_traced_memory()
+        if self._open:
+            self._open[-1]['_peak'] = max(self._open[-1]['_peak'], peak)
+        tracemalloc.reset_peak()
+        record.update({'_start': current, '_peak': current})
+        self._open.append(record)
+
+    def _memory_end(self, record):
+        '''Record the most memory (bytes) a stage used above what was in use when it began (internal function).'''
+
+        peak = max(tracemalloc.get_traced_memory()[1], record.pop('_peak'))
+        record['memory'] = peak - record.pop('_start')
+        self._open.pop()
+        if self._open:
+            self._open[-1]['_peak'] = max(self._open[-1]['_peak'], peak)
+        elif self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def report(self):
+        '''The records of every stage as a dataframe.
+
+        Returns:
+            report (dataframe): A row per stage with the columns stage, item, seconds, rows, found and memory (bytes,
+                                missing unless memory was recorded).
+        '''
+
+        return pd.DataFrame(self.records, columns=PROFILE_COLUMNS)
+
+
+class NullStage:
+    '''A stage that records nothing (internal class).'''
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exception):
+        return False
+
+
+class NullProfiler:
+    '''A profiler that records nothing, used when no profiler is given.'''
+
+    records = ()
+
+    def stage(self, name, item=None, rows=None):
+        return NULL_STAGE
+
+    def report(self):
+        return pd.DataFrame(columns=PROFILE_COLUMNS)
+
+
+NULL_STAGE = NullStage()
+NULL_PROFILER = NullProfiler()
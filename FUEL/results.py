@@ -0,0 +1,162 @@
+import glob
+import json
+import os
+
+import pandas as pd
+
+RESULT_FORMATS = ('csv', 'jsonl', 'parquet')
+# file extensions each result format is picked by
+RESULT_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.json': 'jsonl', '.parquet': 'parquet'}
+
+
+def result_format(path, fmt=None):
+    '''Work out the format of a results file from its extension, if it is not given.
+
+    Args:
+        path (str): The results file path.
+
+        fmt (str): 'csv', 'jsonl' or 'parquet'. Defaults to the format of the file extension.
+
+    Returns:
+        fmt (str): The format.
+    '''
+
+    if fmt is None:
+        fmt = RESULT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if fmt is None:
+            raise ValueError('Could not tell the results format from ' + path + ', it must be one of ' +
+                             ', '.join(RESULT_FORMATS) + '!')
+    if fmt not in RESULT_FORMATS:
+        raise ValueError('The results format must be one of ' + ', '.join(RESULT_FORMATS) + '!')
+    return fmt
+
+
+class ResultWriter:
+
+    def __init__(self, path, fmt=None, resume=False):
+        '''Write the daily usage of households to a results file one household at a time, as each is analysed.
+
+        Every household is written in one go and then recorded in a log next to the results (path + '.done'), with
+        the size of the results file after it for csv and jsonl, or the part file it was written to for parquet,
+        which is written as a directory of part files because a parquet file can not be added to. A run that stops
+        part way through leaves a results file holding every household in the log, and a household being written when
+        it stopped is dropped when the run is resumed, so nothing is written twice.
+
+        Args:
+            path (str): The results file (csv or jsonl) or directory (parquet).
+
+            fmt (str): 'csv', 'jsonl' or 'parquet'. Defaults to the format of the file extension.
+
+            resume (bool): If True the households already in the results are kept and recorded in done, so they can
+                           be skipped. If False any earlier results are replaced. Defaults to False.
+
+        Returns:
+            path : Input path
+            fmt : The results format
+            done (set): The absolute paths of the data files of the households already written
+        '''
+
+        self.path = path
+        self.fmt = result_format(path, fmt)
+        self.done = set()
+        self._log_path = path + '.done'
+        entries = []
+        if resume and os.path.exists(self._log_path):
+            with open(self._log_path, encoding='utf-8') as log:
+                for line in log:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # a line cut short when the run stopped
+                        break
+        self.done = {entry['file'] for entry in entries}
+
+        if self.fmt == 'parquet':
+            os.makedirs(path, exist_ok=True)
+            kept = {entry['part'] for entry in entries}
+            for part in glob.glob(os.path.join(path, 'part-*.parquet')):
+                if os.path.basename(part) not in kept:
+                    os.remove(part)
+            self._parts = len(entries)
+        else:
+            size = entries[-1]['size'] if entries else 0
+            if size and (not os.path.exists(path) or os.path.getsize(path) < size):
+                raise ValueError('The results in ' + path + ' are shorter than their log, so can not be resumed!')
+            self._file = open(path, 'a+b')
+            self._file.truncate(size)
+            self._file.seek(size)
+
+        with open(self._log_path, 'w', encoding='utf-8') as log:
+            log.writelines(json.dumps(entry) + '\n' for entry in entries)
+        self._log = open(self._log_path, 'a', encoding='utf-8')
+
+    def write(self, path, usage):
+        '''Write the daily usage of a household.
+
+        Args:
+            path (str): The data file path of the household.
+
+            usage (dataframe): The daily usage of the household, see study.analyse_file.
+        '''
+
+        entry = {'file': os.path.abspath(path)}
+        if self.fmt == 'parquet':
+            entry['part'] = 'part-' + str(self._parts).zfill(6) + '.parquet'
+            part_path = os.path.join(self.path, entry['part'])
+            usage.to_parquet(part_path + '.tmp', index=False)
+            os.replace(part_path + '.tmp', part_path)
+            self._parts += 1
+        else:
+            if self.fmt == 'csv':
+                text = usage.to_csv(index=False, header=self._file.tell() == 0)
+            else:
+                text = usage.to_json(orient='records', lines=True, date_format='iso')
+                if text and not text.endswith('\n'):
+                    text += '\n'
+            self._file.write(text.encode('utf-8'))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            entry['size'] = self._file.tell()
+
+        self._log.write(json.dumps(entry) + '\n')
+        self._log.flush()
+        self.done.add(entry['file'])
+
+    def close(self):
+        '''Close the results file and the log.'''
+
+        if self.fmt != 'parquet':
+            self._file.close()
+        self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+        return False
+
+
+def read_results(path, fmt=None):
+    '''Read a results file written by ResultWriter.
+
+    Args:
+        path (str): The results file (csv or jsonl) or directory (parquet).
+
+        fmt (str): 'csv', 'jsonl' or 'parquet'. Defaults to the format of the file extension.
+
+    Returns:
+        usage (dataframe): The daily usage of every household written.
+    '''
+
+    fmt = result_format(path, fmt)
+    if fmt != 'parquet' and not os.path.getsize(path):
+        return pd.DataFrame()
+    if fmt == 'csv':
+        return pd.read_csv(path)
+    if fmt == 'jsonl':
+        return pd.read_json(path, orient='records', lines=True)
+    parts = sorted(glob.glob(os.path.join(path, 'part-*.parquet')))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
@@ -0,0 +1,354 @@
+import numpy as np
+import pandas as pd
+
+from .aggregation import daily_cooking_time, daily_fuel_use
+from .detection import CUT_MARGIN, _last_reading_change, event_cut, find_cooking_events, scan_weight_changes
+from .example_file_convert import read_example_file_chunks
+from .household import DEFAULT_FUEL_FLOORS
+from .study import USAGE_COLUMNS
+
+# most readings of a stove kept while waiting for it to be cold for long enough to separate its cooking events, a week
+# of one-minute readings
+MAX_PENDING_READINGS = 7 * 24 * 60
+
+
+class StreamingHousehold:
+
+    def __init__(self, stoves, fuels, hh_id, temp_threshold=15, time_between_events=60, weight_threshold=0.2,
+                 fuel_floors=None, max_pending=MAX_PENDING_READINGS):
+        '''Analyse the sensor data of a household in time-ordered chunks, without ever holding the whole study.
+
+        Cooking events and fuel weight changes are found as the chunks come in, giving exactly the results of a
+        Household holding all of the data. The readings of each stove are kept from the last point it was cold for
+        long enough to separate its cooking events (max(time_between_events - 1, 14) readings below the temperature
+        threshold), and the last two readings of each fuel, together with the events, weight changes and daily totals
+        found so far.
+
+        A stove that is never cold for that long, such as a sensor stuck above the threshold, would keep its readings
+        forever. Once a stove has more than max_pending readings waiting, its cooking events are found in them as if
+        the study ended there and they are dropped. The reading the stove was cut at is recorded in forced_cuts, and
+        the events found around it may differ from those of a Household holding all of the data.
+
+        Args:
+            stoves (list): Stoves in the study (these should match the names of the column headers for the
+                           stove information in the chunks exactly).
+
+            fuels (list): Fuels in the study (these should match the names of the column headers for the
+                          fuel information in the chunks exactly).
+
+            hh_id (str): The individual household identification
+
+            temp_threshold, time_between_events, weight_threshold, fuel_floors : As for Household.
+
+            max_pending (int): The most readings of a stove kept waiting for a point its cooking events can be
+                               separated at. Defaults to a week of one-minute readings.
+
+        Returns:
+            stoves : Input stoves
+            fuels : Input fuels
+            hh_id : Input Household ID
+            temp_threshold: Input temperature threshold
+            time_between_events: Input time between cooking events
+            weight_threshold: Input weight threshold
+            fuel_floors: Input fuel floors
+            max_pending: Input most readings kept for a stove
+            readings: Number of readings analysed so far
+            forced_cuts: The readings each stove was cut at after max_pending readings without a point its cooking
+                         events could be separated at
+        '''
+
+        if type(stoves) != list:
+            raise ValueError('Must put in a list of stove types!')
+        if type(fuels) != list:
+            raise ValueError('Must put in a list of fuel types!')
+        if type(hh_id) != str:
+            raise ValueError('Must put in household ID as a string!')
+        if type(temp_threshold) != int or temp_threshold < 0:
+            raise ValueError("The temperature threshold must be a positive integer!")
+        if type(time_between_events) != int or time_between_events < 0:
+            raise ValueError("The time between events must be a positive integer!")
+        if type(weight_threshold) != float or weight_threshold < 0:
+            raise ValueError("The weight threshold must be a positive number!")
+        if fuel_floors is None:
+            fuel_floors = DEFAULT_FUEL_FLOORS
+        if type(fuel_floors) != dict:
+            raise ValueError("The fuel floors must be a dictionary of fuel names and weights!")
+        if type(max_pending) != int or max_pending < 1:
+            raise ValueError("The most readings kept must be a positive integer!")
+
+        self.stoves = list(stoves)
+        self.fuels = list(fuels)
+        self.hh_id = hh_id
+        self.temp_threshold = temp_threshold
+        self.time_between_events = time_between_events
+        self.weight_threshold = weight_threshold
+        self.fuel_floors = {f.lower(): floor for f, floor in fuel_floors.items()}
+        self.max_pending = max_pending
+        self.readings = 0
+        self.finished = False
+        self.forced_cuts = {s: [] for s in self.stoves}
+
+        # readings still needed, each kept from its own reading number, the timestamps from self._start
+        self._start = 0
+        self._times = np.array([], dtype='datetime64[ns]')
+        self._first = {item: 0 for item in self.stoves + self.fuels}
+        self._values = {item: np.array([], dtype=np.float64) for item in self.stoves + self.fuels}
+
+        # the first reading of each stove that has not been searched for cooking events, and the number of readings
+        # there were when it was last searched for a cut
+        self._next_reading = {s: 0 for s in self.stoves}
+        self._scanned = {s: 0 for s in self.stoves}
+        self._events = {s: [] for s in self.stoves}
+        # the first reading of each fuel that has not been checked for a weight change, and the weight at the last one
+        self._next_weight = {f: 1 for f in self.fuels}
+        self._weight = {f: None for f in self.fuels}
+        self._changes = {f: [] for f in self.fuels}
+        self._change_weights = {f: {} for f in self.fuels}
+
+        # timestamps of the first reading and of every reading the daily totals depend on
+        self._timestamps = {}
+        self._last_time = None
+        self._days_reported = 0
+
+    def update(self, chunk):
+        '''Analyse the next chunk of readings.
+
+        Args:
+            chunk (dataframe): The next readings, formatted as for Household (a timestamp column and a column for
+                               every stove and fuel).
+
+        Returns:
+            usage (dataframe): The daily usage (see study.daily_usage) of every day of study that can no longer change,
+                               that has not been returned before.
+        '''
+
+        if self.finished:
+            raise ValueError('Cannot add readings once the stream is finished!')
+        if not isinstance(chunk, pd.DataFrame):
+            raise ValueError("Must put in a dataframe!")
+        if len(chunk) == 0:
+            return self._usage_rows(self._days_reported)
+
+        times = chunk['timestamp'].values.astype('datetime64[ns]')
+        if self.readings == 0:
+            self._timestamps.update({0: pd.Timestamp(times[0])})
+        self._last_time = pd.Timestamp(times[-1])
+        self._times = np.concatenate((self._times, times))
+        for item in self._values:
+            self._values[item] = np.concatenate((self._values[item], chunk[item].values.astype(np.float64)))
+        self.readings += len(chunk)
+
+        for s in self.stoves:
+            cut = self._cut(s)
+            if self.readings - cut > self.max_pending:
+                cut = self.readings
+                self.forced_cuts[s].append(cut)
+            self._find_events(s, cut)
+        for f in self.fuels:
+            self._find_changes(f, self.readings - 1)
+        self._trim()
+
+        return self._usage_rows(self._final_day())
+
+    def finish(self):
+        '''Analyse the readings left at the end of the study.
+
+        Returns:
+            usage (dataframe): The daily usage (see study.daily_usage) of every day of study that has not been returned
+                               before.
+        '''
+
+        if not self.finished:
+            if self.readings == 0:
+                raise ValueError('No readings were added!')
+            for s in self.stoves:
+                self._find_events(s, self.readings)
+            for f in self.fuels:
+                self._find_changes(f, self.readings - 1)
+                self._last_change(f)
+            self._trim()
+            self.finished = True
+
+        return self._usage_rows(self.study_days)
+
+    def _cut(self, stove):
+        '''Find the last reading up to which cooking events can be found without the readings still to come
+        (internal function, see detection.event_cut).'''
+
+        # a run long enough to cut in would have been found by the last search if it started long enough before it
+        first = max(self._next_reading[stove],
+                    self._scanned[stove] - max(self.time_between_events - 1, 2 * CUT_MARGIN))
+        self._scanned[stove] = self.readings
+        cut = event_cut(self._readings(stove, first, self.readings), self.temp_threshold, self.time_between_events)
+        return first + cut if cut else self._next_reading[stove]
+
+    def _readings(self, item, first, stop):
+        '''Readings first to stop (reading numbers) of a stove or fuel (internal function).'''
+
+        return self._values[item][first - self._first[item]:stop - self._first[item]]
+
+    def _find_events(self, stove, stop):
+        '''Find the cooking events of a stove in the readings before stop (internal function).'''
+
+        first = self._next_reading[stove]
+        if stop <= first:
+            return
+        temps = self._readings(stove, first, stop)
+        events = find_cooking_events(temps, self.temp_threshold, self.time_between_events, stove, offset=first)
+        for event in events:
+            for i in event[1:]:
+                self._timestamps.update({i: pd.Timestamp(self._times[i - self._start])})
+        self._events[stove].extend(events)
+        self._next_reading[stove] = stop
+
+    def _find_changes(self, fuel, stop):
+        '''Find the significant weight changes of a fuel in the readings before stop (internal function).'''
+
+        first = self._next_weight[fuel]
+        if stop <= first:
+            return
+        weights = self._readings(fuel, first - 1, stop + 1)
+        if self._weight[fuel] is None:
+            self._weight[fuel] = weights[0]
+        changes, self._weight[fuel] = scan_weight_changes(weights, self.weight_threshold, self._weight[fuel], 1,
+                                                          len(weights) - 1, self.fuel_floors.get(fuel))
+        for i in changes:
+            self._record_change(fuel, first - 1 + i)
+        self._next_weight[fuel] = stop
+
+    def _last_change(self, fuel):
+        '''Check the last reading of a fuel, which has no reading after it (internal function).'''
+
+        last = self.readings - 1
+        if last < 1:
+            return
+        weights = self._readings(fuel, last - 1, last + 1)
+        weight = self._weight[fuel] if self._weight[fuel] is not None else weights[0]
+        if _last_reading_change(weights, weight, self.fuel_floors.get(fuel)):
+            self._record_change(fuel, last)
+
+    def _record_change(self, fuel, i):
+        '''Keep a weight change along with its timestamp and weight (internal function).'''
+
+        self._changes[fuel].append(i)
+        self._change_weights[fuel].update({i: self._readings(fuel, i, i + 1)[0]})
+        self._timestamps.update({i: pd.Timestamp(self._times[i - self._start])})
+
+    def _trim(self):
+        '''Drop the readings that are no longer needed (internal function).'''
+
+        needed = {s: self._next_reading[s] for s in self.stoves}
+        needed.update({f: self._next_weight[f] - 1 for f in self.fuels})
+        for item, first in needed.items():
+            first = max(min(first, self.readings - 1), self._first[item])
+            self._values[item] = self._values[item][first - self._first[item]:]
+            self._first[item] = first
+        start = max(min(list(needed.values()) + [self.readings - 1]), self._start)
+        self._times = self._times[start - self._start:]
+        self._start = start
+
+    def _final_day(self):
+        '''The last day of study whose daily usage can no longer change (internal function).'''
+
+        study_began = self._timestamps[0]
+        last_day = (self._last_time - study_began).days - 1
+        pending = [self._next_reading[s] for s in self.stoves] + [self._next_weight[f] for f in self.fuels]
+        for i in pending:
+            if i < self.readings:
+                last_day = min(last_day, (pd.Timestamp(self._times[i - self._start]) - study_began).days)
+        return max(last_day, self._days_reported)
+
+    @property
+    def study_days(self):
+        '''The number of days in the study so far, rounded to the nearest day.'''
+
+        return round((self._last_time - self._timestamps[0]).total_seconds() / 86400)
+
+    def cooking_events(self):
+        '''The cooking events found so far on each stove, as for Household.cooking_events.'''
+
+        return {s: [list(event) for event in self._events[s]] for s in self.stoves}
+
+    def weight_changes(self):
+        '''The significant weight changes found so far for each fuel, as for Household.fuel_usage.'''
+
+        return {f: list(self._changes[f]) for f in self.fuels}
+
+    def _times_of(self, indices):
+        '''Timestamps of readings the daily totals depend on (internal function).'''
+
+        return np.array([self._timestamps[i].value for i in indices], dtype=np.int64).astype('datetime64[ns]')
+
+    def _daily_cooking(self, stove, study_days):
+        '''Daily cooking time of a stove (internal function).'''
+
+        events = self._events[stove]
+        return daily_cooking_time(self._times_of([event[1] for event in events]),
+                                  self._times_of([event[2] for event in events]), self._timestamps[0], study_days)
+
+    def _daily_fuel(self, fuel, study_days):
+        '''Daily fuel use of a fuel (internal function).'''
+
+        changes = self._changes[fuel]
+        weights = [self._change_weights[fuel][i] for i in changes]
+        return daily_fuel_use(self._times_of(changes), weights, self._timestamps[0], study_days, self.weight_threshold)
+
+    def cooking_duration(self):
+        '''The cooking duration (mins) on each stove for each day of the study, as for Household.cooking_duration.
+        Only available once the stream is finished.'''
+
+        if not self.finished:
+            raise ValueError('The stream must be finished first!')
+        all_cooking_info = [self._daily_cooking(s, self.study_days) for s in self.stoves]
+        cooking_times = pd.DataFrame(all_cooking_info, index=[s + '(min)' for s in self.stoves]).transpose()
+        return cooking_times.sort_index(ascending=True)
+
+    def fuel_usage(self):
+        '''The fuel (kg) used for each day of the study, as for Household.fuel_usage. Only available once the stream
+        is finished.'''
+
+        if not self.finished:
+            raise ValueError('The stream must be finished first!')
+        fuel_change = [self._daily_fuel(f, self.study_days) for f in self.fuels]
+        fuel_use = pd.DataFrame(fuel_change, index=[f + '(kg)' for f in self.fuels]).transpose()
+        return fuel_use.sort_index(ascending=True)
+
+    def _usage_rows(self, last_day):
+        '''Daily usage rows for the days after the last day reported, up to last_day (internal function).'''
+
+        first_day = self._days_reported + 1
+        rows = []
+        if last_day >= first_day:
+            # a study of one day more than last_day gives the final totals of every day up to last_day
+            study_days = self.study_days if self.finished else last_day + 1
+            for (item_type, items, units, daily) in (('stove', self.stoves, 'min', self._daily_cooking),
+                                                     ('fuel', self.fuels, 'kg', self._daily_fuel)):
+                for item in items:
+                    usage = daily(item, study_days)
+                    for day in range(first_day, last_day + 1):
+                        rows.append((self.hh_id, day, item_type, item, usage.get(day, 0), units))
+            self._days_reported = last_day
+        return pd.DataFrame(rows, columns=USAGE_COLUMNS)
+
+
+def stream_file(datafile_path, chunksize=100000, **thresholds):
+    '''Analyse a data file chunk by chunk.
+
+    Args:
+        datafile_path (str): The data file path.
+
+        chunksize (int): The number of readings read at a time. Defaults to 100000.
+
+        **thresholds : Any of the StreamingHousehold threshold arguments (temp_threshold, time_between_events,
+                       weight_threshold, fuel_floors).
+
+    Returns:
+        household (object): The finished StreamingHousehold.
+        usage (dataframe): The daily usage of the household (see study.daily_usage).
+    '''
+
+    chunks, stoves, fuels, hh_id = read_example_file_chunks(datafile_path, chunksize)
+    household = StreamingHousehold(stoves, fuels, hh_id, **thresholds)
+    usage = [household.update(chunk) for chunk in chunks]
+    usage.append(household.finish())
+    return household, pd.concat(usage, ignore_index=True)
@@ -0,0 +1,472 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import pandas as pd
+
+from .cache import ConversionCache
+from .events import household_events
+from .example_file_convert import WORKBOOK_EXTENSIONS, reformat_example_files
+from .household import Household
+from .profiling import PROFILE_COLUMNS, Profiler
+
+USAGE_COLUMNS = ['hh_id', 'day', 'type', 'item', 'usage', 'units']
+# data files picked out of a directory, csv files and Excel workbooks
+DATA_FILE_PATTERNS = ['*.csv'] + ['*' + extension for extension in WORKBOOK_EXTENSIONS]
+FIGURE_FORMATS = ('html', 'json')
+
+
+def find_files(files, pattern=None):
+    '''Find the household data files of a study.
+
+    Args:
+        files (str or list): A directory, a glob pattern or a list of data file paths.
+
+        pattern (str): The pattern used to pick files out of a directory. Defaults to all .csv files and Excel
+                       workbooks.
+
+    Returns:
+        paths (list): The sorted data file paths.
+    '''
+
+    if type(files) == list:
+        return list(files)
+    if type(files) != str:
+        raise ValueError('Must put in a directory, a glob pattern or a list of files!')
+    if os.path.isdir(files):
+        patterns = DATA_FILE_PATTERNS if pattern is None else [pattern]
+        return sorted(path for p in patterns for path in glob.glob(os.path.join(files, p)))
+    return sorted(glob.glob(files))
+
+
+def daily_usage(household):
+    '''Put the daily stove and fuel usage of a household into one tidy dataframe.
+
+    Args:
+        household (object): A Household.
+
+    Returns:
+        usage (dataframe): A dataframe with one row per day of study and stove or fuel. Columns are the household
+                           ID, the day of study, the type (stove or fuel), the item, the usage and the units (min for
+                           stoves, kg for fuels). The study totals (day 0) are left out.
+    '''
+
+    frames = []
+    for table, item_type, units in ((household.cooking_duration(), 'stove', 'min'),
+                                    (household.fuel_usage(), 'fuel', 'kg')):
+        if table.empty:
+            continue
+        table = table.drop(index=0).rename(columns=lambda c: c[:-len(units) - 2])
+        table = table.rename_axis('day').reset_index().melt(id_vars='day', var_name='item', value_name='usage')
+        table['type'] = item_type
+        table['units'] = units
+        frames.append(table)
+
+    usage = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=USAGE_COLUMNS)
+    usage['hh_id'] = household.hh_id
+    return usage[USAGE_COLUMNS]
+
+
+def analyse_file(path, cache_dir=None, profiler=None, figures_dir=None, max_points=None, **thresholds):
+    '''Read and analyse a single household data file.
+
+    Args:
+        path (str): The data file path.
+
+        cache_dir (str): Directory of a ConversionCache the converted data file is kept in. Defaults to no cache.
+
+        profiler (object): A profiling.Profiler the time taken by each stage is recorded in. Defaults to recording
+                           nothing.
+
+        figures_dir (str): A directory the stove and fuel figures of the household are written to as HTML pages (see
+                           write_figures). Defaults to writing no figures.
+
+        max_points (int): The number of points to aim for in each line of the figures. Defaults to every reading.
+
+        **thresholds : Any of the Household threshold arguments (temp_threshold, time_between_events,
+                       weight_threshold, fuel_floors).
+
+    Returns:
+        path (str): The data file path.
+        usage (dataframe): The daily usage of the household (see daily_usage) with the data file path in a file
+                           column, None if the analysis failed.
+        error (str): Why the analysis failed, None if it did not.
+    '''
+
+    try:
+        cache = ConversionCache(cache_dir) if cache_dir is not None else None
+        df, stoves, fuels, hh_id = reformat_example_files(path, fast=True, cache=cache, profiler=profiler)
+        household = Household(df, stoves, fuels, hh_id, lazy=True, profiler=profiler, **thresholds)
+        usage = daily_usage(household)
+        if figures_dir is not None:
+            write_figures(household, path, figures_dir, max_points=max_points)
+    except Exception as e:
+        return path, None, type(e).__name__ + ': ' + str(e)
+    usage.insert(1, 'file', path)
+    return path, usage, None
+
+
+def events_file(path, cache_dir=None, **thresholds):
+    '''Read a single household data file and find its cooking events and fuel weight changes.
+
+    Args:
+        path (str): The data file path.
+
+        cache_dir (str): Directory of a ConversionCache the converted data file is kept in. Defaults to no cache.
+
+        **thresholds : Any of the Household threshold arguments (temp_threshold, time_between_events,
+                       weight_threshold, fuel_floors).
+
+    Returns:
+        path (str): The data file path.
+        events (dict): The events of the household (see events.household_events), None if the analysis failed.
+        error (str): Why the analysis failed, None if it did not.
+    '''
+
+    try:
+        cache = ConversionCache(cache_dir) if cache_dir is not None else None
+        df, stoves, fuels, hh_id = reformat_example_files(path, fast=True, cache=cache)
+        events = household_events(Household(df, stoves, fuels, hh_id, lazy=True, **thresholds))
+    except Exception as e:
+        return path, None, type(e).__name__ + ': ' + str(e)
+    return path, events, None
+
+
+def convert_file(path, cache_dir=None):
+    '''Read a single household data file (csv or Excel workbook) into the format used by Household.
+
+    Args:
+        path (str): The data file path.
+
+        cache_dir (str): Directory of a ConversionCache the converted data file is kept in. Defaults to no cache.
+
+    Returns:
+        path (str): The data file path.
+        converted (tuple): (df_stoves, stoves, fuels, hh_id) as given by reformat_example_files, None if the data
+                           file could not be read.
+        error (str): Why the data file could not be read, None if it could.
+    '''
+
+    try:
+        cache = ConversionCache(cache_dir) if cache_dir is not None else None
+        converted = reformat_example_files(path, fast=True, cache=cache)
+    except Exception as e:
+        return path, None, type(e).__name__ + ': ' + str(e)
+    return path, converted, None
+
+
+def profile_file(path, cache_dir=None, memory=False, **thresholds):
+    '''Read and analyse a single household data file, recording the time taken by each stage.
+
+    Args:
+        path (str): The data file path.
+
+        cache_dir (str): Directory of a ConversionCache the converted data file is kept in. Defaults to no cache.
+
+        memory (bool): If True the memory high-water mark of each stage is recorded too (see profiling.Profiler).
+                       Defaults to False.
+
+        **thresholds : Any of the Household threshold arguments.
+
+    Returns:
+        path (str): The data file path.
+        usage (dataframe): See analyse_file.
+        error (str): See analyse_file.
+        timings (dataframe): The stages recorded (see profiling.Profiler.report) with the data file path in a file
+                             column, including those of a failed analysis.
+    '''
+
+    profiler = Profiler(memory=memory)
+    path, usage, error = analyse_file(path, cache_dir, profiler, **thresholds)
+    timings = profiler.report()
+    timings.insert(0, 'file', path)
+    return path, usage, error, timings
+
+
+def export_file(path, directory, fmt='html', cache_dir=None, max_points=None, **thresholds):
+    '''Read a single household data file and write its stove and fuel figures to files.
+
+    Args:
+        path (str): The data file path.
+
+        directory (str): The directory the figures are written to. HTML figures load plotly.js from a plotly.min.js
+                         file in this directory (see write_plotlyjs).
+
+        fmt (str): 'html' for static HTML pages or 'json' for plotly JSON. Defaults to 'html'.
+
+        cache_dir (str): Directory of a ConversionCache the converted data file is kept in. Defaults to no cache.
+
+        max_points (int): The number of points to aim for in each line, see Household.plot_stove. Defaults to every
+                          reading.
+
+        **thresholds : Any of the Household threshold arguments (temp_threshold, time_between_events,
+                       weight_threshold, fuel_floors).
+
+    Returns:
+        path (str): The data file path.
+        figures (list): The paths of the stove and fuel figures, None if the export failed.
+        error (str): Why the export failed, None if it did not.
+    '''
+
+    try:
+        cache = ConversionCache(cache_dir) if cache_dir is not None else None
+        df, stoves, fuels, hh_id = reformat_example_files(path, fast=True, cache=cache)
+        household = Household(df, stoves, fuels, hh_id, lazy=True, **thresholds)
+        figures = write_figures(household, path, directory, fmt, max_points)
+    except Exception as e:
+        return path, None, type(e).__name__ + ': ' + str(e)
+    return path, figures, None
+
+
+def write_figures(household, path, directory, fmt='html', max_points=None):
+    '''Write the stove and fuel figures of a household to files named after its data file.
+
+    Args:
+        household (object): A Household.
+
+        path (str): The data file path of the household.
+
+        directory (str): The directory the figures are written to, see export_file.
+
+        fmt (str): 'html' or 'json'. Defaults to 'html'.
+
+        max_points (int): The number of points to aim for in each line. Defaults to every reading.
+
+    Returns:
+        figures (list): The paths of the stove and fuel figures.
+    '''
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    figures = []
+    for kind, fig in (('stove', household.plot_stove(cooking_events=True, max_points=max_points)),
+                      ('fuel', household.plot_fuel(fuel_usage=True, max_points=max_points))):
+        figure_path = os.path.join(directory, name + '_' + kind + '.' + fmt)
+        if fmt == 'html':
+            fig.write_html(figure_path, include_plotlyjs='directory')
+        else:
+            fig.write_json(figure_path)
+        figures.append(figure_path)
+    return figures
+
+
+def write_plotlyjs(directory):
+    '''Write the plotly.js bundle shared by every HTML figure in a directory, if it is not there already.
+
+    Args:
+        directory (str): The directory the figures are written to.
+
+    Returns:
+        bundle_path (str): The path of the plotly.min.js bundle.
+    '''
+
+    from plotly.offline import get_plotlyjs
+
+    bundle_path = os.path.join(directory, 'plotly.min.js')
+    if not os.path.exists(bundle_path):
+        temp_path = bundle_path + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+        os.replace(temp_path, bundle_path)
+    return bundle_path
+
+
+def run_files(function, paths):
+    '''Run a function on some data files one after another, in a worker process (internal function).'''
+
+    return [function(path) for path in paths]
+
+
+class Study:
+
+    def __init__(self, files, workers=None, chunksize=1, temp_threshold=15, time_between_events=60,
+                 weight_threshold=0.2, fuel_floors=None, cache_dir=None, profile=False):
+        '''Set up the analysis of many households at once.
+
+        Args:
+            files (str or list): A directory of data files (csv files or Excel workbooks), a glob pattern or a list of
+                                 data file paths.
+
+            workers (int): Number of worker processes. Defaults to the number of CPUs, 1 runs every household in
+                           this process.
+
+            chunksize (int): Number of files sent to a worker process at a time. Defaults to 1.
+
+            temp_threshold, time_between_events, weight_threshold, fuel_floors : Passed to every Household.
+
+            cache_dir (str): Directory of a ConversionCache, so data files are only converted again once they change.
+                             Defaults to no cache.
+
+            profile (bool or str): If True run records the time taken by each stage of every household in timings,
+                                   'memory' records their memory high-water marks as well. Defaults to False.
+
+        Returns:
+            files : The data file paths found
+            workers : Input number of workers
+            chunksize : Input chunk size
+            cache_dir : Input cache directory
+            errors : Why each household that could not be analysed failed, keyed by data file path (filled by run)
+            timings : The time taken by each stage of every household, when profiling (filled by run)
+        '''
+
+        if workers is not None and (type(workers) != int or workers < 1):
+            raise ValueError('The number of workers must be a positive integer!')
+        if type(chunksize) != int or chunksize < 1:
+            raise ValueError('The chunk size must be a positive integer!')
+        if profile not in (True, False, 'memory'):
+            raise ValueError("Profile must be True, False or 'memory'!")
+
+        self.files = find_files(files)
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.chunksize = chunksize
+        self.cache_dir = cache_dir
+        self.thresholds = {'temp_threshold': temp_threshold, 'time_between_events': time_between_events,
+                           'weight_threshold': weight_threshold, 'fuel_floors': fuel_floors}
+        self.profile = profile
+        self.errors = {}
+        self.timings = pd.DataFrame(columns=['file'] + PROFILE_COLUMNS)
+
+    def results(self, figures_dir=None, max_points=None):
+        '''Analyse the households, giving each as soon as it is done, so a slow household does not hold back the ones
+        after it. With more than one worker the households are not in file order.
+
+        Args:
+            figures_dir (str): A directory the stove and fuel figures of every household are written to as HTML pages,
+                               which must hold plotly.min.js (see write_plotlyjs). Defaults to writing no figures.
+
+            max_points (int): The number of points to aim for in each line of the figures. Defaults to every reading.
+
+        Returns:
+            results (generator): (path, usage, error) for every data file, see analyse_file.
+        '''
+
+        return self._map(partial(analyse_file, cache_dir=self.cache_dir, figures_dir=figures_dir,
+                                 max_points=max_points, **self.thresholds), ordered=False)
+
+    def _map(self, function, ordered=True):
+        '''Run a function on every data file across the worker processes, in file order, or as each chunk of files is
+        done when not ordered (internal function).'''
+
+        if self.workers == 1:
+            yield from map(function, self.files)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            if ordered:
+                yield from executor.map(function, self.files, chunksize=self.chunksize)
+                return
+            # as_completed lets go of each future once it is given, so finished results are not kept
+            for future in as_completed([executor.submit(run_files, function, self.files[i:i + self.chunksize])
+                                        for i in range(0, len(self.files), self.chunksize)]):
+                yield from future.result()
+
+    def run(self):
+        '''Analyse every household in the study. Households that fail are recorded in errors and skipped. When
+        profiling, the time taken by each stage of every household is kept in timings.
+
+        Returns:
+            usage (dataframe): The daily usage of every household (see daily_usage), in file order.
+        '''
+
+        self.errors = {}
+        frames = []
+        if self.profile:
+            results = self._map(partial(profile_file, cache_dir=self.cache_dir, memory=self.profile == 'memory',
+                                        **self.thresholds))
+        else:
+            results = (result + (None,) for result in self._map(partial(analyse_file, cache_dir=self.cache_dir,
+                                                                        **self.thresholds)))
+
+        timings = []
+        for path, usage, error, timing in results:
+            if timing is not None:
+                timings.append(timing)
+            if error is not None:
+                self.errors.update({path: error})
+            else:
+                frames.append(usage)
+        if timings:
+            self.timings = pd.concat(timings, ignore_index=True)
+
+        if not frames:
+            return pd.DataFrame(columns=USAGE_COLUMNS[:1] + ['file'] + USAGE_COLUMNS[1:])
+        return pd.concat(frames, ignore_index=True)
+
+    def convert(self):
+        '''Read every data file in the study across the worker processes, such as to convert many Excel workbooks
+        at once. Data files that can not be read are recorded in errors and skipped. With a cache directory the
+        converted data files are also kept in the cache, so they are loaded from it from then on.
+
+        Returns:
+            converted (dict): (df_stoves, stoves, fuels, hh_id) of every data file, keyed by data file path.
+        '''
+
+        self.errors = {}
+        converted = {}
+        for path, data, error in self._map(partial(convert_file, cache_dir=self.cache_dir)):
+            if error is not None:
+                self.errors.update({path: error})
+            else:
+                converted.update({path: data})
+        return converted
+
+    def export_figures(self, directory, fmt='html', max_points=None):
+        '''Write the stove and fuel figures of every household in the study to files, across the worker processes.
+        Households that fail are recorded in errors and skipped.
+
+        Args:
+            directory (str): The directory the figures are written to, created if it does not exist. Every HTML figure
+                             loads the same plotly.min.js file in this directory instead of holding its own copy.
+
+            fmt (str): 'html' for static HTML pages or 'json' for plotly JSON. Defaults to 'html'.
+
+            max_points (int): The number of points to aim for in each line, see Household.plot_stove. Defaults to
+                              every reading.
+
+        Returns:
+            figures (dict): The paths of the stove and fuel figures written, keyed by data file path.
+        '''
+
+        if fmt not in FIGURE_FORMATS:
+            raise ValueError('The figure format must be one of ' + ', '.join(FIGURE_FORMATS) + '!')
+
+        os.makedirs(directory, exist_ok=True)
+        if fmt == 'html':
+            write_plotlyjs(directory)
+
+        self.errors = {}
+        figures = {}
+        export = partial(export_file, directory=directory, fmt=fmt, cache_dir=self.cache_dir, max_points=max_points,
+                         **self.thresholds)
+        for path, written, error in self._map(export):
+            if error is not None:
+                self.errors.update({path: error})
+            else:
+                figures.update({path: written})
+        return figures
+
+    def store_events(self, store, batch_size=100):
+        '''Find the cooking events and fuel weight changes of every household across the worker processes and write
+        them to an event store as they are done, batch_size households to a transaction. Households that fail are
+        recorded in errors and skipped.
+
+        Args:
+            store (object): An events.EventStore.
+
+            batch_size (int): Number of households written in each transaction. Defaults to 100.
+
+        Returns:
+            written (int): The number of households written.
+        '''
+
+        self.errors = {}
+
+        def found():
+            for path, events, error in self._map(partial(events_file, cache_dir=self.cache_dir, **self.thresholds),
+                                                 ordered=False):
+                if error is not None:
+                    self.errors.update({path: error})
+                else:
+                    yield path, events
+
+        return store.write(found(), batch_size=batch_size)
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from .aggregation import daily_cooking_time, daily_fuel_use
+from .detection import (assemble_events, below_threshold_runs, event_boundaries, find_peaks, find_weight_changes,
+                        select_by_distance, weight_blocks)
+
+
+def _check_grid(values, kind, number_type):
+    '''Check a list of threshold values, the same way as the Household thresholds (internal function).'''
+
+    if type(values) != list or not values:
+        raise ValueError('Must put in a list of ' + kind + 's!')
+    for value in values:
+        if type(value) != number_type or value < 0:
+            raise ValueError('Every ' + kind + ' must be a positive ' +
+                             ('integer' if number_type == int else 'number') + '!')
+    return values
+
+
+def stove_peaks(stove_temps, height=None):
+    '''Find every peak in the readings of a stove, whatever the temperature threshold.
+
+    Args:
+        stove_temps (array): Temperature readings for a single stove.
+
+        height (float): Only peaks at or above this are found, such as the lowest temperature threshold swept.
+                        Defaults to every peak.
+
+    Returns:
+        peaks (array): Sorted indices of every local maximum.
+        heights (array): The reading at each peak.
+        order (array): Positions in peaks from the highest peak to the lowest (see select_by_distance).
+    '''
+
+    peaks, _ = find_peaks(stove_temps, height)
+    heights = stove_temps[peaks]
+    return peaks, heights, np.argsort(heights, kind='stable')[::-1]
+
+
+def peaks_above(peaks, heights, order, temp_threshold):
+    '''The peaks of a stove at or above a temperature threshold, as find_peaks(stove_temps, height=temp_threshold)
+    would find them.
+
+    Args:
+        peaks, heights, order : Output of stove_peaks.
+
+        temp_threshold (int): The temperature threshold (degrees).
+
+    Returns:
+        peaks (array): Sorted indices of the peaks at or above the threshold.
+        heights (array): The reading at each of them.
+        order (array): Positions in these peaks from the highest to the lowest.
+    '''
+
+    above = heights >= temp_threshold
+    position = np.cumsum(above) - 1
+    return peaks[above], heights[above], position[order[above[order]]]
+
+
+def threshold_sweep(household, temp_thresholds=None, times_between_events=None, weight_thresholds=None):
+    '''Work out the daily cooking time and fuel use of a household for every combination of thresholds.
+
+    The readings are only read once, and the work that does not depend on a threshold is shared by every combination:
+    the peaks of each stove and their order by height are found once, the runs of readings below each temperature
+    threshold once per threshold, and the block summaries of each fuel's weights once. The results are the same as
+    the household's cooking_duration and fuel_usage with each combination of thresholds set.
+
+    Args:
+        household (object): A Household.
+
+        temp_thresholds (list): Temperature thresholds (degrees, integers). Defaults to the household's.
+
+        times_between_events (list): Times between cooking events (minutes, integers). Defaults to the household's.
+
+        weight_thresholds (list): Weight thresholds (kg, floats). Defaults to the household's.
+
+    Returns:
+        cooking_times (dataframe): Indexed by temperature threshold, time between events and day of study (day 0 is
+                                   the total), with a column per stove of the cooking time (mins) as in
+                                   cooking_duration. Stoves with a cooking event whose start can not be found with a
+                                   combination of thresholds are left missing for it.
+        fuel_use (dataframe): Indexed by weight threshold and day of study (day 0 is the total), with a column per
+                              fuel of the fuel used (kg) as in fuel_usage.
+    '''
+
+    if household.time_based:
+        raise ValueError('Threshold sweeps count readings, so they can not be run on a time based household!')
+    temp_thresholds = _check_grid(temp_thresholds if temp_thresholds is not None else [household.temp_threshold],
+                                  'temperature threshold', int)
+    times_between_events = _check_grid(times_between_events if times_between_events is not None
+                                       else [household.time_between_events], 'time between events', int)
+    weight_thresholds = _check_grid(weight_thresholds if weight_thresholds is not None
+                                    else [household.weight_threshold], 'weight threshold', float)
+
+    timestamps = household._timestamps()
+    study_began = timestamps[0]
+    days = household.study_days
+    # the daily totals always cover at least one day
+    day_index = range(max(days, 1) + 1)
+
+    cooking = np.full((len(temp_thresholds), len(times_between_events), len(day_index), len(household.stoves)),
+                      np.nan)
+    for k, s in enumerate(household.stoves):
+        temps = household._readings(s)
+        all_peaks = stove_peaks(temps, min(temp_thresholds))
+        for i, temp_threshold in enumerate(temp_thresholds):
+            peaks, heights, order = peaks_above(*all_peaks, temp_threshold)
+            run_ends = below_threshold_runs(temps, temp_threshold)
+            for j, time_between_events in enumerate(times_between_events):
+                kept = select_by_distance(peaks, heights, time_between_events, order)
+                starts, ends = event_boundaries(temps, kept, temp_threshold, run_ends)
+                try:
+                    events = np.array(assemble_events(kept, starts, ends, s), dtype=np.int64).reshape(-1, 3)
+                except ValueError:
+                    continue
+                cooking[i, j, :, k] = daily_cooking_time(timestamps[events[:, 1]], timestamps[events[:, 2]],
+                                                         study_began, days).values
+
+    fuel = np.full((len(weight_thresholds), len(day_index), len(household.fuels)), np.nan)
+    for k, f in enumerate(household.fuels):
+        weights = np.ascontiguousarray(household._readings(f), dtype=np.float64)
+        floor = household.fuel_floors.get(f)
+        blocks = weight_blocks(weights[1:-1], floor) if len(weights) > 1 else None
+        for i, weight_threshold in enumerate(weight_thresholds):
+            changes = np.array(find_weight_changes(weights, weight_threshold, floor, blocks), dtype=np.int64)
+            fuel[i, :, k] = daily_fuel_use(timestamps[changes], weights[changes], study_began, days,
+                                           weight_threshold).values
+
+    cooking_times = pd.DataFrame(cooking.reshape(-1, len(household.stoves)),
+                                 index=pd.MultiIndex.from_product([temp_thresholds, times_between_events, day_index],
+                                                                  names=['temp_threshold', 'time_between_events',
+                                                                         'day']),
+                                 columns=[s + '(min)' for s in household.stoves])
+    fuel_use = pd.DataFrame(fuel.reshape(-1, len(household.fuels)),
+                            index=pd.MultiIndex.from_product([weight_thresholds, day_index],
+                                                             names=['weight_threshold', 'day']),
+                            columns=[f + '(kg)' for f in household.fuels])
+    return cooking_times, fuel_use
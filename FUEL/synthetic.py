@@ -0,0 +1,328 @@
+import numpy as np
+import pandas as pd
+
+STOVE_NAMES = ['telia', 'om30', '3stone', 'malgchch']
+FUEL_NAMES = ['lpg', 'charcoal', 'firewood']
+# minutes a stove takes to cool down to the ambient temperature after cooking
+COOLING_MINUTES = 120
+# minutes before the first cooking event can begin, the stoves are cold when the study begins
+COLD_START = 10
+# readings are made up in blocks of this many, each with its own random numbers, so the readings are the same however
+# many are made up at a time
+BLOCK_READINGS = 10080
+
+
+def item_names(names, count, kind):
+    '''Names for a number of stoves or fuels, numbered once the known names run out (internal function).'''
+
+    return [names[i] if i < len(names) else kind + str(i + 1) for i in range(count)]
+
+
+def vendor_timestamps(timestamps, seconds=False):
+    '''Formats timestamps the way the sensor data processing writes them, such as 8/22/2018 20:51.
+
+    Args:
+        timestamps : Datetime index or array
+
+        seconds (bool): If True the seconds are written too, such as 8/22/2018 20:51:30. Defaults to False.
+
+    Returns:
+        strings (list): The formatted timestamps
+    '''
+
+    t = pd.DatetimeIndex(timestamps)
+    if seconds:
+        return [str(m) + '/' + str(d) + '/' + str(y) + ' %02d:%02d:%02d' % (h, mi, se)
+                for m, d, y, h, mi, se in zip(t.month, t.day, t.year, t.hour, t.minute, t.second)]
+    return [str(m) + '/' + str(d) + '/' + str(y) + ' %02d:%02d' % (h, mi)
+            for m, d, y, h, mi in zip(t.month, t.day, t.year, t.hour, t.minute)]
+
+
+class SyntheticStudy:
+
+    def __init__(self, days, stoves=2, fuels=2, interval=60, meals_per_day=2.5, temp_noise=1.0, weight_noise=0.01,
+                 refuel_below=1.0, refuel_amount=10.0, hh_id='synthetic', seed=0, start='2018-08-25 18:00'):
+        '''Make up a study of a household's stoves and fuels for testing the analysis at scale.
+
+        The cooking events and fuel weight changes are decided first and kept as the ground truth. The sensor
+        readings are worked out from them a block at a time, so studies too long to hold in memory can still be
+        written to a data file laid out like the example data files.
+
+        Every cooking event heats a stove up to a peak, holds it there and lets it cool back down, and burns some of
+        one fuel as it begins. A fuel is refilled some time before it would run low.
+
+        Args:
+            days (float): The length of the study (days).
+
+            stoves (int): The number of stoves. Defaults to 2.
+
+            fuels (int): The number of fuels. Defaults to 2.
+
+            interval (int): Seconds between readings, written with the timestamps when under a minute. Defaults to
+                            60.
+
+            meals_per_day (float): The average number of cooking events on each stove each day. Defaults to 2.5.
+
+            temp_noise (float): Standard deviation (degrees) of the temperature sensor noise. Defaults to 1.
+
+            weight_noise (float): Standard deviation (kg) of the weight sensor noise. Defaults to 0.01.
+
+            refuel_below (float): A fuel is refilled before its weight would drop below this (kg). Defaults to 1.
+
+            refuel_amount (float): The weight (kg) of fuel added by a refill. Defaults to 10.
+
+            hh_id (str): The household ID. Defaults to 'synthetic'.
+
+            seed (int): Seed of the random numbers, the same seed always gives the same study. Defaults to 0.
+
+            start (str): The time of the first reading. Defaults to '2018-08-25 18:00'.
+
+        Returns:
+            stoves : The stove names
+            fuels : The fuel names
+            hh_id : Input household ID
+            interval : Input seconds between readings
+            readings : The number of readings in the study
+            timestamps : The time of every reading
+        '''
+
+        if type(interval) != int or interval < 1:
+            raise ValueError('The interval between readings must be a whole number of seconds of at least 1!')
+        if days <= 0:
+            raise ValueError('The study must last longer than 0 days!')
+
+        self.stoves = item_names(STOVE_NAMES, stoves, 'stove')
+        self.fuels = item_names(FUEL_NAMES, fuels, 'fuel')
+        self.hh_id = hh_id
+        self.interval = interval
+        self.temp_noise = temp_noise
+        self.weight_noise = weight_noise
+        self.seed = seed
+        self.readings = int(days * 86400 // interval)
+        self.timestamps = pd.date_range(start, periods=self.readings, freq=str(interval) + 's')
+
+        rng = np.random.default_rng(seed)
+        cold_start = min(-(-COLD_START * 60 // interval), self.readings)
+        self._events = {}
+        for s in self.stoves:
+            count = min(rng.poisson(meals_per_day * days), self.readings - cold_start)
+            self._events.update({s: {'begin': np.sort(rng.choice(np.arange(cold_start, self.readings), count,
+                                                                 replace=False)),
+                                     'length': rng.integers(20, 120, count),
+                                     'peak': rng.uniform(40, 120, count)}})
+
+        meals = np.sort(np.concatenate([self._events[s]['begin'] for s in self.stoves] + [np.array([], dtype=int)]))
+        burnt = rng.integers(0, max(len(self.fuels), 1), len(meals))
+        self._first_weights = {}
+        self._changes = {}
+        for n, f in enumerate(self.fuels):
+            weight = self._first_weights[f] = rng.uniform(8, 15)
+            changes = []
+            previous = 0
+            for i in meals[burnt == n]:
+                used = rng.uniform(0.2, 1.0)
+                if weight - used < refuel_below:
+                    refuel = int(rng.integers(previous + 1, i)) if i > previous + 1 else i
+                    changes.append((refuel, refuel_amount))
+                    weight += refuel_amount
+                changes.append((i, -used))
+                weight -= used
+                previous = i
+            self._changes[f] = np.array(changes, dtype=[('index', np.int64), ('change', np.float64)])
+
+    def cooking_events(self):
+        '''The ground truth cooking events.
+
+        Returns:
+            events (dataframe): A row per cooking event with the stove, the time cooking began, the time it stopped
+                                (before the stove cooled down) and the peak temperature
+        '''
+
+        events = pd.DataFrame({'stove': np.repeat(self.stoves, [len(self._events[s]['begin']) for s in self.stoves]),
+                               'start': self.timestamps[np.concatenate(
+                                   [self._events[s]['begin'] for s in self.stoves] + [np.array([], dtype=int)])]})
+        lengths = np.concatenate([self._events[s]['length'] for s in self.stoves] + [np.array([], dtype=int)])
+        events['end'] = events['start'] + pd.to_timedelta(lengths, unit='min')
+        events['peak_temp'] = np.concatenate([self._events[s]['peak'] for s in self.stoves] + [np.array([])])
+        return events
+
+    def fuel_changes(self):
+        '''The ground truth fuel weight changes.
+
+        Returns:
+            changes (dataframe): A row per change with the fuel, the time of the change, the change in weight (kg,
+                                 negative for fuel used) and whether it was a refill
+        '''
+
+        changes = np.concatenate([self._changes[f] for f in self.fuels] +
+                                 [np.array([], dtype=[('index', np.int64), ('change', np.float64)])])
+        return pd.DataFrame({'fuel': np.repeat(self.fuels, [len(self._changes[f]) for f in self.fuels]),
+                             'timestamp': self.timestamps[changes['index']],
+                             'change': changes['change'],
+                             'refuel': changes['change'] > 0})
+
+    def recall(self, cooking_events):
+        '''Finds how many of the ground truth cooking events were found.
+
+        Args:
+            cooking_events (dict): Cooking events found in the readings of this study, as returned by
+                                   Household.cooking_events.
+
+        Returns:
+            recall (dict): The fraction of each stove's ground truth cooking events that began during a cooking event
+                           that was found
+        '''
+
+        recall = {}
+        for s in self.stoves:
+            begins = self._events[s]['begin']
+            found = np.array(cooking_events[s], dtype=np.int64).reshape(-1, 3)
+            found = found[np.argsort(found[:, 1])]
+            during = np.searchsorted(found[:, 1], begins, side='right') - 1
+            hit = (during >= 0) & (begins <= found[np.maximum(during, 0), 2]) if len(found) else begins < 0
+            recall.update({s: hit.mean() if len(begins) else 1.0})
+        return recall
+
+    def _noise(self, item, first, last):
+        '''Sensor noise of the readings of a stove or fuel from first up to last, a block at a time (internal
+        function).'''
+
+        number = (self.stoves + self.fuels).index(item)
+        blocks = range(first // BLOCK_READINGS, -(-last // BLOCK_READINGS))
+        noise = np.concatenate([np.random.default_rng([self.seed, number, b]).normal(0, 1, BLOCK_READINGS)
+                                for b in blocks] + [np.array([])])
+        return noise[first - blocks.start * BLOCK_READINGS:last - blocks.start * BLOCK_READINGS]
+
+    def _overlapping(self, stove, first, last, minutes):
+        '''Cooking events of a stove lasting the given minutes that overlap readings first to last (internal
+        function).
+
+        Returns:
+            events (array): Event numbers
+            ends (array): The reading each event has ended by
+        '''
+
+        begins = self._events[stove]['begin']
+        ends = begins + -(-minutes * 60 // self.interval)
+        return np.nonzero((begins < last) & (ends > first))[0], ends
+
+    def temperatures(self, stove, first, last):
+        '''Temperatures (degrees) of a stove from reading first up to, but not including, reading last.'''
+
+        temps = np.abs(self._noise(stove, first, last)) * self.temp_noise
+        events = self._events[stove]
+        overlapping, ends = self._overlapping(stove, first, last, events['length'] + COOLING_MINUTES)
+        for e in overlapping:
+            window = np.arange(max(events['begin'][e], first), min(ends[e], last))
+            since = (window - events['begin'][e]) * self.interval / 60
+            heating = np.clip(since / 10, 0, 1)
+            cooling = np.exp(-np.maximum(since - events['length'][e], 0) / 15)
+            temps[window - first] = np.maximum(temps[window - first], np.minimum(heating, cooling) * events['peak'][e])
+        return np.round(temps)
+
+    def usage(self, stove, first, last):
+        '''Whether a stove is cooked on (1) or not (0) from reading first up to, but not including, reading last.'''
+
+        usage = np.zeros(last - first, dtype=np.int64)
+        overlapping, ends = self._overlapping(stove, first, last, self._events[stove]['length'])
+        for e in overlapping:
+            usage[max(self._events[stove]['begin'][e], first) - first:min(ends[e], last) - first] = 1
+        return usage
+
+    def weights(self, fuel, first, last):
+        '''Weights (kg) of a fuel from reading first up to, but not including, reading last.'''
+
+        changes = self._changes[fuel]
+        totals = np.concatenate(([0.0], np.cumsum(changes['change'])))
+        made = np.searchsorted(changes['index'], np.arange(first, last), side='right')
+        return np.round(self._first_weights[fuel] + totals[made] + self._noise(fuel, first, last) * self.weight_noise,
+                        2)
+
+    def chunks(self, chunksize=BLOCK_READINGS):
+        '''Makes up the readings a chunk at a time.
+
+        Args:
+            chunksize (int): The number of readings in each chunk. Defaults to BLOCK_READINGS.
+
+        Returns:
+            chunks (generator): Dataframes of readings formatted as by reformat_example_files, in time order
+        '''
+
+        for first in range(0, self.readings, chunksize):
+            last = min(first + chunksize, self.readings)
+            data = {'timestamp': self.timestamps[first:last]}
+            data.update({s: self.temperatures(s, first, last) for s in self.stoves})
+            data.update({f: self.weights(f, first, last) for f in self.fuels})
+            yield pd.DataFrame(data)
+
+    def to_frame(self):
+        '''Makes up every reading at once.
+
+        Returns:
+            df_stoves : A dataframe containing all study sensor readings and timestamps
+            stoves : A list of all stoves in the study
+            fuels : A list of all fuels in the study
+            hh_id : The household ID
+        '''
+
+        df_stoves = pd.concat(self.chunks(max(self.readings, 1)), ignore_index=True)
+        return df_stoves, list(self.stoves), list(self.fuels), self.hh_id
+
+    def write_csv(self, path, chunksize=BLOCK_READINGS):
+        '''Writes the study to a data file laid out like the example data files, a chunk of readings at a time.
+
+        Args:
+            path (str): The data file path.
+
+            chunksize (int): The number of readings made up and written at a time. Defaults to BLOCK_READINGS.
+        '''
+
+        columns = ['Timestamp']
+        for n, s in enumerate(self.stoves):
+            columns += [s + ' Usage (EXACT ' + str(n + 1) + ')', s + ' Temperature (EXACT ' + str(n + 1) + ')']
+        columns += [f + ' kg (FUEL ' + str(n + 1) + ')' for n, f in enumerate(self.fuels)]
+        times = vendor_timestamps(self.timestamps[[0, -1]], self.interval < 60) if self.readings else ['', '']
+        preamble = [['Household ID:', self.hh_id], ['Total number of stove:', len(self.stoves)],
+                    ['Start time:', times[0]], ['Stop time:', times[1]], ['Total number of logs:', self.readings],
+                    [], ['Stove Name:'] + self.stoves, ['Fuel type:'] + self.fuels, []]
+
+        with open(path, 'w', newline='') as f:
+            for row in preamble:
+                f.write(','.join([str(value) for value in row] + [''] * (len(columns) - len(row))) + '\n')
+            f.write(','.join(columns) + '\n')
+            for first in range(0, self.readings, chunksize):
+                last = min(first + chunksize, self.readings)
+                data = [vendor_timestamps(self.timestamps[first:last], self.interval < 60)]
+                for s in self.stoves:
+                    data += [self.usage(s, first, last), self.temperatures(s, first, last).astype(np.int64)]
+                data += [self.weights(fu, first, last) for fu in self.fuels]
+                pd.DataFrame(dict(zip(columns, data))).to_csv(f, header=False, index=False, float_format='%.2f')
+
+
+def synthetic_household(days, stoves=2, fuels=2, meals_per_day=2.5, seed=0, start='2018-08-25 18:00'):
+    '''Make up a household's sensor readings, one reading a minute, formatted as by reformat_example_files.
+
+    A shortcut for SyntheticStudy(...).to_frame() with the household ID set to the seed.
+
+    Args:
+        days (float): The length of the study (days).
+
+        stoves (int): The number of stoves. Defaults to 2.
+
+        fuels (int): The number of fuels. Defaults to 2.
+
+        meals_per_day (float): The average number of cooking events on each stove each day. Defaults to 2.5.
+
+        seed (int): Seed of the random numbers, the same seed always gives the same readings. Defaults to 0.
+
+        start (str): The time of the first reading. Defaults to '2018-08-25 18:00'.
+
+    Returns:
+        df_stoves : A dataframe containing all study sensor readings and timestamps
+        stoves : A list of all stoves in the study
+        fuels : A list of all fuels in the study
+        hh_id : The household ID
+    '''
+
+    return SyntheticStudy(days, stoves, fuels, meals_per_day=meals_per_day, hh_id=str(seed), seed=seed,
+                          start=start).to_frame()
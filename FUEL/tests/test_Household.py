@@ -1,5 +1,13 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
 from ..household import Household
 from ..example_file_convert import reformat_example_files as reformat
+from ..synthetic import synthetic_household
 
 
 file_paths = ['HH_38_2018-08-26_15-01-40_processed_v3.csv',
@@ -145,3 +153,167 @@ for file in file_paths:
 
         for s in stoves:
             assert s+'(min)' in x.cooking_duration().columns
+
+
+    def test_lazy_household():
+        '''Testing that a lazy household does not analyse anything until it is asked to'''
+
+        lazy = Household(df, stoves, fuels, hh_id, lazy=True)
+        assert not lazy._cache
+        lazy.cooking_duration()
+        assert lazy._cache
+
+
+    def test_cached_results():
+        '''Testing that cached results are the same as the results of a new household'''
+
+        assert x.cooking_events() == Household(df, stoves, fuels, hh_id, lazy=True).cooking_events()
+        assert x.fuel_usage().equals(Household(df, stoves, fuels, hh_id, lazy=True).fuel_usage())
+
+
+    def test_threshold_change_clears_cache():
+        '''Testing that changing a threshold gives the same results as a household made with that threshold'''
+
+        lazy = Household(df, stoves, fuels, hh_id, lazy=True)
+        lazy.cooking_duration()
+        lazy.fuel_usage()
+        lazy.temp_threshold = 20
+        lazy.weight_threshold = 0.5
+        changed = Household(df, stoves, fuels, hh_id, temp_threshold=20, weight_threshold=0.5, lazy=True)
+        assert lazy.cooking_duration().equals(changed.cooking_duration())
+        assert lazy.fuel_usage().equals(changed.fuel_usage())
+
+
+    def test_append():
+        '''Testing that appending readings gives the same results as a household made with all of them'''
+
+        half = len(df) // 2
+        appended = Household(df.iloc[:half].copy(), stoves, fuels, hh_id)
+        appended.append(df.iloc[half:half + 60])
+        appended.append(df.iloc[half + 60:])
+        assert appended.cooking_events() == x.cooking_events()
+        assert appended.cooking_duration().equals(x.cooking_duration())
+        assert appended.fuel_usage().equals(x.fuel_usage())
+
+
+    def test_append_earlier_rows():
+        '''Testing that readings from before the end of the study cannot be appended'''
+
+        lazy = Household(df.iloc[10:].reset_index(drop=True), stoves, fuels, hh_id, lazy=True)
+        with pytest.raises(ValueError):
+            lazy.append(df.iloc[:10])
+
+
+    def test_plots_return_figures():
+        '''Testing that the plots are returned as figures with a line for every stove and fuel'''
+
+        lazy = Household(df, stoves, fuels, hh_id, lazy=True)
+        assert len(lazy.plot_stove().data) == len(stoves)
+        assert len(lazy.plot_fuel(fuel_usage=True).data) == 2 * len(fuels)
+
+
+    def test_compact_household():
+        '''Testing that a household holding compact readings gives the same results, before and after appending'''
+
+        half = len(df) // 2
+        compact = Household(df.iloc[:half], stoves, fuels, hh_id, lazy=True, compact='int16')
+        assert compact.cooking_events() == Household(df.iloc[:half], stoves, fuels, hh_id, lazy=True).cooking_events()
+        compact.append(df.iloc[half:])
+        assert compact.cooking_events() == x.cooking_events()
+        assert compact.cooking_duration().equals(x.cooking_duration())
+        assert compact.fuel_usage().equals(x.fuel_usage())
+        assert compact.df_stoves.equals(x.df_stoves)
+
+
+    def test_no_copy():
+        '''Testing that a household made with copy=False uses the readings of the dataframe without copying them'''
+
+        shared = Household(df, stoves, fuels, hh_id, lazy=True, copy=False)
+        assert np.shares_memory(shared.df_stoves[stoves[0]].values, df[stoves[0]].values)
+        assert not np.shares_memory(x.df_stoves[stoves[0]].values, df[stoves[0]].values)
+        assert shared.cooking_events() == x.cooking_events()
+
+
+    def test_upper_case_labels():
+        '''Testing that column labels and item names are matched whatever their case'''
+
+        upper = Household(df.rename(columns=str.upper), [s.upper() for s in stoves], fuels, hh_id, lazy=True)
+        assert list(upper.df_stoves.columns) == list(df.columns)
+        assert upper.cooking_events() == x.cooking_events()
+
+
+    def test_stoves_found_together():
+        '''Testing that the cooking events of every stove found in one pass are those found one stove at a time'''
+
+        lazy = Household(df, stoves, fuels, hh_id, lazy=True)
+        one_at_a_time = {}
+        for s in lazy.stoves:
+            one_at_a_time.update(lazy.cooking_events(s))
+        assert Household(df, stoves, fuels, hh_id, lazy=True).cooking_events() == one_at_a_time
+
+
+    def test_threads():
+        '''Testing that finding the cooking events and fuel use across threads gives the same results'''
+
+        threaded = Household(df, stoves, fuels, hh_id, lazy=True, threads=4)
+        assert threaded.cooking_duration().equals(x.cooking_duration())
+        assert threaded.cooking_events() == x.cooking_events()
+        assert threaded.fuel_usage().equals(x.fuel_usage())
+        assert threaded.weight_changes == x.weight_changes
+        with pytest.raises(ValueError):
+            Household(df, stoves, fuels, hh_id, lazy=True, threads=0)
+
+
+    def test_time_based():
+        '''Testing that cooking events found from the timestamps of readings a minute apart are the same'''
+
+        timed = Household(df, stoves, fuels, hh_id, lazy=True, time_based=True)
+        assert timed.cooking_events() == x.cooking_events()
+        assert timed.cooking_duration().equals(x.cooking_duration())
+        with pytest.raises(ValueError):
+            Household(df, stoves, fuels, hh_id, lazy=True, time_based=True, max_gap=0)
+
+
+    def test_set_df_stoves():
+        '''Testing that new readings given to df_stoves are analysed instead of the results found before'''
+
+        changed = Household(df, stoves, fuels, hh_id, lazy=True)
+        changed.cooking_events()
+        changed.cooking_duration()
+        half = df.iloc[:len(df) // 2].copy()
+        half[stoves[0]] = 0
+        changed.df_stoves = half
+        short = Household(half, stoves, fuels, hh_id, lazy=True)
+        assert changed.study_duration == short.study_duration and changed.study_days == short.study_days
+        assert changed.cooking_events()[stoves[0]] == []
+        assert changed.cooking_events() == short.cooking_events()
+        assert changed.cooking_duration().equals(short.cooking_duration())
+        assert changed.fuel_usage().equals(short.fuel_usage())
+
+    def test_show_plots():
+        '''Testing that show plots must be True or False'''
+
+        with pytest.raises(ValueError):
+            Household(df, stoves, fuels, hh_id, lazy=True, show_plots='yes')
+
+
+def test_import_without_plotting():
+    '''Testing that the analysis, even of a household that is not lazy, does not import plotly or scipy until a
+    figure is made'''
+
+    code = ("import sys; from FUEL.household import Household; from FUEL.study import Study; "
+            "from FUEL.example_file_convert import reformat_example_files; "
+            "Household(*reformat_example_files('FUEL/data_files/" + file_paths[0] + "')); "
+            "print(sorted({m.split('.')[0] for m in sys.modules} & {'plotly', 'scipy', 'openpyxl'}))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    assert result.stdout.strip().splitlines()[-1] == '[]'
+
+
+def test_plot_many_stoves():
+    '''Testing that more stoves than there are colours can be plotted, the colours being used again'''
+
+    df, stoves, fuels, hh_id = synthetic_household(1, stoves=8, fuels=1)
+    figure = Household(df, stoves, fuels, hh_id, lazy=True).plot_stove(cooking_events=True)
+    colors = [trace.line.color for trace in figure.data if trace.name in stoves]
+    assert len(colors) == 8 and colors[:4] == colors[4:]
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from ..aggregation import daily_cooking_time, daily_fuel_use
+
+
+began = pd.Timestamp('2018-08-25 18:00')
+
+
+def times(*hours):
+    '''Times a number of hours after the study began'''
+
+    return np.array([began + pd.Timedelta(hours=h) for h in hours], dtype='datetime64[ns]')
+
+
+def test_cooking_split_between_days():
+    '''Testing that cooking past the end of a day of study is split between the days'''
+
+    daily = daily_cooking_time(times(1, 23), times(2, 25), began, 3)
+    assert daily.to_dict() == {0: 180.0, 1: 120.0, 2: 60.0, 3: 0.0}
+
+
+def test_cooking_longer_than_a_day():
+    '''Testing that cooking lasting more than 24 hours keeps every minute'''
+
+    daily = daily_cooking_time(times(12), times(60), began, 3)
+    assert daily.to_dict() == {0: 2880.0, 1: 720.0, 2: 1440.0, 3: 720.0}
+
+
+def test_cooking_after_last_day():
+    '''Testing that cooking after the study duration was rounded down is counted in the last day'''
+
+    daily = daily_cooking_time(times(49, 70), times(50, 71), began, 2)
+    assert daily.to_dict() == {0: 120.0, 1: 0.0, 2: 120.0}
+
+
+def test_no_cooking():
+    '''Testing that a stove with no cooking events has no cooking on any day'''
+
+    daily = daily_cooking_time(times(), times(), began, 2)
+    assert daily.to_dict() == {0: 0.0, 1: 0.0, 2: 0.0}
+
+
+def test_fuel_use():
+    '''Testing that drops in weight are counted on the day of the change and additions are ignored'''
+
+    daily = daily_fuel_use(times(0, 5, 10, 30, 50, 70), [10.0, 9.0, 12.0, 11.5, 11.4, 10.4], began, 3, 0.2)
+    assert list(daily.round(6)) == [2.5, 1.0, 0.5, 1.0]
+
+
+def test_fuel_use_no_changes():
+    '''Testing that a fuel with no weight changes has no fuel used on any day'''
+
+    daily = daily_fuel_use(times(), [], began, 2, 0.2)
+    assert daily.to_dict() == {0: 0.0, 1: 0.0, 2: 0.0}
+
+
+def test_single_day():
+    '''Testing that a study of a single day, or of less than a day, has the day's usage as its total'''
+
+    for study_days in (1, 0):
+        daily = daily_cooking_time(times(1, 20), times(2, 22), began, study_days)
+        assert daily.to_dict() == {0: 180.0, 1: 180.0}
+        daily = daily_fuel_use(times(0, 5, 10), [10.0, 9.0, 8.5], began, study_days, 0.2)
+        assert list(daily.round(6)) == [1.5, 1.5]
@@ -0,0 +1,97 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .. import cache as cache_module
+from ..cache import ConversionCache
+from ..example_file_convert import reformat_example_files
+from ..household import Household
+
+source = 'FUEL/data_files/HH_38_2018-08-26_15-01-40_processed_v3.csv'
+
+
+def copy_source(tmp_path, name='hh.csv'):
+    path = str(tmp_path / name)
+    shutil.copy(source, path)
+    return path
+
+
+def test_cache_round_trip(tmp_path):
+    '''Testing that cached data is loaded exactly as it was converted'''
+
+    path = copy_source(tmp_path)
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    assert cache.load(path) is None
+
+    df, stoves, fuels, hh_id = reformat_example_files(path, cache=cache)
+    cached_df, cached_stoves, cached_fuels, cached_hh_id = cache.load(path)
+
+    pd.testing.assert_frame_equal(df, cached_df, check_exact=True)
+    assert (stoves, fuels, hh_id) == (cached_stoves, cached_fuels, cached_hh_id)
+
+
+def test_cache_not_copied(tmp_path):
+    '''Testing that cached readings are loaded as read-only views of the cache file, and can still be analysed'''
+
+    path = copy_source(tmp_path)
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    df, stoves, fuels, hh_id = reformat_example_files(path, fast=True, cache=cache)
+    cached_df = cache.load(path)[0]
+
+    assert not any(cached_df[c].values.flags.writeable for c in cached_df.columns)
+    x = Household(cached_df, stoves, fuels, hh_id, lazy=True, copy=False)
+    assert np.shares_memory(x.df_stoves[stoves[0]].values, cached_df[stoves[0]].values)
+    assert x.cooking_events() == Household(df, stoves, fuels, hh_id, lazy=True).cooking_events()
+    x.append(df.iloc[-1:].assign(timestamp=df['timestamp'].iloc[-1] + pd.Timedelta(minutes=1)))
+    assert len(x.df_stoves) == len(df) + 1
+
+def test_cache_changed_file(tmp_path):
+    '''Testing that a changed data file is converted again, while a touched but unchanged one is not'''
+
+    path = copy_source(tmp_path)
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    reformat_example_files(path, fast=True, cache=cache)
+
+    os.utime(path, ns=(0, 0))
+    assert cache.load(path) is not None
+
+    with open(path, 'a') as f:
+        f.write('8/26/2018 14:57,0,5.28,0,1.51,9.52,0,0,0,0\n')
+    assert cache.load(path) is None
+    assert len(reformat_example_files(path, fast=True, cache=cache)[0]) == len(cache.load(path)[0])
+
+
+def test_cache_converter_version(tmp_path, monkeypatch):
+    '''Testing that data converted by another converter version is not used'''
+
+    path = copy_source(tmp_path)
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    reformat_example_files(path, fast=True, cache=cache)
+
+    monkeypatch.setattr(cache_module, 'CONVERTER_VERSION', cache_module.CONVERTER_VERSION + 1)
+    assert cache.load(path) is None
+
+
+def test_cache_eviction(tmp_path):
+    '''Testing that the least recently used entries are removed once the cache is too large'''
+
+    paths = [copy_source(tmp_path, name) for name in ('a.csv', 'b.csv', 'c.csv')]
+    cache = ConversionCache(str(tmp_path / 'cache'))
+    for path in paths[:2]:
+        reformat_example_files(path, fast=True, cache=cache)
+    entry_size = cache.size() // 2
+
+    os.utime(cache._entry(paths[0])[1], (1, 1))
+    os.utime(cache._entry(paths[1])[1], (2, 2))
+    assert cache.load(paths[0]) is not None
+
+    cache.max_size = 2 * entry_size
+    reformat_example_files(paths[2], fast=True, cache=cache)
+    assert cache.load(paths[1]) is None
+    assert cache.load(paths[0]) is not None
+    assert cache.load(paths[2]) is not None
+
+    cache.clear()
+    assert cache.size() == 0
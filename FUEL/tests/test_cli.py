@@ -0,0 +1,51 @@
+import os
+
+from ..cli import main
+from ..results import read_results
+from ..study import Study
+
+
+def test_main(tmp_path, capsys):
+    '''Testing that the command line gives the same results as a Study, and a resumed run only adds the rest'''
+
+    output = str(tmp_path / 'usage.jsonl')
+    assert main(['FUEL/data_files/HH_38_*.csv', '-o', output, '-w', '1']) == 0
+    assert sorted(os.listdir(tmp_path / 'figures')) == ['HH_38_2018-08-26_15-01-40_processed_v3_fuel.html',
+                                                        'HH_38_2018-08-26_15-01-40_processed_v3_stove.html',
+                                                        'plotly.min.js']
+
+    assert main(['FUEL/data_files/HH_3*.csv', 'FUEL/data_files/HH_38_*.csv', '-o', output, '-w', '2',
+                 '--no-plots', '--resume']) == 0
+    assert capsys.readouterr().out.splitlines()[-1] == '5 households analysed, 0 failed, 1 already in ' + output
+
+    expected = Study('FUEL/data_files/HH_3*.csv', workers=1).run()
+    results = read_results(output).astype({'hh_id': str})
+    assert set(results['file']) == set(expected['file'])
+    merged = results.merge(expected, on=['file', 'day', 'type', 'item'])
+    assert len(merged) == len(expected) == len(results)
+    assert (merged['usage_x'] - merged['usage_y']).abs().max() < 1e-9
+
+
+def test_main_errors(tmp_path):
+    '''Testing that a household that can not be analysed makes the command fail without stopping the others'''
+
+    bad_file = tmp_path / 'bad.csv'
+    bad_file.write_text('not,a,sensor,file\n1,2,3,4\n')
+    output = str(tmp_path / 'usage.csv')
+    assert main([str(bad_file), 'FUEL/data_files/HH_38_*.csv', '-o', output, '-w', '1', '--no-plots']) == 1
+    assert set(read_results(output)['file']) == {'FUEL/data_files/HH_38_2018-08-26_15-01-40_processed_v3.csv'}
+
+
+def test_main_thresholds(tmp_path):
+    '''Testing that the threshold flags are passed on to every household'''
+
+    output = str(tmp_path / 'usage.csv')
+    assert main(['FUEL/data_files/HH_38_*.csv', '-o', output, '-w', '1', '--no-plots', '--temp-threshold', '20',
+                 '--time-between-events', '90', '--weight-threshold', '0.5']) == 0
+
+    expected = Study('FUEL/data_files/HH_38_*.csv', workers=1, temp_threshold=20, time_between_events=90,
+                     weight_threshold=0.5).run()
+    results = read_results(output)
+    assert len(results) == len(expected)
+    assert (results['usage'] - expected['usage']).abs().max() < 1e-9
+    assert not Study('FUEL/data_files/HH_38_*.csv', workers=1).run()['usage'].equals(expected['usage'])
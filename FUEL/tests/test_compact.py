@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..compact import CompactReadings
+
+
+df = pd.DataFrame({'timestamp': pd.date_range('2018-08-25 18:00', periods=5, freq='min'),
+                   'telia': [20.0, 35.5, np.nan, 120.0, 20.0],
+                   'lpg': [12.34, 12.30, 12.30, np.nan, -0.04]})
+
+
+def test_round_trip():
+    '''Testing that the readings come back exactly as they went in, missing readings included'''
+
+    for dtype in ('int16', 'float32'):
+        compact = CompactReadings(df, ['telia'], ['lpg'], dtype)
+        assert compact.to_frame().equals(df)
+        assert compact.values.shape == (2, 5) and compact.values.dtype == dtype
+        assert compact.timestamps.dtype == np.int32
+
+
+def test_append():
+    '''Testing that appended readings come after the readings already held'''
+
+    compact = CompactReadings(df.iloc[:2], ['telia'], ['lpg'])
+    compact.append(df.iloc[2:])
+    assert len(compact) == 5
+    assert compact.to_frame().equals(df)
+
+
+def test_too_many_decimals():
+    '''Testing that readings that would be rounded are not accepted'''
+
+    rounded = df.assign(lpg=[12.345, 12.3, 12.3, 12.3, 12.3])
+    with pytest.raises(ValueError):
+        CompactReadings(rounded, ['telia'], ['lpg'])
+
+
+def test_too_large_for_int16():
+    '''Testing that readings too large for int16 are not accepted, but fit in float32'''
+
+    large = df.assign(lpg=[400.0] * 5)
+    with pytest.raises(ValueError):
+        CompactReadings(large, ['telia'], ['lpg'])
+    assert CompactReadings(large, ['telia'], ['lpg'], 'float32').to_frame().equals(large)
+
+
+def test_whole_minutes():
+    '''Testing that timestamps between whole minutes are not accepted'''
+
+    with pytest.raises(ValueError):
+        CompactReadings(df.assign(timestamp=df['timestamp'] + pd.Timedelta(seconds=30)), ['telia'], ['lpg'])
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..detection import assemble_events, below_threshold_runs, event_boundaries, extend_cooking_events, \
+    extend_weight_changes, find_cooking_events, find_peaks, find_segments, find_weight_changes, select_by_distance, \
+    stove_matrix_boundaries, timed_cooking_events
+
+
+temps = np.array([0, 0, 0, 0, 0, 0, 0, 0, 20, 30, 20, 0, 0, 0, 0, 0, 0, 0, 0, 0, 25, 0, 0, 0, 0, 0, 0, 0])
+
+
+def test_find_peaks():
+    '''Testing that the peaks are the ones scipy finds, with plateaus, missing readings and a height'''
+
+    signal = pytest.importorskip('scipy.signal')
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        readings = rng.integers(0, 4, rng.integers(0, 30)).astype(float)
+        readings[rng.random(len(readings)) < 0.1] = np.nan
+        for height in (None, 2):
+            peaks, properties = find_peaks(readings, height=height)
+            expected, expected_properties = signal.find_peaks(readings, height=height)
+            assert np.array_equal(peaks, expected)
+            if height is not None:
+                assert np.array_equal(properties['peak_heights'], expected_properties['peak_heights'])
+
+    assert list(find_peaks([0, 20, 20, 20, 20, 0, 5, 5, 9])[0]) == [2]
+
+
+def test_below_threshold_runs():
+    '''Testing that a run is only recorded once five readings in a row are below the threshold'''
+
+    runs = below_threshold_runs(temps, 15)
+    assert list(runs) == [4, 5, 6, 7, 15, 16, 17, 18, 19, 25, 26, 27]
+
+
+def test_event_boundaries():
+    '''Testing the start and end of cooking found around each peak'''
+
+    starts, ends = event_boundaries(temps, [9, 20], 15)
+    assert list(starts) == [4, 16]
+    assert list(ends) == [15, 25]
+
+
+def test_event_boundaries_no_start():
+    '''Testing that a peak with no below threshold readings before it is marked as having no start'''
+
+    starts, ends = event_boundaries(temps[5:], [4], 15)
+    assert list(starts) == [-1]
+
+
+def test_find_cooking_events():
+    '''Testing that events closer than the time between events are merged into the highest peak'''
+
+    assert find_cooking_events(temps, 15, 1) == [[9, 4, 15], [20, 16, 25]]
+    assert find_cooking_events(temps, 15, 12) == [[9, 4, 15]]
+
+
+
+def test_stove_matrix_boundaries():
+    '''Testing that the events of several stoves found at once are the events found for each stove on its own'''
+
+    rng = np.random.default_rng(0)
+    rows = [temps, temps[::-1], np.roll(temps, 5), np.where(temps > 25, np.nan, temps)]
+    for _ in range(4):
+        row = np.round(rng.random(len(temps)) * 40) * (rng.random(len(temps)) < 0.2)
+        row[:6] = 0
+        rows.append(row)
+    for time_between_events in (1, 3, 12):
+        boundaries = stove_matrix_boundaries(rows, 15, time_between_events)
+        assert len(boundaries) == len(rows)
+        for row, (peaks, starts, ends) in zip(rows, boundaries):
+            try:
+                expected = find_cooking_events(row, 15, time_between_events)
+            except ValueError:
+                with pytest.raises(ValueError):
+                    assemble_events(peaks, starts, ends)
+                continue
+            assert assemble_events(peaks, starts, ends) == expected
+
+
+minutes = pd.Timestamp('2018-08-25') + pd.to_timedelta(np.arange(len(temps)), 'm')
+
+
+def test_timed_cooking_events():
+    '''Testing that events found from the time of each reading are the same for readings a minute or 20 seconds apart'''
+
+    assert timed_cooking_events(temps, minutes, 15, 60) == find_cooking_events(temps, 15, 1)
+    assert timed_cooking_events(temps, minutes, 15, 720) == find_cooking_events(temps, 15, 12)
+
+    # every reading three times, 20 seconds apart
+    seconds = pd.Timestamp('2018-08-25') + pd.to_timedelta(np.arange(3 * len(temps)) * 20, 's')
+    assert timed_cooking_events(np.repeat(temps, 3), seconds, 15, 60) == [[28, 12, 45], [61, 48, 75]]
+
+
+def test_timed_cooking_events_gaps():
+    '''Testing that no cooking event is found across a gap in the readings or across missing readings'''
+
+    gap = minutes.values.copy()
+    gap[13:] += np.timedelta64(2, 'h')
+    assert [list(segments) for segments in find_segments(gap)] == [[0, 13], [12, 27]]
+    assert timed_cooking_events(temps, gap, 15, 60) == [[9, 4, 12], [20, 16, 25]]
+
+    missing = temps.astype(np.float64)
+    missing[12:18] = np.nan
+    assert timed_cooking_events(missing, minutes, 15, 60, max_gap=300) == [[9, 4, 11], [20, 18, 25]]
+
+    # cooking under way when the readings begin starts at the first reading
+    assert timed_cooking_events(temps[5:], minutes[5:], 15, 60) == [[4, 0, 10], [15, 11, 20]]
+
+
+weights = np.array([10.0, 10.0, 10.1, 9.5, 9.5, 9.5, 12.0, 9.5, 9.5, 9.4, 3.0, 3.0, 9.0, 9.0, 8.0])
+
+
+def test_find_weight_changes():
+    '''Testing that drops are marked and a single reading spike is ignored'''
+
+    assert find_weight_changes(weights, 0.2) == [3, 10, 12]
+
+
+def test_find_weight_changes_floor():
+    '''Testing that readings below the floor are ignored'''
+
+    assert find_weight_changes(weights, 0.2, floor=5) == [3, 12]
+
+
+def test_find_weight_changes_blocks():
+    '''Testing changes spread over many blocks of readings, where the spike now lasts long enough to be kept'''
+
+    long_weights = np.repeat(weights, 100)
+    assert find_weight_changes(long_weights, 0.2) == [300, 600, 700, 1000, 1200, 1400]
+    assert find_weight_changes(long_weights, 0.2, floor=5) == [300, 600, 700, 1200, 1400]
+
+
+def test_find_weight_changes_skip_missing():
+    '''Testing that missing readings left out give the changes of the readings that are not missing'''
+
+    missing = np.insert(weights, [3, 3, 8], np.nan)
+    present = np.flatnonzero(~np.isnan(missing))
+    expected = present[find_weight_changes(weights, 0.2)].tolist()
+    assert find_weight_changes(missing, 0.2, skip_missing=True) == expected
+
+
+
+def test_select_by_distance_ties():
+    '''Testing that of two equal peaks closer than the distance the later one is kept'''
+
+    peaks, properties = find_peaks(np.array([0, 40, 0, 0, 40, 0, 0, 0, 0, 20, 0]), height=15)
+    assert list(select_by_distance(peaks, properties['peak_heights'], 4)) == [4, 9]
+
+
+def test_extend_cooking_events():
+    '''Testing that events found in part of the readings are extended to the same events as all of the readings'''
+
+    long_temps = np.tile(temps, 5)
+    for length in range(len(temps), len(long_temps)):
+        events = find_cooking_events(long_temps[:length], 15, 1)
+        assert extend_cooking_events(long_temps, 15, 1, events, length) == find_cooking_events(long_temps, 15, 1)
+
+
+def test_extend_weight_changes():
+    '''Testing that weight changes found in part of the readings are extended to the same changes as all of them'''
+
+    for length in range(2, len(weights)):
+        changes = find_weight_changes(weights[:length], 0.2)
+        assert extend_weight_changes(weights, 0.2, changes, length) == find_weight_changes(weights, 0.2)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from ..downsample import downsample_indices, lttb_indices, min_max_indices
+from ..household import Household, WEBGL_THRESHOLD
+from ..example_file_convert import reformat_example_files as reformat
+
+
+readings = np.sin(np.arange(10000) / 50) * 20
+readings[1234] = 500
+
+
+def test_min_max_keeps_spikes():
+    '''Testing that the highest and lowest readings and both ends are always kept'''
+
+    indices = min_max_indices(readings, 100)
+    assert len(indices) <= 102
+    for i in (0, len(readings) - 1, 1234, int(np.argmin(readings))):
+        assert i in indices
+
+
+def test_lttb_size():
+    '''Testing that the largest triangle three buckets method keeps exactly the number of points asked for'''
+
+    indices = lttb_indices(readings, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == len(readings) - 1
+    assert 1234 in indices
+
+
+def test_short_readings_kept():
+    '''Testing that readings shorter than the number of points are not downsampled'''
+
+    assert list(downsample_indices(readings[:50], 100)) == list(range(50))
+    assert list(downsample_indices(readings[:50], 100, 'lttb')) == list(range(50))
+
+
+def test_missing_readings():
+    '''Testing that missing readings are only kept where there is nothing else to plot'''
+
+    gaps = readings.copy()
+    gaps[:500] = np.nan
+    indices = min_max_indices(gaps, 100)
+    assert not np.isnan(gaps[indices[indices >= 400]]).any()
+    assert np.isnan(gaps[indices[indices < 400]]).all()
+    assert len(lttb_indices(gaps, 100)) == 100
+
+
+def test_keep_indices():
+    '''Testing that the readings asked to be kept are always kept'''
+
+    keep = [3, 4001, 4002, 9998]
+    for method in ('minmax', 'lttb'):
+        assert set(keep) <= set(downsample_indices(readings, 50, method, keep=keep))
+
+
+def test_bad_inputs():
+    '''Testing the number of points and the method are checked'''
+
+    with pytest.raises(ValueError):
+        downsample_indices(readings, 1)
+    with pytest.raises(ValueError):
+        downsample_indices(readings, 100, 'average')
+
+
+def test_line_trace():
+    '''Testing that long traces are downsampled, keep the cooking events and are drawn with WebGL when large'''
+
+    df, stoves, fuels, hh_id = reformat('FUEL/data_files/HH_319_2018-08-25_19-27-32_processed_v2.csv')
+    x = Household(df, stoves, fuels, hh_id, lazy=True)
+    events = [i for event in x.cooking_events(stoves[0])[stoves[0]] for i in event]
+
+    full = x._line_trace(stoves[0], None, 'minmax', events)
+    assert len(full.y) == len(df)
+    assert full.type == ('scattergl' if len(df) > WEBGL_THRESHOLD else 'scatter')
+
+    small = x._line_trace(stoves[0], 500, 'minmax', events)
+    assert small.type == 'scatter'
+    assert len(small.y) <= 502 + len(events)
+    plotted = set(np.asarray(small.x, dtype='datetime64[ns]'))
+    for i in events:
+        assert df['timestamp'].values[i] in plotted
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from ..events import EventStore, household_events
+from ..household import Household
+from ..study import Study
+from ..synthetic import synthetic_household
+
+
+df, stoves, fuels, hh_id = synthetic_household(30, stoves=2, fuels=2, seed=2)
+x = Household(df, stoves, fuels, hh_id, lazy=True)
+
+
+def test_household_events():
+    '''Testing that the stored cooking events and fuel changes are the ones found by the household'''
+
+    store = EventStore(':memory:')
+    store.add(x, 'synthetic.csv')
+    timestamps = df['timestamp']
+
+    events = store.cooking_events()
+    assert len(events) == sum(len(e) for e in x.cooking_events().values())
+    for s, found in x.cooking_events().items():
+        stored = events[events['stove'] == s]
+        assert list(stored['start_time']) == [timestamps[start] for _, start, _ in found]
+        assert np.allclose(stored['minutes'], [(timestamps[end] - timestamps[start]).total_seconds() / 60
+                                               for _, start, end in found])
+
+    changes = store.fuel_changes()
+    for f in fuels:
+        stored = changes[changes['fuel'] == f]
+        assert list(stored['time']) == list(timestamps[x._find_weight_changes(f)])
+        assert np.allclose(stored['weight_change'].iloc[1:], np.diff(stored['weight']))
+        # fuel used is the drops of at least the weight threshold
+        assert np.isclose(-stored['weight_change'][stored['weight_change'] <= -x.weight_threshold].sum(),
+                          x.fuel_usage(f).loc[0].iloc[0])
+
+
+def test_queries():
+    '''Testing the cooking event and fuel change filters and the weekly refill counts'''
+
+    store = EventStore(':memory:')
+    store.write([('a.csv', household_events(x)), ('b.csv', dict(household_events(x), hh_id='other'))],
+                batch_size=1)
+    assert list(store.households()['hh_id']) == [hh_id, 'other']
+
+    events = store.cooking_events()
+    start, end = events['start_time'].iloc[10], events['start_time'].iloc[40]
+    found = store.cooking_events(stove=stoves[0], hh_id='other', start=start, end=end, min_minutes=60)
+    expected = events[(events['stove'] == stoves[0]) & (events['hh_id'] == 'other') & (events['start_time'] >= start)
+                      & (events['start_time'] < end) & (events['minutes'] >= 60)]
+    assert len(found) and found.equals(expected.reset_index(drop=True))
+
+    refills = store.fuel_changes(fuel=fuels[0], hh_id=hh_id, min_change=x.weight_threshold)
+    weekly = store.weekly_refills(fuels[0])
+    assert (weekly['week'].dt.dayofweek == 0).all()
+    assert weekly[weekly['hh_id'] == hh_id]['refills'].sum() == len(refills) > 0
+    weeks = refills['time'].dt.to_period('W').dt.start_time
+    assert list(weekly[weekly['hh_id'] == hh_id]['week']) == sorted(set(weeks))
+
+
+def test_replace_and_reopen(tmp_path):
+    '''Testing that adding a data file again replaces its events, and the events are kept in the database file'''
+
+    path = str(tmp_path / 'events.sqlite')
+    with EventStore(path) as store:
+        store.add(x, 'synthetic.csv')
+        count = len(store.cooking_events())
+        store.add(Household(df, stoves, fuels, hh_id, time_between_events=240, lazy=True), 'synthetic.csv')
+        assert len(store.cooking_events()) < count
+
+    with EventStore(path) as store:
+        assert list(store.households()['time_between_events']) == [240]
+        merged = Household(df, stoves, fuels, hh_id, time_between_events=240, lazy=True)
+        assert len(store.cooking_events()) == sum(len(e) for e in merged.cooking_events().values())
+
+    with pytest.raises(ValueError):
+        EventStore(tmp_path)
+    with pytest.raises(ValueError):
+        EventStore(path).write([], batch_size=0)
+
+
+def test_study_store_events(tmp_path):
+    '''Testing that a study writes the events of every household, skipping households that can not be analysed'''
+
+    bad_file = tmp_path / 'bad.csv'
+    bad_file.write_text('not,a,sensor,file\n1,2,3,4\n')
+    study = Study(['FUEL/data_files/HH_38_2018-08-26_15-01-40_processed_v3.csv',
+                   'FUEL/data_files/HH_319_2018-08-25_19-27-32_processed_v2.csv', str(bad_file)], workers=2)
+    store = EventStore(':memory:')
+
+    assert study.store_events(store, batch_size=1) == 2
+    assert list(study.errors) == [str(bad_file)]
+    assert set(store.households()['hh_id']) == {'38', '319'}
+    usage = study.run()
+    stove_minutes = usage[usage['type'] == 'stove'].groupby('hh_id')['usage'].sum()
+    stored_minutes = store.cooking_events().groupby('hh_id')['minutes'].sum()
+    assert np.allclose(stove_minutes.sort_index(), stored_minutes.reindex(stove_minutes.index).fillna(0).sort_index())
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..example_file_convert import (column_names, lower_case, read_example_file, read_example_workbook,
+                                   reformat_example_files)
+
+
+def test_column_names():
+    '''Testing that usage columns are left out and stoves and fuels are renamed'''
+
+    names, stoves, fuels = column_names(['timestamp', '3pierres usage (exact 287)', '3 pierre temperature (exact 224)',
+                                         'lpg kg (fuel 845)'])
+    assert names == ['timestamp', None, '3stone', 'lpg']
+    assert stoves == ['3stone']
+    assert fuels == ['lpg']
+
+
+@pytest.mark.parametrize('file', ['HH_38_2018-08-26_15-01-40_processed_v3.csv',
+                                  'HH_319_2018-08-25_19-27-32_processed_v2.csv', 'test_datetime.csv'])
+def test_fast_matches_reformat(file):
+    '''Testing that the fast reader gives exactly the same data, including files with other timestamp formats'''
+
+    df, stoves, fuels, hh_id = reformat_example_files('FUEL/data_files/' + file)
+    fast_df, fast_stoves, fast_fuels, fast_hh_id = reformat_example_files('FUEL/data_files/' + file, fast=True)
+
+    pd.testing.assert_frame_equal(df, fast_df, check_exact=True)
+    assert (stoves, fuels, hh_id) == (fast_stoves, fast_fuels, fast_hh_id)
+
+
+def test_fast_float32():
+    '''Testing that sensor values can be read as float32'''
+
+    df = read_example_file('FUEL/data_files/HH_38_2018-08-26_15-01-40_processed_v3.csv', dtype=np.float32)[0]
+    assert (df.dtypes.drop('timestamp') == np.float32).all()
+    assert df['timestamp'].dtype == 'datetime64[ns]'
+
+
+def test_fast_no_timestamp(tmp_path):
+    '''Testing that a file with no timestamp column is rejected'''
+
+    bad_file = tmp_path / 'bad.csv'
+    bad_file.write_text('Household ID:,1\ntime,stove Temperature\n1,2\n')
+    with pytest.raises(ImportError):
+        read_example_file(str(bad_file))
+
+
+def test_no_fill(tmp_path):
+    '''Testing that missing readings are only left missing when asked'''
+
+    datafile = tmp_path / 'gaps.csv'
+    datafile.write_text('Household ID:,7\nTimestamp,telia Temperature (EXACT 1)\n8/22/2018 20:51,30\n'
+                        '8/22/2018 20:52,\n8/22/2018 20:53,25\n')
+    assert list(reformat_example_files(str(datafile))[0]['telia']) == [30, 30, 25]
+    assert np.isnan(reformat_example_files(str(datafile), fill=False)[0]['telia'][1])
+    with pytest.raises(ValueError):
+        reformat_example_files(str(datafile), fill=False, cache=object())
+
+
+def test_lower_case():
+    '''Testing that only strings are converted to lower case and columns without strings are not copied'''
+
+    data = pd.DataFrame({0: ['Household ID:', 'HH_1', np.nan, 5], 1: [1.5, 2.5, np.nan, 4.0]})
+    lowered = lower_case(data)
+    assert list(lowered[0]) == ['household id:', 'hh_1', lowered[0][2], 5]
+    assert np.isnan(lowered[0][2])
+    assert data[0][0] == 'Household ID:'
+    assert np.shares_memory(lowered[1].values, data[1].values)
+
+
+@pytest.mark.parametrize('file', ['HH_38_2018-08-26_15-01-40_processed_v3', 'HH_371_2018-08-17_15-31-52_processed_v2',
+                                  'HH_141_2018-08-17_17-50-31_processed_v2'])
+def test_workbook_matches_csv(file):
+    '''Testing that an original Excel workbook gives the same data as the csv file saved from it'''
+
+    pytest.importorskip('openpyxl')
+    df, stoves, fuels, hh_id = reformat_example_files('FUEL/data_files/Originals/' + file + '.xlsx')
+    csv_df, csv_stoves, csv_fuels, csv_hh_id = reformat_example_files('FUEL/data_files/' + file + '.csv', fast=True)
+
+    pd.testing.assert_frame_equal(df, csv_df, check_exact=True)
+    assert (stoves, fuels, hh_id) == (csv_stoves, csv_fuels, csv_hh_id)
+
+
+def test_workbook_text_timestamps(tmp_path):
+    '''Testing a workbook with timestamps saved as text, another sheet and missing readings'''
+
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    workbook.active.title = 'notes'
+    sheet = workbook.create_sheet('data')
+    for row in [['Household ID:', 7.0], [], ['Timestamp', 'Telia Usage (EXACT 1)', 'Telia Temperature (EXACT 1)',
+                                             'LPG kg (FUEL 2)'],
+                ['8/22/2018 20:51', 0, 20, 12.5], ['8/22/2018 20:52', 1, 35, None], [None, None, None, None]]:
+        sheet.append(row)
+    path = str(tmp_path / 'hh.xlsx')
+    workbook.save(path)
+
+    df, stoves, fuels, hh_id = read_example_workbook(path, sheet='data')
+    assert (stoves, fuels, hh_id) == (['telia'], ['lpg'], '7')
+    assert list(df.columns) == ['timestamp', 'telia', 'lpg']
+    assert list(df['timestamp']) == [pd.Timestamp('2018-08-22 20:51'), pd.Timestamp('2018-08-22 20:52')]
+    assert list(df['lpg']) == [12.5, 12.5]
+    with pytest.raises(ImportError):
+        read_example_workbook(path)
@@ -0,0 +1,77 @@
+import numpy as np
+
+from ..household import Household
+from ..profiling import NULL_PROFILER, PROFILE_COLUMNS, Profiler
+from ..synthetic import synthetic_household
+
+
+def test_stages():
+    '''Testing that every stage of the analysis is recorded, and only the first time it runs'''
+
+    records = []
+    profiler = Profiler(callback=records.append)
+    df, stoves, fuels, hh_id = synthetic_household(3)
+    x = Household(df, stoves, fuels, hh_id, lazy=True, profiler=profiler)
+    x.cooking_duration()
+    x.fuel_usage()
+    x.cooking_events()
+
+    report = profiler.report()
+    assert list(report.columns) == PROFILE_COLUMNS
+    assert records == profiler.records
+    for stage in ('cooking_events', 'cooking_duration'):
+        assert sorted(report.loc[report['stage'] == stage, 'item']) == sorted(stoves)
+    # the events of every stove are found in one pass
+    for stage in ('find_peaks', 'select_by_distance', 'event_boundaries'):
+        assert list(report.loc[report['stage'] == stage, 'item']) == [', '.join(stoves)]
+    for stage in ('weight_changes', 'fuel_usage'):
+        assert sorted(report.loc[report['stage'] == stage, 'item']) == sorted(fuels)
+    assert (report['seconds'] >= 0).all()
+    assert report['memory'].isna().all()
+
+    events = report[report['stage'] == 'cooking_events'].set_index('item')
+    for s in stoves:
+        assert events.loc[s, 'rows'] == len(df)
+        assert events.loc[s, 'found'] == len(x.cooking_events(s)[s])
+
+
+def test_plot_stages():
+    '''Testing that the plots and each line in them are recorded'''
+
+    profiler = Profiler()
+    df, stoves, fuels, hh_id = synthetic_household(1)
+    x = Household(df, stoves, fuels, hh_id, lazy=True, profiler=profiler)
+    x.plot_stove(max_points=100)
+    x.plot_fuel()
+
+    report = profiler.report()
+    assert list(report['stage']) == ['line_trace', 'line_trace', 'plot_stove', 'line_trace', 'line_trace', 'plot_fuel']
+    lines = report[report['stage'] == 'line_trace']
+    assert (lines['rows'] == len(df)).all()
+    assert (lines['found'].values[:2] <= 100).all() and (lines['found'].values[2:] == len(df)).all()
+
+
+def test_memory():
+    '''Testing that a stage's memory high-water mark includes the stages run inside it'''
+
+    profiler = Profiler(memory=True)
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            big = np.ones(10 ** 6)
+        del big
+        small = np.ones(10 ** 3)
+
+    inner, outer = profiler.records
+    assert inner['memory'] >= 8 * 10 ** 6
+    assert outer['memory'] >= inner['memory']
+    assert small.sum() == 10 ** 3
+
+
+def test_null_profiler():
+    '''Testing that nothing is recorded without a profiler'''
+
+    df, stoves, fuels, hh_id = synthetic_household(1)
+    x = Household(df, stoves, fuels, hh_id, lazy=True)
+    x.cooking_duration()
+    assert x.profiler is NULL_PROFILER
+    assert len(NULL_PROFILER.records) == 0 and NULL_PROFILER.report().empty
@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+from ..results import ResultWriter, read_results, result_format
+
+usage = pd.DataFrame({'hh_id': ['1', '1'], 'file': ['a.csv', 'a.csv'], 'day': [1, 2], 'type': ['stove', 'fuel'],
+                      'item': ['lpg', 'lpg'], 'usage': [30.0, 0.5], 'units': ['min', 'kg']})
+
+
+@pytest.mark.parametrize('name', ['results.csv', 'results.jsonl', 'results.parquet'])
+def test_resume(tmp_path, name):
+    '''Testing that resuming keeps the households written and drops one cut short when the run stopped'''
+
+    path = str(tmp_path / name)
+    with ResultWriter(path) as writer:
+        writer.write('a.csv', usage)
+        writer.write('b.csv', usage.assign(hh_id='2', file='b.csv'))
+    assert read_results(path).astype({'hh_id': str}).equals(
+        pd.concat([usage, usage.assign(hh_id='2', file='b.csv')], ignore_index=True))
+
+    # a household half written and never logged
+    if os.path.isdir(path):
+        usage.to_parquet(os.path.join(path, 'part-000002.parquet'))
+    else:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('3,c.csv,1,sto')
+
+    with ResultWriter(path, resume=True) as writer:
+        assert writer.done == {os.path.abspath('a.csv'), os.path.abspath('b.csv')}
+        writer.write('c.csv', usage.assign(hh_id='3', file='c.csv'))
+    results = read_results(path)
+    assert list(results['file']) == ['a.csv', 'a.csv', 'b.csv', 'b.csv', 'c.csv', 'c.csv']
+
+    with ResultWriter(path) as writer:
+        assert not writer.done
+    assert read_results(path).empty
+
+
+def test_result_format():
+    '''Testing that the results format is found from the extension, and bad formats raise errors'''
+
+    assert result_format('out.JSONL') == 'jsonl'
+    assert result_format('out', 'parquet') == 'parquet'
+    with pytest.raises(ValueError):
+        result_format('out.txt')
+    with pytest.raises(ValueError):
+        result_format('out.csv', 'xlsx')
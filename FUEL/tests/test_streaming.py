@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..example_file_convert import read_example_file, read_example_file_chunks
+from ..household import Household
+from ..streaming import StreamingHousehold, stream_file
+from ..study import daily_usage
+from ..synthetic import synthetic_household
+
+path = 'FUEL/data_files/HH_319_2018-08-25_19-27-32_processed_v2.csv'
+
+
+def stream(df, stoves, fuels, hh_id, chunksize, **thresholds):
+    household = StreamingHousehold(stoves, fuels, hh_id, **thresholds)
+    usage = [household.update(df.iloc[i:i + chunksize]) for i in range(0, len(df), chunksize)]
+    usage.append(household.finish())
+    return household, pd.concat(usage, ignore_index=True)
+
+
+def sort_usage(usage):
+    return usage.sort_values(['type', 'item', 'day']).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('chunksize', [50, 1000])
+@pytest.mark.parametrize('time_between_events', [10, 60])
+def test_stream_matches_household(chunksize, time_between_events):
+    '''Testing that streaming the readings in chunks gives exactly the results of the whole household'''
+
+    df, stoves, fuels, hh_id = read_example_file(path)
+    x = Household(df, stoves, fuels, hh_id, time_between_events=time_between_events, lazy=True)
+    household, usage = stream(df, stoves, fuels, hh_id, chunksize, time_between_events=time_between_events)
+
+    assert household.cooking_events() == x.cooking_events()
+    pd.testing.assert_frame_equal(household.cooking_duration(), x.cooking_duration())
+    pd.testing.assert_frame_equal(household.fuel_usage(), x.fuel_usage())
+    assert household.weight_changes() == x.weight_changes
+    pd.testing.assert_frame_equal(sort_usage(usage), sort_usage(daily_usage(x)), check_dtype=False)
+
+
+def test_stream_reports_days_as_it_goes():
+    '''Testing that finished days are reported before the end of the study and never reported twice'''
+
+    df, stoves, fuels, hh_id = read_example_file(path)
+    household = StreamingHousehold(stoves, fuels, hh_id)
+    reported = pd.concat([household.update(df.iloc[i:i + 1440]) for i in range(0, len(df), 1440)])
+
+    assert reported['day'].nunique() > 0
+    assert not reported.duplicated(['day', 'type', 'item']).any()
+    assert not household.finish()['day'].isin(reported['day']).any()
+
+
+def test_stream_keeps_few_readings():
+    '''Testing that readings are dropped once they have been analysed'''
+
+    df, stoves, fuels, hh_id = read_example_file(path)
+    household = StreamingHousehold(stoves, fuels, hh_id)
+    for i in range(0, len(df), 500):
+        household.update(df.iloc[i:i + 500])
+        assert len(household._times) < 2000
+
+
+def test_stream_file():
+    '''Testing that a data file streamed in chunks gives the daily usage of the whole household'''
+
+    df, stoves, fuels, hh_id = read_example_file(path)
+    x = Household(df, stoves, fuels, hh_id, lazy=True)
+    household, usage = stream_file(path, chunksize=700)
+
+    pd.testing.assert_frame_equal(sort_usage(usage), sort_usage(daily_usage(x)), check_dtype=False)
+
+
+def test_read_example_file_chunks():
+    '''Testing that the chunks hold exactly the data of the whole file'''
+
+    df = read_example_file(path)[0]
+    chunks, stoves, fuels, hh_id = read_example_file_chunks(path, chunksize=333)
+    pd.testing.assert_frame_equal(pd.concat(chunks), df, check_exact=True)
+
+
+def test_stream_stuck_stove():
+    '''Testing that a stove that is never cold does not keep the readings of any stove or fuel'''
+
+    df, stoves, fuels, hh_id = synthetic_household(30, stoves=2, fuels=2, seed=3)
+    df['stuck'] = 20.0
+    df['unplugged'] = np.nan
+    stoves = stoves + ['stuck', 'unplugged']
+    x = Household(df, stoves, fuels, hh_id, lazy=True)
+
+    household = StreamingHousehold(stoves, fuels, hh_id, max_pending=5000)
+    for i in range(0, len(df), 1000):
+        household.update(df.iloc[i:i + 1000])
+        assert len(household._times) <= 6000
+        assert all(len(household._values[s]) <= 6000 for s in stoves)
+        assert all(len(household._values[f]) <= 2 for f in fuels)
+    household.finish()
+
+    assert household.forced_cuts['stuck'] and household.forced_cuts['unplugged']
+    assert not any(household.forced_cuts[s] for s in stoves[:2])
+    assert household.cooking_events() == x.cooking_events()
+    with pytest.raises(ValueError):
+        StreamingHousehold(stoves, fuels, hh_id, max_pending=0)
@@ -0,0 +1,118 @@
+import os
+import time
+from functools import partial
+
+import plotly.io
+import pytest
+
+from ..cache import ConversionCache
+from ..study import Study, analyse_file, find_files
+
+
+def test_find_files():
+    '''Testing that a directory and a glob pattern find the same data files'''
+
+    assert find_files('FUEL/data_files/HH_*.csv') == [f for f in find_files('FUEL/data_files') if '/HH_' in f]
+    assert len(find_files('FUEL/data_files/HH_*.csv')) == 8
+
+
+def test_study_run():
+    '''Testing that every household is analysed and every day of study is reported'''
+
+    study = Study('FUEL/data_files/HH_*.csv', workers=2, chunksize=3)
+    usage = study.run()
+
+    assert not study.errors
+    assert usage['hh_id'].nunique() == 8
+    assert set(usage['type']) == {'stove', 'fuel'}
+    assert (usage['day'] > 0).all()
+
+
+def test_study_matches_serial():
+    '''Testing that the worker processes give the same results as running in this process'''
+
+    files = find_files('FUEL/data_files/HH_3*.csv')
+    assert Study(files, workers=2).run().equals(Study(files, workers=1).run())
+
+
+def test_study_errors(tmp_path):
+    '''Testing that a household that can not be analysed is reported without stopping the others'''
+
+    bad_file = tmp_path / 'bad.csv'
+    bad_file.write_text('not,a,sensor,file\n1,2,3,4\n')
+    study = Study(['FUEL/data_files/HH_38_2018-08-26_15-01-40_processed_v3.csv', str(bad_file)], workers=2)
+    usage = study.run()
+
+    assert list(study.errors) == [str(bad_file)]
+    assert set(usage['file']) == {'FUEL/data_files/HH_38_2018-08-26_15-01-40_processed_v3.csv'}
+
+
+def slow_first(path, first):
+    '''Analyse a data file, taking longer over the first one (internal function).'''
+
+    if path == first:
+        time.sleep(2)
+    return analyse_file(path)
+
+
+def test_results_as_done():
+    '''Testing that households are given as they are done, not held back by a slow household before them'''
+
+    files = find_files('FUEL/data_files/HH_3*.csv')
+    study = Study(files, workers=2)
+    results = list(study._map(partial(slow_first, first=files[0]), ordered=False))
+    assert results[-1][0] == files[0]
+    assert sorted(path for path, usage, error in results) == files
+    assert [path for path, usage, error in study._map(partial(slow_first, first=files[0]))] == files
+    assert sorted(path for path, usage, error in study.results()) == files
+
+
+def test_export_figures(tmp_path):
+    '''Testing that every household's figures are written and the HTML figures share one plotly.js bundle'''
+
+    files = find_files('FUEL/data_files/HH_3*.csv')
+    figures = Study(files, workers=2).export_figures(str(tmp_path), max_points=1000)
+
+    assert sorted(figures) == files
+    html = [path for written in figures.values() for path in written]
+    assert len(html) == 2 * len(files)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([os.path.basename(path) for path in html] +
+                                                               ['plotly.min.js'])
+    for path in html:
+        with open(path) as f:
+            page = f.read()
+        assert 'src="plotly.min.js"' in page
+        assert len(page) < 1024 ** 2
+
+
+def test_export_figures_json(tmp_path):
+    '''Testing that figures can be written as plotly JSON'''
+
+    study = Study(['FUEL/data_files/HH_38_2018-08-26_15-01-40_processed_v3.csv'], workers=1)
+    figures = study.export_figures(str(tmp_path), fmt='json')
+
+    for path in figures['FUEL/data_files/HH_38_2018-08-26_15-01-40_processed_v3.csv']:
+        assert plotly.io.read_json(path).data
+    assert not (tmp_path / 'plotly.min.js').exists()
+
+
+def test_study_profile():
+    '''Testing that profiling records the stages of every household without changing the results'''
+
+    files = find_files('FUEL/data_files/HH_3*.csv')
+    study = Study(files, workers=2, profile=True)
+    assert study.run().equals(Study(files, workers=2).run())
+    assert sorted(study.timings['file'].unique()) == sorted(files)
+    reads = study.timings[study.timings['stage'] == 'reformat_example_files']
+    assert len(reads) == len(files) and (reads['rows'] > 0).all()
+
+
+def test_study_convert_workbooks(tmp_path):
+    '''Testing that Excel workbooks in a directory are converted across the worker processes and cached'''
+
+    pytest.importorskip('openpyxl')
+    study = Study('FUEL/data_files/Originals', workers=2, cache_dir=str(tmp_path))
+    converted = study.convert()
+    assert not study.errors
+    assert len(converted) == 8 and all(path.endswith('.xlsx') for path in converted)
+    assert len(ConversionCache(str(tmp_path)).entries()) == 8
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from ..detection import find_peaks
+from ..example_file_convert import reformat_example_files
+from ..household import Household
+from ..sweep import peaks_above, stove_peaks, threshold_sweep
+from ..synthetic import synthetic_household
+
+
+def test_peaks_above():
+    '''Testing that the peaks above a threshold are the ones find_peaks finds, in the same order by height'''
+
+    temps = synthetic_household(2)[0]['telia'].values
+    all_peaks = stove_peaks(temps)
+    for temp_threshold in (0, 2, 15, 60, 200):
+        peaks, heights, order = peaks_above(*all_peaks, temp_threshold)
+        expected = find_peaks(temps, height=temp_threshold)[0]
+        assert np.array_equal(peaks, expected)
+        assert np.array_equal(order, np.argsort(temps[expected], kind='stable')[::-1])
+
+
+def test_sweep_matches_household():
+    '''Testing that every combination of thresholds gives the same daily totals as a Household set to it'''
+
+    df, stoves, fuels, hh_id = reformat_example_files('FUEL/data_files/HH_319_2018-08-25_19-27-32_processed_v2.csv',
+                                                      fast=True)
+    x = Household(df, stoves, fuels, hh_id, lazy=True)
+    cooking_times, fuel_use = threshold_sweep(x, [10, 15, 30], [30, 60], [0.1, 0.2, 1.0])
+    assert cooking_times.index.names == ['temp_threshold', 'time_between_events', 'day']
+    assert fuel_use.index.names == ['weight_threshold', 'day']
+
+    for temp_threshold in (10, 15, 30):
+        for time_between_events in (30, 60):
+            x.temp_threshold = temp_threshold
+            x.time_between_events = time_between_events
+            assert np.array_equal(cooking_times.loc[(temp_threshold, time_between_events)].values,
+                                  x.cooking_duration().values)
+    for weight_threshold in (0.1, 0.2, 1.0):
+        x.weight_threshold = weight_threshold
+        assert np.array_equal(fuel_use.loc[weight_threshold].values, x.fuel_usage().values)
+
+
+def test_sweep_defaults():
+    '''Testing that the household's own thresholds are used when none are given'''
+
+    x = Household(*synthetic_household(3), lazy=True)
+    cooking_times, fuel_use = threshold_sweep(x)
+    assert np.array_equal(cooking_times.loc[(15, 60)].values, x.cooking_duration().values)
+    assert np.array_equal(fuel_use.loc[0.2].values, x.fuel_usage().values)
+
+
+def test_sweep_missing_start():
+    '''Testing that a stove whose cooking event start can not be found is left missing for that threshold only'''
+
+    df, stoves, fuels, hh_id = synthetic_household(1, stoves=1, fuels=1)
+    df.loc[3, 'telia'] = 30.0
+    x = Household(df, stoves, fuels, hh_id, lazy=True)
+    cooking_times, _ = threshold_sweep(x, [15, 60], [60])
+    assert cooking_times.loc[(15, 60)].isna().all(axis=None)
+    assert not cooking_times.loc[(60, 60)].isna().any(axis=None)
+
+
+def test_sweep_bad_thresholds():
+    '''Testing that thresholds are checked like the Household thresholds'''
+
+    x = Household(*synthetic_household(1), lazy=True)
+    with pytest.raises(ValueError):
+        threshold_sweep(x, temp_thresholds=15)
+    with pytest.raises(ValueError):
+        threshold_sweep(x, times_between_events=[60.5])
+    with pytest.raises(ValueError):
+        threshold_sweep(x, weight_thresholds=[1])
+    with pytest.raises(ValueError):
+        threshold_sweep(x, temp_thresholds=[])
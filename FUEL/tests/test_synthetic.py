@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..example_file_convert import reformat_example_files
+from ..household import Household
+from ..synthetic import SyntheticStudy, synthetic_household
+
+
+def test_synthetic_household():
+    '''Testing that a made up household has a reading a minute for every stove and fuel and can be analysed'''
+
+    df, stoves, fuels, hh_id = synthetic_household(3, stoves=5, fuels=2)
+    assert len(df) == 3 * 1440
+    assert stoves == ['telia', 'om30', '3stone', 'malgchch', 'stove5'] and fuels == ['lpg', 'charcoal']
+    assert list(df.columns) == ['timestamp'] + stoves + fuels
+
+    x = Household(df, stoves, fuels, hh_id, lazy=True)
+    assert all(len(events) > 0 for events in x.cooking_events().values())
+    assert (x.fuel_usage().loc[0] > 0).all()
+
+
+def test_synthetic_household_seed():
+    '''Testing that the same seed gives the same readings'''
+
+    assert synthetic_household(1, seed=3)[0].equals(synthetic_household(1, seed=3)[0])
+    assert not synthetic_household(1, seed=3)[0].equals(synthetic_household(1, seed=4)[0])
+
+
+def test_write_csv(tmp_path):
+    '''Testing that a written data file is read back as the same readings, whichever way it is read'''
+
+    study = SyntheticStudy(2, stoves=3, fuels=2, hh_id='42', seed=1)
+    path = str(tmp_path / 'HH_42_synthetic.csv')
+    study.write_csv(path, chunksize=1000)
+    df, stoves, fuels, hh_id = study.to_frame()
+
+    for fast in (True, False):
+        read = reformat_example_files(path, fast=fast)
+        assert read[0].equals(df)
+        assert read[1:] == (stoves, fuels, '42')
+
+
+def test_chunks():
+    '''Testing that the readings are the same however many are made up at a time'''
+
+    study = SyntheticStudy(10, seed=2)
+    assert pd.concat(study.chunks(777), ignore_index=True).equals(study.to_frame()[0])
+
+
+def test_interval(tmp_path):
+    '''Testing readings a set number of seconds apart, written with the seconds when under a minute'''
+
+    df = SyntheticStudy(1, interval=300).to_frame()[0]
+    assert len(df) == 288
+    assert (df['timestamp'].diff()[1:] == pd.Timedelta(minutes=5)).all()
+
+    study = SyntheticStudy(1, interval=30, hh_id='42', seed=1)
+    path = str(tmp_path / 'HH_42_synthetic.csv')
+    study.write_csv(path, chunksize=1000)
+    df = study.to_frame()[0]
+    assert len(df) == 2880
+    assert (df['timestamp'].diff()[1:] == pd.Timedelta(seconds=30)).all()
+    for fast in (True, False):
+        assert reformat_example_files(path, fast=fast)[0].equals(df)
+
+    for interval in (0, 0.5):
+        with pytest.raises(ValueError):
+            SyntheticStudy(1, interval=interval)
+
+
+def test_time_based_scale():
+    '''Testing that months of readings 10 to 30 seconds apart are analysed by time as readings a minute apart are'''
+
+    minutes = Household(*SyntheticStudy(60, seed=6).to_frame(), lazy=True)
+    for interval in (10, 30):
+        study = SyntheticStudy(60, interval=interval, seed=6)
+        assert study.readings == 60 * 86400 // interval
+        x = Household(*study.to_frame(), lazy=True, time_based=True)
+        assert all(recall > 0.95 for recall in study.recall(x.cooking_events()).values())
+        for s in study.stoves:
+            assert abs(len(x.cooking_events(s)[s]) - len(minutes.cooking_events(s)[s])) <= 3
+        assert np.allclose(x.cooking_duration().sum(), minutes.cooking_duration().sum(), rtol=0.05)
+        assert np.allclose(x.fuel_usage().loc[0], minutes.fuel_usage().loc[0], rtol=0.05)
+
+
+def test_ground_truth():
+    '''Testing that the ground truth events are found in the readings'''
+
+    # lpg weights below 5 kg are not counted by Household
+    study = SyntheticStudy(10, stoves=2, fuels=2, refuel_below=5, seed=3)
+    x = Household(*study.to_frame(), lazy=True)
+    events = study.cooking_events()
+    assert list(events.columns) == ['stove', 'start', 'end', 'peak_temp']
+    assert (events['end'] > events['start']).all()
+    assert all(recall > 0.9 for recall in study.recall(x.cooking_events()).values())
+
+    changes = study.fuel_changes()
+    used = -changes[changes['change'] < 0].groupby('fuel')['change'].sum()
+    assert np.allclose(x.fuel_usage().loc[0].values, used[study.fuels].values, rtol=0.1)
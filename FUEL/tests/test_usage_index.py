@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..household import Household
+from ..synthetic import synthetic_household
+from ..usage_index import UsageIndex
+
+
+df, stoves, fuels, hh_id = synthetic_household(5, stoves=3, fuels=2, seed=4)
+x = Household(df, stoves, fuels, hh_id, lazy=True)
+index = UsageIndex(x)
+
+
+def test_days_match_daily_totals():
+    '''Testing that windows of each day of study give the daily cooking time and fuel use'''
+
+    days = [index.study_began + pd.Timedelta(days=d) for d in range(x.study_days + 1)]
+    usage = index.usage(days[:-1], days[1:])
+    assert np.allclose(usage[[s + '(min)' for s in stoves]].values, x.cooking_duration().loc[1:].values)
+    assert np.allclose(usage[[f + '(kg)' for f in fuels]].values, x.fuel_usage().loc[1:].values)
+
+
+def test_daily_usage():
+    '''Testing the cooking time between two times of day against the minutes of every cooking event in them'''
+
+    usage = index.daily_usage('06:00', '10:00')
+    assert len(usage) == 6
+    assert (usage['end'] - usage['start'] == pd.Timedelta(hours=4)).all()
+
+    timestamps = df['timestamp']
+    for s, events in x.cooking_events().items():
+        for window in usage.itertuples():
+            minutes = 0
+            for _, start, end in events:
+                overlap = min(timestamps[end], window.end) - max(timestamps[start], window.start)
+                minutes += max(overlap.total_seconds() / 60, 0)
+            assert np.isclose(usage.loc[window.Index, s + '(min)'], minutes)
+
+    overnight = index.daily_usage('22:00', '02:00')
+    assert (overnight['end'] - overnight['start'] == pd.Timedelta(hours=4)).all()
+
+
+def test_missing_reading():
+    '''Testing that a missing weight reading at a weight change only leaves out that change, as the time based
+    analysis does, instead of making the fuel used missing from then on'''
+
+    missing = df.copy()
+    missing.loc[x._find_weight_changes(fuels[0])[2], fuels[0]] = np.nan
+    gap = UsageIndex(Household(missing, stoves, fuels, hh_id, lazy=True))
+    timed = Household(missing, stoves, fuels, hh_id, lazy=True, time_based=True)
+
+    days = [index.study_began + pd.Timedelta(days=d) for d in range(x.study_days + 1)]
+    usage = gap.usage(days[:-1], days[1:])
+    assert not usage.isna().any().any()
+    assert np.allclose(usage[[f + '(kg)' for f in fuels]].values, timed.fuel_usage().loc[1:].values)
+
+def test_bad_windows():
+    '''Testing that windows must end after they start, and times of day must be strings'''
+
+    with pytest.raises(ValueError):
+        index.usage([index.study_began], [index.study_began - pd.Timedelta(hours=1)])
+    with pytest.raises(ValueError):
+        index.usage([index.study_began], [])
+    with pytest.raises(ValueError):
+        index.daily_usage(6, 10)
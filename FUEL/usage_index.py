@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from .aggregation import DAY_NS, MINUTE_NS
+
+
+def _nanoseconds(times):
+    '''Nanoseconds since 1970 of one or more times (internal function).'''
+
+    return np.asarray(pd.to_datetime(np.atleast_1d(times)), dtype='datetime64[ns]').astype(np.int64)
+
+
+def _time_of_day(time):
+    '''Nanoseconds from midnight to a time of day given as 'HH:MM' (internal function).'''
+
+    if type(time) != str:
+        raise ValueError("Times of day must be strings such as '06:00'!")
+    timestamp = pd.Timestamp(time)
+    return (timestamp - timestamp.normalize()).value
+
+
+class UsageIndex:
+
+    def __init__(self, household):
+        '''Index the cooking events and fuel use of a household, so the cooking time and fuel used in any window of
+        time can be found without analysing the household again.
+
+        The cooking events of each stove are kept in order with the minutes cooked before each of them, and the
+        significant weight changes of each fuel with the fuel used up to each of them, so the usage in a window is
+        found with a binary search at each end of it. Weight changes at missing readings are left out. The cooking time and fuel use are counted as in
+        Household.cooking_duration and fuel_usage: the minutes of a cooking event that fall in the window, and the
+        fuel used (drops of at least the weight threshold) at the weight changes in the window.
+
+        Args:
+            household (object): A Household, with the thresholds the index should use.
+
+        Returns:
+            hh_id : The household ID
+            stoves : The stoves of the household
+            fuels : The fuels of the household
+            study_began : The time of the first reading
+            study_ended : The time of the last reading
+        '''
+
+        timestamps = household._timestamps()
+        stamps = np.asarray(timestamps, dtype='datetime64[ns]').astype(np.int64)
+        self.hh_id = household.hh_id
+        self.stoves = list(household.stoves)
+        self.fuels = list(household.fuels)
+        self.study_began = pd.Timestamp(timestamps[0])
+        self.study_ended = pd.Timestamp(timestamps[-1])
+
+        # start and end (ns) of every cooking event and the minutes cooked before it, cooking events never overlap
+        self._cooking = {}
+        for s, events in household.cooking_events().items():
+            events = np.array(events, dtype=np.int64).reshape(-1, 3)
+            starts, ends = stamps[events[:, 1]], stamps[events[:, 2]]
+            self._cooking[s] = (starts, ends, np.concatenate(([0.0], np.cumsum((ends - starts) / MINUTE_NS))))
+
+        # time (ns) of every weight change after the first and the fuel used up to and including it
+        self._fuel = {}
+        for f in self.fuels:
+            changes = np.asarray(household._find_weight_changes(f), dtype=np.int64)
+            weights = household._readings(f)[changes].astype(np.float64)
+            # a missing reading would make the fuel used up to every later change missing, so the fuel used across it
+            # is counted from the changes either side of it instead
+            known = ~np.isnan(weights)
+            changes, weights = changes[known], weights[known]
+            used = weights[:-1] - weights[1:]
+            used = np.where(used < household.weight_threshold, 0.0, used)
+            self._fuel[f] = (stamps[changes[1:]], np.concatenate(([0.0], np.cumsum(used))))
+
+    def _cooked_before(self, stove, times):
+        '''Minutes cooked on a stove before each time (ns) (internal function).'''
+
+        starts, ends, cooked = self._cooking[stove]
+        if not len(starts):
+            return np.zeros(len(times))
+        started = np.searchsorted(starts, times, side='right')
+        last = np.maximum(started - 1, 0)
+        # minutes of the last event started before each time, up to that time
+        partial = np.where(started > 0, (np.minimum(times, ends[last]) - starts[last]) / MINUTE_NS, 0.0)
+        return cooked[last] + partial
+
+    def _used_before(self, fuel, times):
+        '''Fuel (kg) used before each time (ns) (internal function).'''
+
+        change_times, used = self._fuel[fuel]
+        return used[np.searchsorted(change_times, times, side='left')]
+
+    def usage(self, starts, ends):
+        '''Find the cooking time on each stove and the fuel used of each fuel in windows of time.
+
+        Args:
+            starts (datetime or list): The start of each window, as anything pd.to_datetime reads.
+
+            ends (datetime or list): The end of each window, which is not part of it. There must be one end for every
+                                     start.
+
+        Returns:
+            usage (dataframe): A row per window with its start and end, the cooking time (mins) of every stove and the
+                               fuel used (kg) of every fuel, with columns named as in cooking_duration and fuel_usage.
+        '''
+
+        starts, ends = _nanoseconds(starts), _nanoseconds(ends)
+        if len(starts) != len(ends):
+            raise ValueError('There must be an end for every start!')
+        if (ends < starts).any():
+            raise ValueError('Every window must end after it starts!')
+
+        usage = {'start': starts.astype('datetime64[ns]'), 'end': ends.astype('datetime64[ns]')}
+        for s in self.stoves:
+            usage[s + '(min)'] = self._cooked_before(s, ends) - self._cooked_before(s, starts)
+        for f in self.fuels:
+            usage[f + '(kg)'] = self._used_before(f, ends) - self._used_before(f, starts)
+        return pd.DataFrame(usage)
+
+    def daily_usage(self, start, end):
+        '''Find the cooking time and fuel used between two times of day, on every day of the study.
+
+        Args:
+            start (str): The time of day each window starts, such as '06:00'.
+
+            end (str): The time of day each window ends, such as '10:00'. Windows ending at or before the time they
+                       start end on the next day, so '22:00' to '02:00' runs over midnight.
+
+        Returns:
+            usage (dataframe): A row per day, from the day of the first reading to the day of the last, indexed by
+                               date, with the usage in the window starting on that day (see usage).
+        '''
+
+        start, end = _time_of_day(start), _time_of_day(end)
+        if end <= start:
+            end += DAY_NS
+        days = pd.date_range(self.study_began.normalize(), self.study_ended.normalize(), freq='D')
+        midnights = np.asarray(days, dtype='datetime64[ns]').astype(np.int64)
+        usage = self.usage(midnights + start, midnights + end)
+        usage.index = pd.Index(days.date, name='date')
+        return usage
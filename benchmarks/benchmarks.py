@@ -0,0 +1,197 @@
+'''Benchmarks of the Household analysis pipeline.
+
+Written in the style of asv (airspeed velocity): every class has a setup method and time_ methods, run once for each
+value of params, or timeraw_ methods giving code that is timed in a fresh interpreter. They can be run with asv, or
+without any extra packages with benchmarks/run.py.
+'''
+import glob
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from FUEL.cache import ConversionCache
+from FUEL.events import EventStore, household_events
+from FUEL.example_file_convert import reformat_example_files
+from FUEL.household import Household
+from FUEL.sweep import threshold_sweep
+from FUEL.synthetic import SyntheticStudy, synthetic_household
+from FUEL.usage_index import UsageIndex
+
+DATA_FILES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'FUEL', 'data_files', 'HH_*.csv')))
+
+
+class Imports:
+    '''Importing the package in a fresh interpreter, as every worker process does.'''
+
+    def timeraw_import_household(self):
+        return 'import FUEL.household'
+
+    def timeraw_import_study(self):
+        return 'import FUEL.study'
+
+    def timeraw_import_plotting(self):
+        return 'import FUEL.household\nimport plotly.graph_objects'
+
+
+class BundledHouseholds:
+    '''The eight example households, about three days of readings each.'''
+
+    params = ['_'.join(os.path.basename(path).split('_')[:2]) for path in DATA_FILES]
+    param_names = ['household']
+
+    def setup(self, household):
+        self.path = DATA_FILES[self.params.index(household)]
+        self.df, self.stoves, self.fuels, self.hh_id = reformat_example_files(self.path, fast=True)
+        self.analysed = self.household()
+        self.analysed.cooking_events()
+        self.analysed.fuel_usage()
+
+    def household(self):
+        return Household(self.df, self.stoves, self.fuels, self.hh_id, lazy=True, copy=False)
+
+    def time_reformat_example_files(self, household):
+        reformat_example_files(self.path)
+
+    def time_reformat_example_files_fast(self, household):
+        reformat_example_files(self.path, fast=True)
+
+    def time_cooking_events(self, household):
+        self.household().cooking_events()
+
+    def time_find_weight_changes(self, household):
+        x = self.household()
+        for f in self.fuels:
+            x._find_weight_changes(f)
+
+    def time_fuel_usage(self, household):
+        self.household().fuel_usage()
+
+    def time_cooking_duration(self, household):
+        self.household().cooking_duration()
+
+    def time_plot_stove(self, household):
+        self.analysed.plot_stove(cooking_events=True)
+
+    def time_plot_fuel(self, household):
+        self.analysed.plot_fuel(fuel_usage=True)
+
+
+class SyntheticStudies:
+    '''Made up studies of one day, a month and a year of one-minute readings.'''
+
+    params = ([1, 30, 365], [2, 4, 8])
+    param_names = ['days', 'stoves_and_fuels']
+
+    def setup(self, days, items):
+        self.df, self.stoves, self.fuels, self.hh_id = synthetic_household(days, items, items)
+
+    def household(self):
+        return Household(self.df, self.stoves, self.fuels, self.hh_id, lazy=True, copy=False)
+
+    def time_synthetic_household(self, days, items):
+        synthetic_household(days, items, items)
+
+    def time_household(self, days, items):
+        Household(self.df, self.stoves, self.fuels, self.hh_id, lazy=True)
+
+    def time_cooking_events(self, days, items):
+        self.household().cooking_events()
+
+    def time_fuel_usage(self, days, items):
+        self.household().fuel_usage()
+
+    def time_cooking_duration(self, days, items):
+        self.household().cooking_duration()
+
+    def time_plot_stove(self, days, items):
+        self.household().plot_stove(max_points=2000)
+
+    def time_usage_index(self, days, items):
+        index = UsageIndex(self.household())
+        starts = index.study_began + pd.to_timedelta(np.arange(0, days * 1440, max(days * 1440 // 1000, 1)), 'm')
+        index.usage(starts, starts + pd.Timedelta(hours=4))
+
+    def time_threads(self, days, items):
+        x = Household(self.df, self.stoves, self.fuels, self.hh_id, lazy=True, copy=False, threads=4)
+        x.cooking_duration()
+        x.fuel_usage()
+
+    def time_threshold_sweep(self, days, items):
+        threshold_sweep(self.household(), [10, 15, 20, 25, 30], [30, 60, 90, 120], [0.1, 0.2, 0.5, 1.0])
+
+
+class SyntheticSeconds:
+    '''Made up studies of a month and a year of readings 10 and 30 seconds apart, analysed by time.'''
+
+    params = ([30, 365], [10, 30])
+    param_names = ['days', 'interval']
+
+    def setup(self, days, interval):
+        self.df, self.stoves, self.fuels, self.hh_id = SyntheticStudy(days, interval=interval).to_frame()
+
+    def household(self):
+        return Household(self.df, self.stoves, self.fuels, self.hh_id, lazy=True, copy=False, time_based=True)
+
+    def time_cooking_events(self, days, interval):
+        self.household().cooking_events()
+
+    def time_cooking_duration(self, days, interval):
+        self.household().cooking_duration()
+
+    def time_fuel_usage(self, days, interval):
+        self.household().fuel_usage()
+
+
+class SyntheticFiles:
+    '''Reading made up data files of a month and a year of one-minute readings, and loading them from the cache.'''
+
+    params = [30, 365]
+    param_names = ['days']
+
+    def setup(self, days):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'HH_synthetic.csv')
+        SyntheticStudy(days).write_csv(self.path)
+        self.cache = ConversionCache(os.path.join(self.directory.name, 'cache'))
+        reformat_example_files(self.path, fast=True, cache=self.cache)
+
+    def teardown(self, days):
+        self.directory.cleanup()
+
+    def time_reformat_example_files(self, days):
+        reformat_example_files(self.path)
+
+    def time_reformat_example_files_fast(self, days):
+        reformat_example_files(self.path, fast=True)
+
+    def time_reformat_example_files_cached(self, days):
+        reformat_example_files(self.path, cache=self.cache)
+
+
+class EventStores:
+    '''Writing and querying the events of made up studies of a month in many households.'''
+
+    params = [10, 50]
+    param_names = ['households']
+
+    def setup(self, households):
+        self.events = []
+        for seed in range(households):
+            df, stoves, fuels, hh_id = synthetic_household(30, 2, 2, seed=seed)
+            self.events.append((str(seed) + '.csv', household_events(Household(df, stoves, fuels, hh_id, lazy=True))))
+        self.store = EventStore(':memory:')
+        self.store.write(self.events)
+
+    def teardown(self, households):
+        self.store.close()
+
+    def time_write(self, households):
+        EventStore(':memory:').write(self.events)
+
+    def time_cooking_events(self, households):
+        self.store.cooking_events(stove='telia', start='2018-09-01', end='2018-09-08', min_minutes=60)
+
+    def time_weekly_refills(self, households):
+        self.store.weekly_refills('lpg')
@@ -0,0 +1,198 @@
+'''Run the benchmarks in benchmarks.py and keep a history of the results.
+
+Every run is added to a json history file for this machine (benchmarks/results/<machine>.json by default) and
+compared with the run before it, so a change that slows the analysis down shows up straight away.
+
+    python benchmarks/run.py                      run every benchmark and save the results
+    python benchmarks/run.py -k cooking_events    only run benchmarks whose name contains cooking_events
+    python benchmarks/run.py --check              exit with an error if anything got slower than the threshold
+'''
+import argparse
+import datetime
+import inspect
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import benchmarks  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+# timeraw_ code is run in a fresh interpreter, like asv, and times itself
+RAW_TIMER = 'import time\n_start = time.perf_counter()\n%s\nprint(time.perf_counter() - _start)'
+
+
+def benchmark_cases(pattern=None):
+    '''Find every benchmark and the parameters it is run with.
+
+    Args:
+        pattern (str): Only benchmarks whose name contains this are found. Defaults to every benchmark.
+
+    Returns:
+        cases (list): (benchmark class, method name, parameters, benchmark name) for every benchmark.
+    '''
+
+    cases = []
+    for class_name, cls in inspect.getmembers(benchmarks, inspect.isclass):
+        if cls.__module__ != benchmarks.__name__:
+            continue
+        params = getattr(cls, 'params', [])
+        if params and not isinstance(params, tuple):
+            params = (params,)
+        for method in sorted(name for name in vars(cls) if name.startswith(('time_', 'timeraw_'))):
+            for values in itertools.product(*params):
+                name = class_name + '.' + method + '(' + ', '.join(str(v) for v in values) + ')'
+                if pattern is None or pattern in name:
+                    cases.append((cls, method, values, name))
+    return cases
+
+
+def time_case(cls, method, values, min_time=0.2, max_repeat=10):
+    '''Time a benchmark, running it until it has taken at least min_time or has run max_repeat times.
+
+    Args:
+        cls : The benchmark class.
+        method (str): The name of the time_ method, or of a timeraw_ method giving code to time in a fresh
+                      interpreter.
+        values (tuple): The parameters it is run with.
+        min_time (float): The least total time (seconds) spent running it. Defaults to 0.2.
+        max_repeat (int): The most times it is run. Defaults to 10.
+
+    Returns:
+        result (dict): The fastest and median time (seconds) and the number of times it was run.
+    '''
+
+    instance = cls()
+    if hasattr(instance, 'setup'):
+        instance.setup(*values)
+    try:
+        function = getattr(instance, method)
+        if method.startswith('timeraw_'):
+            code = RAW_TIMER % function(*values)
+            env = dict(os.environ,
+                       PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+
+            def function(*values):
+                return float(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env,
+                                            check=True).stdout.split()[-1])
+        else:
+            function = timed(function)
+        function(*values)  # warm up
+
+        times = []
+        while len(times) < max_repeat and (len(times) < 3 or sum(times) < min_time):
+            times.append(function(*values))
+    finally:
+        if hasattr(instance, 'teardown'):
+            instance.teardown(*values)
+    return {'min': min(times), 'median': statistics.median(times), 'repeat': len(times)}
+
+
+def timed(function):
+    '''Wrap a function so it gives the time (seconds) it took to run (internal function).'''
+
+    def run(*values):
+        start = time.perf_counter()
+        function(*values)
+        return time.perf_counter() - start
+    return run
+
+
+def git_commit():
+    '''The commit being benchmarked, None if it can not be found (internal function).'''
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    '''Every run saved in a history file, oldest first.'''
+
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, previous, threshold):
+    '''Compare results with an earlier run.
+
+    Args:
+        results (dict): The results of this run, keyed by benchmark name.
+        previous (dict): The results of the earlier run.
+        threshold (float): How many times slower a benchmark must be to count as slower.
+
+    Returns:
+        slower (list): (name, ratio) of every benchmark that got slower.
+    '''
+
+    slower = []
+    for name, result in results.items():
+        if name in previous:
+            ratio = result['min'] / previous[name]['min']
+            if ratio > threshold:
+                slower.append((name, ratio))
+    return slower
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Run the FUEL benchmarks.')
+    parser.add_argument('-k', dest='pattern', help='only run benchmarks whose name contains this')
+    parser.add_argument('--history', default=os.path.join(RESULTS_DIR, platform.node() + '.json'),
+                        help='history file the results are added to')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='how many times slower than the last run counts as slower (default 1.25)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='least time (s) spent on each benchmark')
+    parser.add_argument('--no-save', action='store_true', help='do not add the results to the history')
+    parser.add_argument('--check', action='store_true', help='exit with an error if any benchmark got slower')
+    args = parser.parse_args(args)
+
+    history = load_history(args.history)
+    previous = history[-1]['results'] if history else {}
+
+    results = {}
+    failed = []
+    for cls, method, values, name in benchmark_cases(args.pattern):
+        try:
+            results[name] = time_case(cls, method, values, args.min_time)
+        except Exception as error:
+            # one broken benchmark should not lose the results of the rest
+            failed.append(name)
+            print('%-75s failed: %s: %s' % (name, type(error).__name__, error))
+            continue
+        change = ''
+        if name in previous:
+            change = '  x%.2f' % (results[name]['min'] / previous[name]['min'])
+        print('%-75s %10.2f ms%s' % (name, results[name]['min'] * 1000, change))
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        history.append({'date': datetime.datetime.now().isoformat(timespec='seconds'), 'commit': git_commit(),
+                        'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                        'machine': platform.node(), 'results': results})
+        with open(args.history, 'w') as f:
+            json.dump(history, f, indent=1)
+
+    slower = compare(results, previous, args.threshold)
+    for name, ratio in slower:
+        print('slower: %s is %.2f times slower than the last run' % (name, ratio))
+    for name in failed:
+        print('failed: ' + name)
+    return 1 if failed or (args.check and slower) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
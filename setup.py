@@ -13,6 +13,9 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/HeatherMM1321/FUEL-package",
     packages=setuptools.find_packages(),
+    entry_points={
+        "console_scripts": ["fuel-analyse=FUEL.cli:main"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",